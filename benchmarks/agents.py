@@ -0,0 +1,134 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from instagram.agents import AsyncWebAgentAccount, WebAgentAccount
+from instagram.entities import Account, Media
+import multiprocessing
+import resource
+import subprocess
+from time import perf_counter
+
+
+OPERATIONS = {
+    "get_media": lambda agent, index, count: agent.get_media(Account("user%d" % index),
+                                                             count=count, limit=50),
+    "get_followers": lambda agent, index, count: agent.get_followers(Account("user%d" % index),
+                                                                     count=count, limit=50),
+    "get_comments": lambda agent, index, count: agent.get_comments(Media("B%d" % index),
+                                                                   count=count, limit=50),
+    "feed": lambda agent, index, count: agent.feed(count=count, limit=50),
+}
+
+
+def percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+def run_sync(url, operation, objects, count):
+    agent = WebAgentAccount("username", root_url=url)
+    agent.auth("password")
+    latencies = []
+    get_request = agent.get_request
+
+    def timed(*args, **kwargs):
+        start = perf_counter()
+        response = get_request(*args, **kwargs)
+        latencies.append(perf_counter() - start)
+        return response
+
+    agent.get_request = timed
+    start = perf_counter()
+    entities = sum(len(OPERATIONS[operation](agent, index, count)[0]) for index in range(objects))
+    return perf_counter() - start, entities, latencies
+
+
+def run_async(url, operation, objects, count, prefetch):
+    async def main():
+        agent = AsyncWebAgentAccount("username", root_url=url, prefetch=prefetch)
+        try:
+            await agent.auth("password")
+            latencies = []
+            get_request = agent.get_request
+
+            async def timed(*args, **kwargs):
+                start = perf_counter()
+                response = await get_request(*args, **kwargs)
+                latencies.append(perf_counter() - start)
+                return response
+
+            agent.get_request = timed
+            start = perf_counter()
+            # Objects are processed concurrently, this is what asyncio agents are for
+            results = await asyncio.gather(*(
+                OPERATIONS[operation](agent, index, count) for index in range(objects)
+            ))
+            return perf_counter() - start, sum(len(items) for items, _ in results), latencies
+        finally:
+            await agent.delete()
+
+    return asyncio.run(main())
+
+
+def scenario(url, agent, operation, objects, count, prefetch):
+    if agent == "WebAgent":
+        elapsed, entities, latencies = run_sync(url, operation, objects, count)
+    else:
+        elapsed, entities, latencies = run_async(url, operation, objects, count, prefetch)
+    return {
+        "pages": len(latencies),
+        "elapsed": elapsed,
+        "entities": entities,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        # Kilobytes on Linux
+        "rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agents against the local mock server")
+    parser.add_argument("--objects", type=int, default=4, help="objects per operation")
+    parser.add_argument("--count", type=int, default=1000, help="entities per object")
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency, seconds")
+    parser.add_argument("--prefetch", type=int, default=1, help="prefetch of asyncio agent")
+    parser.add_argument("operations", nargs="*", default=list(OPERATIONS))
+    args = parser.parse_args()
+
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests",
+                                      "mock_server.py"),
+         "--port", "0", "--total", str(args.count), "--latency", str(args.latency)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        url = server.stdout.readline().strip()
+        print("Mock server %s, latency %.0f ms, %d objects x %d entities" % (
+            url, args.latency * 1000, args.objects, args.count))
+        print("%-14s %-14s %6s %9s %11s %8s %8s %8s" % (
+            "agent", "operation", "pages", "pages/s", "entities/s", "p50 ms", "p99 ms", "RSS MB"))
+        for operation in args.operations:
+            for agent in ("WebAgent", "AsyncWebAgent"):
+                # Every scenario works in a new process, so peak RSS belongs to it only
+                context = multiprocessing.get_context("spawn")
+                with ProcessPoolExecutor(1, mp_context=context) as executor:
+                    result = executor.submit(scenario, url, agent, operation, args.objects,
+                                             args.count, args.prefetch).result()
+                print("%-14s %-14s %6d %9.1f %11.0f %8.1f %8.1f %8.1f" % (
+                    agent,
+                    operation,
+                    result["pages"],
+                    result["pages"] / result["elapsed"],
+                    result["entities"] / result["elapsed"],
+                    result["p50"] * 1000,
+                    result["p99"] * 1000,
+                    result["rss"],
+                ))
+    finally:
+        server.terminate()
+        server.wait()
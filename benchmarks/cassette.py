@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.agents import WebAgentAccount
+from instagram.cassette import Cassette
+from instagram.entities import Account, Media
+from tests.mock_server import MockInstagram
+from time import perf_counter
+
+
+def workload(agent, count):
+    for cls in (Account, Media, WebAgentAccount):
+        cls.clear_cache()
+    start = perf_counter()
+    agent.auth("password")
+    agent.get_media(Account("zuck"), count=count, limit=50)
+    agent.get_followers(Account("zuck"), count=count, limit=50)
+    return perf_counter() - start
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    cassette = Cassette(mode="record")
+    with MockInstagram(total=count, latency=latency).run() as url:
+        live = workload(WebAgentAccount("username", root_url=url, cassette=cassette), count)
+
+    cassette.mode = "replay"
+    replay = workload(WebAgentAccount("username", root_url=url, cassette=cassette), count)
+    size = sum(len(body) for body in cassette.bodies.values())
+    print("Workload: auth, %d media and %d followers, server latency %.0f ms" % (
+        count, count, latency * 1000))
+    print("Requests: %d, bodies %.1f KB, cassette %.1f KB" % (
+        len(cassette), size / 1024, len(cassette.dumps()) / 1024))
+    print("Live:   %.3f s" % live)
+    print("Replay: %.3f s (%.0fx faster)" % (replay, live / replay))
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.agents import parse_media
+from instagram.entities import Account, Location, Media
+from tests.mock_server import media_node
+from time import perf_counter
+
+
+def album_node(index):
+    # Every media has a location and every fourth one is an album, they take longer to decode
+    node = media_node(index, "user%d" % (index % 100))
+    node["location"] = {"id": str(index % 50)}
+    if index % 4 == 0:
+        node["__typename"] = "GraphSidecar"
+        node["edge_sidecar_to_children"] = {"edges": [
+            {"node": {"shortcode": "C%010d_%d" % (index, child)}} for child in range(3)
+        ]}
+    return node
+
+
+def measure(pages, **kwargs):
+    Account.clear_cache()
+    Location.clear_cache()
+    Media.clear_cache()
+    owner = Location("location")
+    start = perf_counter()
+    for data in pages:
+        for media in parse_media(owner, data, **kwargs):
+            media.code, media.id, media.likes_count
+    elapsed = perf_counter() - start
+    owner.media.clear()
+    return elapsed
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    # Pages of 50 media as they come from GraphQL
+    pages = [{"edges": [{"node": album_node(page * 50 + index)} for index in range(50)]}
+             for page in range(count // 50)]
+    total = len(pages) * 50
+    eager = measure(pages)
+    print("Media: %d, only code, id and likes_count are read" % total)
+    print("Eager:      %.1f ms (%.0f media/s)" % (eager * 1000, total / eager))
+    for name, kwargs in (("Projection", {"fields": ("id", "likes_count")}),
+                         ("Lazy", {"lazy": True})):
+        elapsed = measure(pages, **kwargs)
+        print("%-11s %.1f ms (%.0f media/s, %.1fx)" % (
+            name + ":", elapsed * 1000, total / elapsed, eager / elapsed))
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.entities import Account, Media
+import tracemalloc
+
+
+def account_node(index):
+    return {
+        "id": str(index),
+        "full_name": "Full Name %d" % index,
+        "profile_pic_url": "https://example.com/%d.jpg" % index,
+        "profile_pic_url_hd": "https://example.com/%d_hd.jpg" % index,
+        "connected_fb_page": None,
+        "biography": "",
+        "edge_follow": {"count": index},
+        "edge_followed_by": {"count": index},
+        "edge_owner_to_timeline_media": {"count": index},
+        "is_private": False,
+        "is_verified": False,
+        "country_block": False,
+    }
+
+
+def measure(count, compact):
+    Account.clear_cache()
+    Media.clear_cache()
+    Account.set_compact(compact)
+    Media.set_compact(compact)
+
+    tracemalloc.start()
+    for index in range(count):
+        account = Account("user%d" % index)
+        account.set_data(account_node(index))
+        media = Media("code%d" % index)
+        media.id = str(index)
+        media.owner = account
+        media.likes_count = index
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    Account.clear_cache()
+    Media.clear_cache()
+    Account.set_compact(False)
+    Media.set_compact(False)
+    return size
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    regular = measure(count, False)
+    compact = measure(count, True)
+    print("Entities: %d accounts + %d media" % (count, count))
+    print("Regular: %.1f MB (%d bytes per pair)" % (regular / 2 ** 20, regular / count))
+    print("Compact: %.1f MB (%d bytes per pair)" % (compact / 2 ** 20, compact / count))
+    print("Saved: %.0f%%" % (100 - compact * 100 / regular))
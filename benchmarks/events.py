@@ -0,0 +1,78 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.agents import WebAgent, parse_media
+from instagram.entities import Account, Location, Media
+import gc
+import io
+import logging
+from tests.mock_server import media_node
+from time import perf_counter
+
+
+def measure(agent, pages, parse):
+    # Pagination loop of get_media without network: pages are already decoded
+    def fetch(pointer, first):
+        page = pages[int(pointer or 0)]
+        return page, "https://www.instagram.com/graphql/query/"
+
+    Account.clear_cache()
+    Location.clear_cache()
+    Media.clear_cache()
+    owner = Location("location")
+    gc.collect()
+    gc.disable()
+    try:
+        start = perf_counter()
+        agent.events.started("Get media", owner)
+        agent.collect(agent.paginate(fetch, lambda data, count: parse(owner, data, count),
+                                     count=len(pages) * 50))
+        agent.events.succeeded("Get media", owner)
+        return perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def logger(level):
+    logger = logging.getLogger("benchmark.%s" % logging.getLevelName(level).lower())
+    logger.setLevel(level)
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(io.StringIO()))
+    return logger
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    pages = [{
+        "edges": [{"node": media_node(page * 50 + index)} for index in range(50)],
+        "page_info": {"has_next_page": page + 1 < count, "end_cursor": str(page + 1)},
+    } for page in range(count)]
+
+    print("Pages: %d of 50 media, best of %d runs" % (count, repeats))
+    agents = (
+        ("No logger", WebAgent()),
+        ("WARNING", WebAgent(logger=logger(logging.WARNING))),
+        ("WARNING, pages", WebAgent(logger=logger(logging.WARNING), log_pages=True)),
+        ("INFO", WebAgent(logger=logger(logging.INFO))),
+        ("DEBUG, pages", WebAgent(logger=logger(logging.DEBUG), log_pages=True)),
+    )
+    for title, parse in (
+        ("Pagination with parse_media", parse_media),
+        # Only the loop itself, so the cost of the events is not hidden behind decoding
+        ("Pagination only", lambda owner, data, count: data["edges"]),
+    ):
+        # Runs of the agents alternate, so a slow moment of the machine doesn't hit one of them
+        results = dict()
+        for _ in range(repeats):
+            for name, agent in agents:
+                elapsed = measure(agent, pages, parse)
+                results[name] = min(results.get(name, elapsed), elapsed)
+
+        print(title)
+        baseline = results["No logger"]
+        for name, _ in agents:
+            print("  %-15s %8.2f ms %8.2f us/page %+7.2f%%" % (
+                name + ":", results[name] * 1000, results[name] / count * 1000000,
+                (results[name] / baseline - 1) * 100))
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.exceptions import ExceptionManager, InstagramException
+from timeit import timeit
+
+
+def action(exception, *args, **kwargs):
+    return args, kwargs
+
+
+def hierarchy(depth, width):
+    # Chain of depth exception types, every level also has width - 1 siblings in the tree
+    manager = ExceptionManager()
+    base = InstagramException
+    for level in range(depth):
+        for sibling in range(width - 1):
+            manager[type("Sibling%d_%d" % (level, sibling), (base,), {})] = action
+        base = type("Level%d" % level, (base,), {})
+        manager[base] = action
+    return manager, type("Raised", (base,), {})
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    width = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    number = 100000
+    manager, exception = hierarchy(depth, width)
+
+    tree = timeit(lambda: manager.search_tree(exception), number=number)
+    cached = timeit(lambda: manager[exception], number=number)
+    print("Hierarchy: depth %d, width %d" % (depth, width))
+    print("Tree walk: %.2f us per lookup" % (tree * 10 ** 6 / number))
+    print("Cached: %.2f us per lookup" % (cached * 10 ** 6 / number))
@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.agents import parse_media
+from instagram.entities import Account, ElementCache, Media, WeakElementCache
+import resource
+import subprocess
+from tests.mock_server import media_node
+from time import perf_counter
+
+
+def rss():
+    # Resident memory of the process in MB, Linux only
+    with open("/proc/self/statm") as file:
+        return int(file.read().split()[1]) * resource.getpagesize() / 2 ** 20
+
+
+def crawl(count, cache):
+    # Media of one account are parsed page by page and dropped after use, as a crawler does
+    Media.set_cache(WeakElementCache() if cache == "weak" else ElementCache())
+    account = Account("zuck")
+    start = perf_counter()
+    for page in range(count // 50):
+        data = {"edges": [{"node": media_node(page * 50 + index, "zuck")} for index in range(50)]}
+        for media in parse_media(account, data):
+            media.code, media.id, media.likes_count
+        # Relation of the account keeps the media too, the crawler doesn't need it
+        account.media.clear()
+    elapsed = perf_counter() - start
+    print("%-6s %8d cached, rss %7.1f MB, max rss %7.1f MB, %.1f s" % (
+        cache + ":",
+        len(Media.cache),
+        rss(),
+        # ru_maxrss is in KB on Linux
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        elapsed,
+    ))
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    if len(sys.argv) > 2:
+        crawl(count, sys.argv[2])
+    else:
+        # Every cache is measured in its own process, so max rss of one doesn't hide the other
+        print("Media: %d in pages of 50, baseline rss %.1f MB" % (count, rss()))
+        for cache in ("strong", "weak"):
+            subprocess.run([sys.executable, __file__, str(count), cache], check=True)
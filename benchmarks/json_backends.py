@@ -0,0 +1,49 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.codec import available_json_backends, get_json_loads
+import json
+from tests.mock_server import media_node
+from timeit import repeat
+
+
+def account_node(index):
+    return {
+        "id": str(1000000 + index),
+        "username": "username%d" % index,
+        "full_name": "Full Name %d" % index,
+        "profile_pic_url": "https://scontent.cdninstagram.com/%d.jpg" % index,
+        "is_verified": False,
+        "followed_by_viewer": False,
+        "requested_by_viewer": False,
+    }
+
+
+def graphql_page(path, node, first=50):
+    data = {"count": 100000, "page_info": {"has_next_page": True, "end_cursor": "QVFC" * 20},
+            "edges": [{"node": node(index)} for index in range(first)]}
+    for key in reversed(path):
+        data = {key: data}
+    return json.dumps({"data": data, "status": "ok"}).encode("utf-8")
+
+
+PAGES = {
+    "media": graphql_page(("user", "edge_owner_to_timeline_media"), media_node),
+    "followers": graphql_page(("user", "edge_followed_by"), account_node),
+}
+
+
+if __name__ == "__main__":
+    number = 200
+    backends = available_json_backends()
+    print("Backends: %s, default: %s" % (", ".join(backends), backends[0]))
+    for name, page in PAGES.items():
+        print("%s page, 50 nodes, %d KB:" % (name, len(page) // 1024))
+        times = dict()
+        for backend in backends:
+            loads = get_json_loads(backend)
+            assert loads(page) == json.loads(page)
+            times[backend] = min(repeat(lambda: loads(page), number=number, repeat=5)) / number
+        for backend, time in times.items():
+            print("  %-8s %.3f ms (%.1fx)" % (backend, time * 1000, times["json"] / time))
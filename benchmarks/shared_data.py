@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from instagram.agents import get_shared_data
+import json
+import re
+from tests.mock_server import media_node
+from timeit import repeat
+
+
+PATTERN = r"<script[^>]*>\s*window._sharedData\s*=\s*((?!<script>).*)\s*;\s*</script>"
+
+
+def regex(text):
+    return re.search(PATTERN, text).group(1)
+
+
+def scan(text):
+    return get_shared_data(text, loads=lambda data: data)
+
+
+def page(size, minified=False):
+    # Synthetic profile page: head with inline scripts and styles, then _sharedData with a user
+    # and 12 media, then more scripts. Size is the approximate size in KB. In minified page there
+    # are no line breaks, so the regex has to backtrack from the end of the document
+    data = {
+        "config": {"csrf_token": "token", "viewer": None},
+        "rhx_gis": "gis",
+        "entry_data": {"ProfilePage": [{"graphql": {"user": {
+            "id": "1",
+            "username": "username",
+            "biography": "Biography " * 20,
+            "edge_owner_to_timeline_media": {
+                "count": 1000,
+                "edges": [{"node": media_node(index)} for index in range(12)],
+            },
+        }}}]},
+    }
+    shared = json.dumps(data)
+    filler = "<script type=\"text/javascript\">window.__bundle = \"%s\"</script>%s" % (
+        "x" * 1000,
+        "" if minified else "\n",
+    )
+    count = max(0, size * 1024 - len(shared)) // len(filler)
+    return "".join([
+        "<!DOCTYPE html><html><head><style>body { margin: 0 }</style>\n",
+        filler * (count // 2),
+        "</head><body>\n<script type=\"text/javascript\">window._sharedData = ",
+        shared,
+        ";</script>\n",
+        filler * (count - count // 2),
+        "</body></html>",
+    ])
+
+
+def corpus(directory=None):
+    if directory is None:
+        return [page(size, minified) for minified in (False, True) for size in (50, 200, 800)]
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), encoding="utf-8") as file:
+                pages.append(file.read())
+    return pages
+
+
+def measure(function, text, number=50):
+    return min(repeat(lambda: function(text), number=number, repeat=5)) / number
+
+
+if __name__ == "__main__":
+    # Pass a directory with saved Instagram pages (*.html) to use them instead of synthetic ones
+    pages = corpus(sys.argv[1] if len(sys.argv) > 1 else None)
+    for text in pages:
+        assert regex(text) == scan(text)
+        old = measure(regex, text)
+        new = measure(scan, text)
+        print("%4d KB, %d lines: regex %.3f ms, scan %.3f ms (%.1fx), scan + json %.3f ms" % (
+            len(text) // 1024,
+            text.count("\n") + 1,
+            old * 1000,
+            new * 1000,
+            old / new,
+            measure(get_shared_data, text) * 1000,
+        ))
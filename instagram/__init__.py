@@ -1,4 +1,11 @@
 from .agents import *
+from .cassette import *
+from .codec import *
 from .entities import *
+from .events import *
 from .exceptions import *
-
+from .metrics import *
+from .pool import *
+from .store import *
+from .throttling import *
+from .tracing import *
@@ -1,54 +1,333 @@
 import aiohttp
+from array import array
 import asyncio
+from .cassette import Cassette
+from contextlib import asynccontextmanager
 import hashlib
 from .entities import (Account, Comment, Element, HasMediaElement,Media, Location, Story, Tag,
                        UpdatableElement)
+from .events import EventLog
+from .codec import get_json_loads
 from .exceptions import (AuthException, CheckpointException, ExceptionManager,
                          IncorrectVerificationTypeException, InstagramException,
                          InternetException, UnexpectedResponse, NotUpdatedElement)
 import json
+from .metrics import Metrics, get_operation, get_size
+from multidict import CIMultiDict, CIMultiDictProxy
 import re
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
-from time import sleep
+from requests.structures import CaseInsensitiveDict
+from .store import AccountStore, MediaStore, StoreView
+from threading import Lock
+from .throttling import ConcurrencyController, RateLimiter
+from .tracing import Tracer, no_span, traced
+from time import monotonic, perf_counter, sleep
+from yarl import URL
+import zlib
 
 
 exception_manager = ExceptionManager()
+SHARED_DATA_ASSIGNMENT = re.compile(r"\s*=")
+
+
+def parse_media(obj, data, count=None, store=None, fields=None, lazy=False):
+    edges = data["edges"][:count]
+    if not store is None:
+        start = len(store)
+        owner = obj.username if isinstance(obj, Account) else None
+        for edge in edges:
+            store.append_node(edge["node"], owner=owner)
+        return store.view(start)
+
+    medias = []
+    for edge in edges:
+        node = edge["node"]
+        m = Media(node["shortcode"])
+        if lazy:
+            m.set_lazy(node)
+        else:
+            m.set_data(node, fields)
+        if isinstance(obj, Account):
+            m.likes_count = node["edge_media_preview_like"]["count"]
+            m.owner = obj
+        else:
+            m.likes_count = node["edge_liked_by"]
+        obj.media.add(m)
+        medias.append(m)
+    return medias
+
+
+def parse_accounts(data, count=None, relation=None, store=None):
+    edges = data["edges"][:count]
+    if not store is None:
+        start = len(store)
+        for edge in edges:
+            store.append_node(edge["node"])
+        return store.view(start)
+
+    accounts = []
+    for edge in edges:
+        node = edge["node"]
+        account = Account(node["username"])
+        account.id = node["id"]
+        account.profile_pic_url = node["profile_pic_url"]
+        account.is_verified = node["is_verified"]
+        account.full_name = node["full_name"]
+        if not relation is None:
+            relation.add(account)
+        accounts.append(account)
+    return accounts
+
+
+def parse_comments(media, data, count=None):
+    comments = []
+    for edge in data["edges"][:count]:
+        node = edge["node"]
+        c = Comment(node["id"],
+                    media=media,
+                    owner=Account(node["owner"]["username"]),
+                    text=node["text"],
+                    created_at=node["created_at"])
+        media.comments.add(c)
+        comments.append(c)
+    return comments
+
+
+def parse_feed(data, count=None, store=None, fields=None, lazy=False):
+    edges = [edge for edge in data["edges"][:count] if "shortcode" in edge["node"]]
+    if not store is None:
+        start = len(store)
+        for edge in edges:
+            store.append_node(edge["node"])
+        return store.view(start)
+
+    feed = []
+    for edge in edges:
+        m = Media(edge["node"]["shortcode"])
+        if lazy:
+            m.set_lazy(edge["node"])
+        else:
+            m.set_data(edge["node"], fields)
+        feed.append(m)
+    return feed
+
+
+class Pagination:
+    # pointer is the cursor of the next page. The iteration stopped in the middle of a page is
+    # resumed from page_pointer, the cursor of the current page, skipping offset items of it
+    def __init__(self, pages, pointer=None):
+        self.pages = pages
+        self.pointer = pointer
+        self.page_pointer = pointer
+        self.offset = 0
+
+    def __iter__(self):
+        for items, pointer in self.pages:
+            self.page_pointer = self.pointer
+            self.pointer = pointer
+            self.offset = 0
+            for item in items:
+                self.offset += 1
+                yield item
+
+
+class AsyncPagination:
+    def __init__(self, pages, pointer=None):
+        self.pages = pages
+        self.pointer = pointer
+        self.page_pointer = pointer
+        self.offset = 0
+
+    async def __aiter__(self):
+        async for items, pointer in self.pages:
+            self.page_pointer = self.pointer
+            self.pointer = pointer
+            self.offset = 0
+            for item in items:
+                self.offset += 1
+                yield item
+
+    async def aclose(self):
+        await self.pages.aclose()
+
+
+class AsyncResponse:
+    # Response of the asyncio agents with the body read before the connection is released
+    def __init__(self, url, status, headers, body, encoding="utf-8", loads=json.loads):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.encoding = encoding
+        self.loads = loads
+
+    async def read(self):
+        return self.body
+
+    async def text(self, encoding=None):
+        return self.body.decode(self.encoding if encoding is None else encoding)
+
+    async def json(self):
+        return self.loads(self.body)
+
+    def raise_for_status(self, method="GET", reason=None):
+        if self.status >= 400:
+            url = URL(str(self.url))
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(url, method, CIMultiDictProxy(CIMultiDict()), url),
+                (),
+                status=self.status,
+                message=reason or "",
+                headers=CIMultiDictProxy(CIMultiDict(self.headers)),
+            )
+
+
+def replay_response(method, record):
+    response = requests.Response()
+    response.status_code = record.status
+    response.reason = record.reason
+    response.url = record.url
+    response.headers = CaseInsensitiveDict(record.headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.request = requests.Request(method, record.url).prepare()
+    response._content = record.body
+    return response
+
+
+def get_shared_data(text, loads=json.loads):
+    # Linear scan for "window._sharedData = {...};</script>" without backtracking regex. Other uses
+    # of the variable, like "window._sharedData.config", are skipped
+    start = text.find("window._sharedData")
+    while start >= 0:
+        start += len("window._sharedData")
+        assignment = SHARED_DATA_ASSIGNMENT.match(text, start)
+        if not assignment is None:
+            break
+        start = text.find("window._sharedData", start)
+    if start < 0:
+        raise ValueError("'window._sharedData' is not found")
+    start = assignment.end()
+    end = text.find("</script>", start)
+    if end < 0:
+        raise ValueError("'</script>' is not found after 'window._sharedData'")
+    data = text[start:end].strip()
+    if not data.endswith(";"):
+        raise ValueError("';' is not found after 'window._sharedData'")
+    return loads(data[:-1])
+
+
+def dump_state(state):
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"), 9)
+
+
+def load_state(state):
+    if isinstance(state, (bytes, bytearray)):
+        return json.loads(zlib.decompress(state).decode("utf-8"))
+    if isinstance(state, dict):
+        return state
+    raise TypeError("'state' must be bytes or dict type")
 
 
 class WebAgent:
-    def __init__(self, cookies=None, logger=None):
+    def __init__(self, cookies=None, logger=None, rate_limiter=None, adapter=None,
+                 pool_connections=10, pool_maxsize=10, token_ttl=3600, json_backend=None,
+                 root_url="https://www.instagram.com", cassette=None, metrics=None,
+                 tracer=None, log_pages=False):
+        if not isinstance(rate_limiter, RateLimiter) and not rate_limiter is None:
+            raise TypeError("'rate_limiter' must be RateLimiter type or None")
+        if not isinstance(adapter, HTTPAdapter) and not adapter is None:
+            raise TypeError("'adapter' must be HTTPAdapter type or None")
+        if not isinstance(pool_connections, int):
+            raise TypeError("'pool_connections' must be int type")
+        if not isinstance(pool_maxsize, int):
+            raise TypeError("'pool_maxsize' must be int type")
+        if not isinstance(token_ttl, (int, float)) and not token_ttl is None:
+            raise TypeError("'token_ttl' must be int or float type or None")
+        if not isinstance(root_url, str):
+            raise TypeError("'root_url' must be str type")
+        if not isinstance(cassette, Cassette) and not cassette is None:
+            raise TypeError("'cassette' must be Cassette type or None")
+        if not isinstance(metrics, Metrics) and not metrics is None:
+            raise TypeError("'metrics' must be Metrics type or None")
+        if not isinstance(tracer, Tracer) and not tracer is None:
+            raise TypeError("'tracer' must be Tracer type or None")
+
         self.rhx_gis = None
         self.csrf_token = None
         self.session = requests.Session()
+        # Adapter keeps the connection pool, the same adapter can be passed to many agents
+        if adapter is None:
+            adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         if cookies:
             self.session.cookies = requests.cookies.cookiejar_from_dict(cookies)
         self.logger = logger
+        self.events = EventLog(logger, pages=log_pages)
+        self.rate_limiter = rate_limiter
+        self.token_ttl = token_ttl
+        self.tokens_updated = None
+        self.bootstrap_lock = Lock()
+        self.page_loads = 0
+        self.loads = get_json_loads(json_backend)
+        # Requests are sent to this url, it can be changed to use a local server in tests
+        self.root_url = root_url.rstrip("/")
+        self.cassette = cassette
+        self.metrics = metrics
+        self.tracer = tracer
+        if not tracer is None:
+            self.loads = tracer.wrap("decode", self.loads)
+
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        state = load_state(state)
+        agent = cls(**kwargs)
+        agent.set_state(state)
+        return agent
+
+    def get_state(self):
+        return {
+            "cookies": self.session.cookies.get_dict(),
+            "csrf_token": self.csrf_token,
+            "rhx_gis": self.rhx_gis,
+        }
+
+    def set_state(self, state):
+        self.session.cookies.update(state.get("cookies", {}))
+        self.csrf_token = state.get("csrf_token")
+        self.rhx_gis = state.get("rhx_gis")
+        self.tokens_updated = monotonic()
 
+    def dump_state(self):
+        return dump_state(self.get_state())
+
+    @traced
     @exception_manager.decorator
     def update(self, obj=None, settings=None):
-        if not self.logger is None:
-            self.logger.info("Update '%s' started", "self" if obj is None else obj)
+        self.events.started("Update", obj)
         if not isinstance(obj, UpdatableElement) and not obj is None:
             raise TypeError("obj must be UpdatableElement type or None")
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
         settings = dict() if settings is None else settings.copy()
 
-        query = "https://www.instagram.com/"
+        query = self.root_url + "/"
         if not obj is None:
             query += obj.base_url + getattr(obj, obj.primary_key)
 
+        if not self.rate_limiter is None:
+            self.rate_limiter.acquire("page")
+        self.page_loads += 1
         response = self.get_request(query, **settings)
 
         try:
-            match = re.search(
-                r"<script[^>]*>\s*window._sharedData\s*=\s*((?!<script>).*)\s*;\s*</script>",
-                response.text,
-            )
-            data = json.loads(match.group(1))
+            with no_span if self.tracer is None else self.tracer.span("extract"):
+                data = get_shared_data(response.text, self.loads)
             self.rhx_gis = data["rhx_gis"]
             self.csrf_token = data["config"]["csrf_token"]
+            self.tokens_updated = monotonic()
 
             if obj is None:
                 return None
@@ -56,295 +335,292 @@ class WebAgent:
             data = data["entry_data"]
             for key in obj.entry_data_path:
                 data=data[key]
-            obj.set_data(data)
+            with no_span if self.tracer is None else self.tracer.span("set_data"):
+                obj.set_data(data)
 
-            if not self.logger is None:
-                self.logger.info("Update '%s' was successfull", "self" if obj is None else obj)
+            self.events.succeeded("Update", obj)
             return data
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Update '%s' was unsuccessfull: %s",
-                    "self" if obj is None else obj,
-                    str(exception),
-                )
+            self.events.failed("Update", obj, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    def tokens_fresh(self):
+        if self.rhx_gis is None or self.csrf_token is None:
+            return False
+        return self.token_ttl is None or self.tokens_updated is None or \
+            monotonic() - self.tokens_updated < self.token_ttl
+
+    def bootstrap(self, settings=None):
+        # Main page is loaded only when rhx_gis or csrf_token are unknown or outdated
+        if self.tokens_fresh():
+            return
+        with self.bootstrap_lock:
+            # Tokens could be updated by another thread while this one waited for the lock
+            if not self.tokens_fresh():
+                self.update(settings=settings)
+
+    def resolve_media_id(self, media, settings=None):
+        if media.id is None:
+            media.id = Media.code_to_id(media.code)
+        if media.id is None:
+            self.update(media, settings=settings)
+        return media.id
+
+    @traced
     @exception_manager.decorator
-    def get_media(self, obj, pointer=None, count=12, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get media '%s' started", obj)
+    def get_media(self, obj, pointer=None, count=12, limit=50, delay=0, settings=None, store=None,
+                  fields=None, lazy=False):
+        self.events.started("Get media", obj)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            medias, pointer = self.collect(
+                self.iter_media(obj, pointer=pointer, count=count, limit=limit, delay=delay,
+                                settings=settings, store=store, fields=fields, lazy=lazy).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get media", obj, exception)
+            raise
+        self.events.succeeded("Get media", obj)
+        return medias, pointer
+
+    def iter_media(self, obj, pointer=None, count=None, limit=50, delay=0, settings=None,
+                   store=None, fields=None, lazy=False):
         if not isinstance(obj, HasMediaElement):
             raise TypeError("'obj' must be HasMediaElement type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, MediaStore) and not store is None:
+            raise TypeError("'store' must be MediaStore type or None")
+        if not isinstance(fields, (tuple, list)) and not fields is None:
+            raise TypeError("'fields' must be tuple or list type or None")
+        if not fields is None and not set(fields).issubset(Media.decoders):
+            raise ValueError("'fields' must contain names of Media attributes only")
+        if not isinstance(lazy, bool):
+            raise TypeError("'lazy' must be bool type")
+
+        return Pagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_media(obj, pointer, first, settings),
+                parse=lambda data, count: parse_media(obj, data, count, store=store,
+                                                      fields=fields, lazy=lazy),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
-        variables_string = '{{"{name}":"{name_value}","first":{first},"after":"{after}"}}'
-        medias = []
-
-        if pointer is None:
+    def fetch_media(self, obj, pointer=None, first=12, settings=None):
+        # Profile page is needed for the first page only while id of the object is unknown
+        if pointer is None and not isinstance(obj, Tag) and obj.id is None:
+            url = self.root_url + "/" + obj.base_url + getattr(obj, obj.primary_key)
+            data = self.update(obj, settings=settings)
             try:
-                data = self.update(obj, settings=settings)
-                data = data[obj.media_path[-1]]
-
-                page_info = data["page_info"]
-                edges = data["edges"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    if isinstance(obj, Account):
-                        m.likes_count = node["edge_media_preview_like"]["count"]
-                        m.owner = obj
-                    else:
-                        m.likes_count = node["edge_liked_by"]
-
-                    obj.media.add(m)
-                    medias.append(m)
-
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
-
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get media '%s' was successfull", obj)
-                    return medias, pointer
+                return data[obj.media_path[-1]], url
             except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get media '%s' was unsuccessfull: %s", obj, str(exception))
-                raise UnexpectedResponse(
-                    exception,
-                    "https://www.instagram.com/" + obj.base_url + getattr(obj, obj.primary_key),
-                )
-
-        while True:
-            data = {"after": pointer, "first": min(limit, count)}
-            if isinstance(obj, Tag):
-                data["name"] = "tag_name"
-                data["name_value"] = obj.name
-            else:
-                data["name"] = "id"
-                data["name_value"] = obj.id
-
-            response = self.graphql_request(
-                query_hash=obj.media_query_hash,
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/" + obj.base_url + getattr(obj, obj.primary_key),
-                settings=settings,
-            )
+                raise UnexpectedResponse(exception, url)
 
-            try:
-                data = response.json()["data"]
-                for key in obj.media_path:
-                    data = data[key]
-                page_info = data["page_info"]
-                edges = data["edges"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    if isinstance(obj, Account):
-                        m.likes_count = node["edge_media_preview_like"]["count"]
-                        m.owner = obj
-                    else:
-                        m.likes_count = node["edge_liked_by"]
-                    obj.media.add(m)
-                    medias.append(m)
+        if pointer is None:
+            variables_string = '{{"{name}":"{name_value}","first":{first}}}'
+        else:
+            variables_string = '{{"{name}":"{name_value}","first":{first},"after":"{after}"}}'
+        data = {"after": pointer, "first": first}
+        if isinstance(obj, Tag):
+            data["name"] = "tag_name"
+            data["name_value"] = obj.name
+        else:
+            data["name"] = "id"
+            data["name_value"] = obj.id
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = self.graphql_request(
+            query_hash=obj.media_query_hash,
+            variables=variables_string.format(**data),
+            referer="https://instagram.com/" + obj.base_url + getattr(obj, obj.primary_key),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get media '%s' was successfull", obj)
-                    return medias, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get media '%s' was unsuccessfull: %s", obj, str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = self.loads(response.content)["data"]
+            for key in obj.media_path:
+                data = data[key]
+            obj.media_count = data.get("count", obj.media_count)
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
-    def get_likes(self, media, pointer=None, count=20, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get likes '%s' started", media)
+    def get_likes(self, media, pointer=None, count=20, limit=50, delay=0, settings=None,
+                  store=None):
+        self.events.started("Get likes", media)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            likes, pointer = self.collect(
+                self.iter_likes(media, pointer=pointer, count=count, limit=limit, delay=delay,
+                                settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get likes", media, exception)
+            raise
+        self.events.succeeded("Get likes", media)
+        return likes, pointer
+
+    def iter_likes(self, media, pointer=None, count=None, limit=50, delay=0, settings=None,
+                   store=None):
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        return Pagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_likes(media, pointer, first, settings),
+                parse=lambda data, count: parse_accounts(data, count, media.likes, store),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
-        if media.id is None:
-            self.update(media, settings=settings)
-
+    def fetch_likes(self, media, pointer=None, first=20, settings=None):
         if pointer:
             variables_string = '{{"shortcode":"{shortcode}","first":{first},"after":"{after}"}}'
         else:
             variables_string = '{{"shortcode":"{shortcode}","first":{first}}}'
-        likes = []
-
-        while True:
-            data = {"shortcode": media.code, "first": min(limit, count)}
-            if pointer:
-                data["after"] = pointer
-
-            response = self.graphql_request(
-                query_hash="1cb6ec562846122743b61e492c85999f",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    media.base_url,
-                    getattr(media, media.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = response.json()["data"]["shortcode_media"]["edge_liked_by"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                media.likes_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    account = Account(node["username"])
-                    account.id = node["id"]
-                    account.profile_pic_url = node["profile_pic_url"]
-                    account.is_verified = node["is_verified"]
-                    account.full_name = node["full_name"]
-                    media.likes.add(account)
-                    likes.append(account)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = self.graphql_request(
+            query_hash="1cb6ec562846122743b61e492c85999f",
+            variables=variables_string.format(shortcode=media.code, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                media.base_url,
+                getattr(media, media.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count-len(edges)
-                    variables_string = \
-                        '{{"shortcode":"{shortcode}","first":{first},"after":"{after}"}}'
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get likes '%s' was successfull", media)
-                    return likes, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get likes '%s' was unsuccessfull: %s", media, str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = self.loads(response.content)["data"]["shortcode_media"]["edge_liked_by"]
+            media.likes_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def get_comments(self, media, pointer=None, count=35, limit=32, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get comments '%s' started", media)
+        self.events.started("Get comments", media)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            comments, pointer = self.collect(
+                self.iter_comments(media, pointer=pointer, count=count, limit=limit, delay=delay,
+                                   settings=settings).pages,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get comments", media, exception)
+            raise
+        self.events.succeeded("Get comments", media)
+        return comments, pointer
+
+    def iter_comments(self, media, pointer=None, count=None, limit=32, delay=0, settings=None):
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
 
-        comments = []
+        return Pagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_comments(media, pointer, first, settings),
+                parse=lambda data, count: parse_comments(media, data, count),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
+    def fetch_comments(self, media, pointer=None, first=35, settings=None):
         if pointer is None:
-            try:
-                data = self.update(media, settings=settings)
-                if "edge_media_to_comment" in data:
-                    data = data["edge_media_to_comment"]
-                else:
-                    data = data["edge_media_to_parent_comment"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    c = Comment(node["id"], media=media,
-                                owner=Account(node["owner"]["username"]),
-                                text=node["text"],
-                                created_at=node["created_at"])
-                    media.comments.add(c)
-                    comments.append(c)
-
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+            variables_string = '{{"shortcode":"{code}","first":{first}}}'
+        else:
+            variables_string = '{{"shortcode":"{code}","first":{first},"after":"{after}"}}'
+        response = self.graphql_request(
+            query_hash="f0986789a5c5d17c2400faebf16efd0d",
+            variables=variables_string.format(after=pointer, code=media.code, first=first),
+            referer="https://instagram.com/%s%s" % (
+                media.base_url,
+                getattr(media, media.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and not pointer is None:
-                    count = count-len(edges)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get comments '%s' was successfull", media)
-                    return comments, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get comments '%s' was unsuccessfull: %s",
-                        media,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, media)
+        try:
+            data = self.loads(response.content)["data"]["shortcode_media"]["edge_media_to_comment"]
+            media.comments_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
-        variables_string = '{{"shortcode":"{code}","first":{first},"after":"{after}"}}'
+    def paginate(self, fetch, parse, pointer=None, count=None, limit=50, delay=0):
+        parse = self.events.parser(parse)
+        if not self.tracer is None:
+            parse = self.tracer.wrap("parse", parse)
         while True:
-            data = {"after": pointer, "code": media.code, "first": min(limit, count)}
-
-            response = self.graphql_request(
-                query_hash="f0986789a5c5d17c2400faebf16efd0d",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    media.base_url,
-                    getattr(media, media.primary_key),
-                ),
-                settings=settings,
-            )
-
+            data, url = fetch(pointer, limit if count is None else min(limit, count))
             try:
-                data = response.json()["data"]["shortcode_media"]["edge_media_to_comment"]
-                media.comments_count = data["count"]
-                edges = data["edges"]
+                items = parse(data, count)
                 page_info = data["page_info"]
-                
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    c = Comment(node["id"],
-                                media=media,
-                                owner=Account(node["owner"]["username"]),
-                                text=node["text"],
-                                created_at=node["created_at"])
-                    media.comments.add(c)
-                    comments.append(c)
-                
                 pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
-
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get comments '%s' was successfull", media)
-                    return comments, pointer
             except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get comments '%s' was unsuccessfull: %s",
-                        media,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+                raise UnexpectedResponse(exception, url)
+            yield items, pointer
+
+            if pointer is None or not count is None and len(items) >= count:
+                return
+            if not count is None:
+                count -= len(items)
+            sleep(delay)
+
+    def collect(self, pages, store=None):
+        items = [] if store is None else array("q")
+        pointer = None
+        for page, pointer in pages:
+            if store is None:
+                items.extend(page)
+            else:
+                items.extend(page.indexes)
+        return (items if store is None else StoreView(store, items)), pointer
 
     def graphql_request(self, query_hash, variables, referer, settings=None):
         if not isinstance(query_hash, str):
@@ -353,6 +629,7 @@ class WebAgent:
             raise TypeError("'variables' must be str type")
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
+        self.bootstrap(settings)
         settings = dict() if settings is None else settings.copy()
 
         if not "params" in settings:
@@ -370,7 +647,9 @@ class WebAgent:
             "Referer": referer,
         })
 
-        return self.get_request("https://www.instagram.com/graphql/query/", **settings)
+        if not self.rate_limiter is None:
+            self.rate_limiter.acquire("graphql:" + query_hash)
+        return self.get_request(self.root_url + "/graphql/query/", **settings)
 
     def action_request(self, referer, url, data=None, settings=None):
         if not isinstance(referer, str):
@@ -382,6 +661,7 @@ class WebAgent:
         data = dict() if data is None else data.copy()
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
+        self.bootstrap(settings)
         settings = dict() if settings is None else settings.copy()
 
         headers = {
@@ -399,59 +679,169 @@ class WebAgent:
         else:
             settings["data"] = data
 
+        if not self.rate_limiter is None:
+            self.rate_limiter.acquire("action")
         return self.post_request(url, **settings)
 
     def get_request(self, *args, **kwargs):
-        try:
-            response = self.session.get(*args, **kwargs)
-            response.raise_for_status()
-            return response
-        except (requests.exceptions.RequestException, ConnectionResetError) as exception:
-            raise InternetException(exception)
+        return self.send_request("GET", *args, **kwargs)
 
     def post_request(self, *args, **kwargs):
-        try:
-            response = self.session.post(*args, **kwargs)
-            response.raise_for_status()
-            return response
-        except (requests.exceptions.RequestException, ConnectionResetError) as exception:
-            raise InternetException(exception)
+        return self.send_request("POST", *args, **kwargs)
+
+    def send_request(self, method, url, **kwargs):
+        cassette = self.cassette
+        metrics = self.metrics
+        tracer = self.tracer
+        if not metrics is None:
+            start = perf_counter()
+        record = None
+        response = None
+        with no_span if tracer is None else tracer.span("http", method=method, url=url) as span:
+            try:
+                if not cassette is None:
+                    record = cassette.play(method, url, kwargs.get("params"))
+                if record is None:
+                    response = self.session.request(method, url, **kwargs)
+                    if not cassette is None:
+                        cassette.record(method, url, kwargs.get("params"), response.status_code,
+                                        response.reason, response.url, response.headers,
+                                        response.content)
+                else:
+                    response = replay_response(method, record)
+                response.raise_for_status()
+                return response
+            except (requests.exceptions.RequestException, ConnectionResetError) as exception:
+                raise InternetException(exception)
+            finally:
+                if not span is None:
+                    span.attributes["status"] = None if response is None else response.status_code
+                    span.attributes["replayed"] = not record is None
+                if not metrics is None:
+                    metrics.observe(
+                        get_operation(url, kwargs.get("params")),
+                        method,
+                        None if response is None else response.status_code,
+                        get_size(kwargs.get("data")),
+                        0 if response is None else len(response.content),
+                        perf_counter() - start,
+                    )
 
 
 class AsyncWebAgent:
-    def __init__(self, cookies=None, logger=None):
+    def __init__(self, cookies=None, logger=None, prefetch=0, rate_limiter=None,
+                 concurrency=None, connector=None, limit=100, limit_per_host=0, ttl_dns_cache=10,
+                 keepalive_timeout=15, token_ttl=3600, json_backend=None,
+                 root_url="https://www.instagram.com", cassette=None, metrics=None,
+                 tracer=None, log_pages=False):
+        if not isinstance(prefetch, int):
+            raise TypeError("'prefetch' must be int type")
+        if not isinstance(connector, aiohttp.BaseConnector) and not connector is None:
+            raise TypeError("'connector' must be aiohttp.BaseConnector type or None")
+        if not isinstance(token_ttl, (int, float)) and not token_ttl is None:
+            raise TypeError("'token_ttl' must be int or float type or None")
+        if not isinstance(root_url, str):
+            raise TypeError("'root_url' must be str type")
+        if not isinstance(cassette, Cassette) and not cassette is None:
+            raise TypeError("'cassette' must be Cassette type or None")
+        if not isinstance(metrics, Metrics) and not metrics is None:
+            raise TypeError("'metrics' must be Metrics type or None")
+        if not isinstance(tracer, Tracer) and not tracer is None:
+            raise TypeError("'tracer' must be Tracer type or None")
+        if not isinstance(rate_limiter, RateLimiter) and not rate_limiter is None:
+            raise TypeError("'rate_limiter' must be RateLimiter type or None")
+        if not isinstance(concurrency, ConcurrencyController) and not concurrency is None:
+            raise TypeError("'concurrency' must be ConcurrencyController type or None")
+
         self.rhx_gis = None
         self.csrf_token = None
-        self.session = aiohttp.ClientSession(cookies=cookies)
+        # Connector keeps the connection pool. Connector passed to the agent can be shared by many
+        # agents and isn't closed with the session
+        if connector is None:
+            self.session = aiohttp.ClientSession(
+                cookies=cookies,
+                connector=aiohttp.TCPConnector(
+                    limit=limit,
+                    limit_per_host=limit_per_host,
+                    ttl_dns_cache=ttl_dns_cache,
+                    keepalive_timeout=keepalive_timeout,
+                ),
+            )
+        else:
+            self.session = aiohttp.ClientSession(
+                cookies=cookies,
+                connector=connector,
+                connector_owner=False,
+            )
         self.logger = logger
+        self.events = EventLog(logger, pages=log_pages)
+        self.prefetch = prefetch
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.token_ttl = token_ttl
+        self.tokens_updated = None
+        self.bootstrap_lock = asyncio.Lock()
+        self.page_loads = 0
+        self.loads = get_json_loads(json_backend)
+        # Requests are sent to this url, it can be changed to use a local server in tests
+        self.root_url = root_url.rstrip("/")
+        self.cassette = cassette
+        self.metrics = metrics
+        self.tracer = tracer
+        if not tracer is None:
+            self.loads = tracer.wrap("decode", self.loads)
 
     async def delete(self):
         await self.session.close()
 
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        state = load_state(state)
+        agent = cls(**kwargs)
+        agent.set_state(state)
+        return agent
+
+    def get_state(self):
+        return {
+            "cookies": {cookie.key: cookie.value for cookie in self.session.cookie_jar},
+            "csrf_token": self.csrf_token,
+            "rhx_gis": self.rhx_gis,
+        }
+
+    def set_state(self, state):
+        self.session.cookie_jar.update_cookies(state.get("cookies", {}))
+        self.csrf_token = state.get("csrf_token")
+        self.rhx_gis = state.get("rhx_gis")
+        self.tokens_updated = monotonic()
+
+    def dump_state(self):
+        return dump_state(self.get_state())
+
+    @traced
     @exception_manager.decorator
     async def update(self, obj=None, settings=None):
-        if not self.logger is None:
-            self.logger.info("Update '%s' started", "self" if obj is None else obj)
+        self.events.started("Update", obj)
         if not isinstance(obj, UpdatableElement) and not obj is None:
             raise TypeError("obj must be UpdatableElement type or None")
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
         settings = dict() if settings is None else settings.copy()
 
-        query = "https://www.instagram.com/"
+        query = self.root_url + "/"
         if not obj is None:
             query += obj.base_url + getattr(obj, obj.primary_key)
 
+        if not self.rate_limiter is None:
+            await self.rate_limiter.acquire_async("page")
+        self.page_loads += 1
         response = await self.get_request(query, **settings)
 
         try:
-            match = re.search(
-                r"<script[^>]*>\s*window._sharedData\s*=\s*((?!<script>).*)\s*;\s*</script>",
-                await response.text(),
-            )
-            data = json.loads(match.group(1))
+            with no_span if self.tracer is None else self.tracer.span("extract"):
+                data = get_shared_data(await response.text(), self.loads)
             self.rhx_gis = data["rhx_gis"]
             self.csrf_token = data["config"]["csrf_token"]
+            self.tokens_updated = monotonic()
 
             if obj is None:
                 return None
@@ -459,298 +849,364 @@ class AsyncWebAgent:
             data = data["entry_data"]
             for key in obj.entry_data_path:
                 data = data[key]
-            obj.set_data(data)
+            with no_span if self.tracer is None else self.tracer.span("set_data"):
+                obj.set_data(data)
 
-            if not self.logger is None:
-                self.logger.info("Update '%s' was successfull", "self" if obj is None else obj)
+            self.events.succeeded("Update", obj)
             return data
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.exception(
-                    "Update '%s' was unsuccessfull: %s",
-                    "self" if obj is None else obj,
-                    str(exception),
-                )
+            self.events.failed("Update", obj, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    def tokens_fresh(self):
+        if self.rhx_gis is None or self.csrf_token is None:
+            return False
+        return self.token_ttl is None or self.tokens_updated is None or \
+            monotonic() - self.tokens_updated < self.token_ttl
+
+    async def bootstrap(self, settings=None):
+        # Main page is loaded only when rhx_gis or csrf_token are unknown or outdated
+        if self.tokens_fresh():
+            return
+        async with self.bootstrap_lock:
+            # Tokens could be updated by another task while this one waited for the lock
+            if not self.tokens_fresh():
+                await self.update(settings=settings)
+
+    async def resolve_media_id(self, media, settings=None):
+        if media.id is None:
+            media.id = Media.code_to_id(media.code)
+        if media.id is None:
+            await self.update(media, settings=settings)
+        return media.id
+
+    @traced
     @exception_manager.decorator
-    async def get_media(self, obj, pointer=None, count=12, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get media '%s' started", obj)
+    async def get_media(self, obj, pointer=None, count=12, limit=50, delay=0, settings=None,
+                        store=None, fields=None, lazy=False):
+        self.events.started("Get media", obj)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            medias, pointer = await self.collect(
+                self.iter_media(obj, pointer=pointer, count=count, limit=limit, delay=delay,
+                                settings=settings, store=store, fields=fields, lazy=lazy).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get media", obj, exception)
+            raise
+        self.events.succeeded("Get media", obj)
+        return medias, pointer
+
+    def iter_media(self, obj, pointer=None, count=None, limit=50, delay=0, settings=None,
+                   store=None, fields=None, lazy=False):
         if not isinstance(obj, HasMediaElement):
             raise TypeError("'obj' must be HasMediaElement type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, MediaStore) and not store is None:
+            raise TypeError("'store' must be MediaStore type or None")
+        if not isinstance(fields, (tuple, list)) and not fields is None:
+            raise TypeError("'fields' must be tuple or list type or None")
+        if not fields is None and not set(fields).issubset(Media.decoders):
+            raise ValueError("'fields' must contain names of Media attributes only")
+        if not isinstance(lazy, bool):
+            raise TypeError("'lazy' must be bool type")
+
+        return AsyncPagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_media(obj, pointer, first, settings),
+                parse=lambda data, count: parse_media(obj, data, count, store=store,
+                                                      fields=fields, lazy=lazy),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
-        variables_string = '{{"{name}":"{name_value}","first":{first},"after":"{after}"}}'
-        medias = []
-
-        if pointer is None:
+    async def fetch_media(self, obj, pointer=None, first=12, settings=None):
+        # Profile page is needed for the first page only while id of the object is unknown
+        if pointer is None and not isinstance(obj, Tag) and obj.id is None:
+            url = self.root_url + "/" + obj.base_url + getattr(obj, obj.primary_key)
+            data = await self.update(obj, settings=settings)
             try:
-                data = await self.update(obj, settings=settings)
-                data = data[obj.media_path[-1]]
-
-                page_info = data["page_info"]
-                edges = data["edges"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    if isinstance(obj, Account):
-                        m.likes_count = node["edge_media_preview_like"]["count"]
-                        m.owner = obj
-                    else:
-                        m.likes_count = node["edge_liked_by"]
-
-                    obj.media.add(m)
-                    medias.append(m)
-
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
-
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get media '%s' was successfull", obj)
-                    return medias, pointer
+                return data[obj.media_path[-1]], url
             except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get media '%s' was unsuccessfull: %s", obj, str(exception))
-                raise UnexpectedResponse(
-                    exception,
-                    "https://www.instagram.com/" + obj.base_url + getattr(obj, obj.primary_key),
-                )
+                raise UnexpectedResponse(exception, url)
 
-        while True:
-            data = {"after": pointer, "first": min(limit, count)}
-            if isinstance(obj, Tag):
-                data["name"] = "tag_name"
-                data["name_value"] = obj.name
-            else:
-                data["name"] = "id"
-                data["name_value"] = obj.id
-
-            response = await self.graphql_request(
-                query_hash=obj.media_query_hash,
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    obj.base_url,
-                    getattr(obj, obj.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = (await response.json())["data"]
-                for key in obj.media_path:
-                    data = data[key]
-                page_info = data["page_info"]
-                edges = data["edges"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    if isinstance(obj, Account):
-                        m.likes_count = node["edge_media_preview_like"]["count"]
-                        m.owner = obj
-                    else:
-                        m.likes_count = node["edge_liked_by"]
-                    obj.media.add(m)
-                    medias.append(m)
+        if pointer is None:
+            variables_string = '{{"{name}":"{name_value}","first":{first}}}'
+        else:
+            variables_string = '{{"{name}":"{name_value}","first":{first},"after":"{after}"}}'
+        data = {"after": pointer, "first": first}
+        if isinstance(obj, Tag):
+            data["name"] = "tag_name"
+            data["name_value"] = obj.name
+        else:
+            data["name"] = "id"
+            data["name_value"] = obj.id
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = await self.graphql_request(
+            query_hash=obj.media_query_hash,
+            variables=variables_string.format(**data),
+            referer="https://instagram.com/" + obj.base_url + getattr(obj, obj.primary_key),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get media '%s' was successfull", obj)
-                    return medias, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get media '%s' was unsuccessfull: %s", obj, str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = (await response.json())["data"]
+            for key in obj.media_path:
+                data = data[key]
+            obj.media_count = data.get("count", obj.media_count)
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
-    async def get_likes(self, media, pointer=None, count=20, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get likes '%s' started", media)
+    async def get_likes(self, media, pointer=None, count=20, limit=50, delay=0, settings=None,
+                        store=None):
+        self.events.started("Get likes", media)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            likes, pointer = await self.collect(
+                self.iter_likes(media, pointer=pointer, count=count, limit=limit, delay=delay,
+                                settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get likes", media, exception)
+            raise
+        self.events.succeeded("Get likes", media)
+        return likes, pointer
+
+    def iter_likes(self, media, pointer=None, count=None, limit=50, delay=0, settings=None,
+                   store=None):
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        return AsyncPagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_likes(media, pointer, first, settings),
+                parse=lambda data, count: parse_accounts(data, count, media.likes, store),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
-        if media.id is None:
-            await self.update(media, settings=settings)
-
+    async def fetch_likes(self, media, pointer=None, first=20, settings=None):
         if pointer:
             variables_string = '{{"shortcode":"{shortcode}","first":{first},"after":"{after}"}}'
         else:
             variables_string = '{{"shortcode":"{shortcode}","first":{first}}}'
-        likes = []
 
-        while True:
-            data = {"shortcode": media.code, "first": min(limit, count)}
-            if pointer:
-                data["after"] = pointer
-
-            response = await self.graphql_request(
-                query_hash="1cb6ec562846122743b61e492c85999f",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    media.base_url,
-                    getattr(media, media.primary_key),
-                ),
-                settings=settings,
-            )
+        response = await self.graphql_request(
+            query_hash="1cb6ec562846122743b61e492c85999f",
+            variables=variables_string.format(shortcode=media.code, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                media.base_url,
+                getattr(media, media.primary_key),
+            ),
+            settings=settings,
+        )
 
-            try:
-                data = (await response.json())["data"]["shortcode_media"]["edge_liked_by"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                media.likes_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    account = Account(node["username"])
-                    account.id = node["id"]
-                    account.profile_pic_url = node["profile_pic_url"]
-                    account.is_verified = node["is_verified"]
-                    account.full_name = node["full_name"]
-                    media.likes.add(account)
-                    likes.append(account)
+        try:
+            data = (await response.json())["data"]["shortcode_media"]["edge_liked_by"]
+            media.likes_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+    @traced
+    @exception_manager.decorator
+    async def get_comments(self, media, pointer=None, count=35, limit=32, delay=0,
+                           settings=None):
+        self.events.started("Get comments", media)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count-len(edges)
-                    variables_string = \
-                        '{{"shortcode":"{shortcode}","first":{first},"after":"{after}"}}'
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get likes '%s' was successfull", media)
-                    return likes, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get likes '%s' was unsuccessfull: %s", media, str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            comments, pointer = await self.collect(
+                self.iter_comments(media, pointer=pointer, count=count, limit=limit, delay=delay,
+                                   settings=settings).pages,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get comments", media, exception)
+            raise
+        self.events.succeeded("Get comments", media)
+        return comments, pointer
 
-    @exception_manager.decorator
-    async def get_comments(self, media, pointer=None, count=35, limit=32, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get comments '%s' started", media)
+    def iter_comments(self, media, pointer=None, count=None, limit=32, delay=0, settings=None):
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
 
-        comments = []
+        return AsyncPagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_comments(media, pointer, first, settings),
+                parse=lambda data, count: parse_comments(media, data, count),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
+    async def fetch_comments(self, media, pointer=None, first=35, settings=None):
         if pointer is None:
-            try:
-                data = await self.update(media, settings=settings)
-                if "edge_media_to_comment" in data:
-                    data = data["edge_media_to_comment"]
-                else:
-                    data = data["edge_media_to_parent_comment"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    c = Comment(node["id"], media=media,
-                                owner=Account(node["owner"]["username"]),
-                                text=node["text"],
-                                created_at=node["created_at"])
-                    media.comments.add(c)
-                    comments.append(c)
+            variables_string = '{{"shortcode":"{code}","first":{first}}}'
+        else:
+            variables_string = '{{"shortcode":"{code}","first":{first},"after":"{after}"}}'
+        response = await self.graphql_request(
+            query_hash="f0986789a5c5d17c2400faebf16efd0d",
+            variables=variables_string.format(after=pointer, code=media.code, first=first),
+            referer="https://instagram.com/%s%s" % (
+                media.base_url,
+                getattr(media, media.primary_key),
+            ),
+            settings=settings,
+        )
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        try:
+            data = (await response.json())["data"]["shortcode_media"]["edge_media_to_comment"]
+            media.comments_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
-                if len(edges) < count and not pointer is None:
-                    count = count - len(edges)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get comments '%s' was successfull", media)
-                    return comments, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get comments '%s' was unsuccessfull: %s",
-                        media,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, media)
+    async def paginate(self, fetch, parse, pointer=None, count=None, limit=50, delay=0,
+                       prefetch=None):
+        if prefetch is None:
+            prefetch = self.prefetch
+        parse = self.events.parser(parse)
+        if not self.tracer is None:
+            parse = self.tracer.wrap("parse", parse)
+        if prefetch:
+            pages = self.prefetch_pages(fetch, parse, pointer, count, limit, delay, prefetch)
+            try:
+                async for page in pages:
+                    yield page
+            finally:
+                # Closed here, not by the garbage collector, so aclose cancels the request at once
+                await pages.aclose()
+            return
 
-        variables_string =  '{{"shortcode":"{code}","first":{first},"after":"{after}"}}'
         while True:
-            data = {"after": pointer, "code": media.code, "first": min(limit, count)}
-
-            response = await self.graphql_request(
-                query_hash="f0986789a5c5d17c2400faebf16efd0d",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    media.base_url,
-                    getattr(media, media.primary_key),
-                ),
-                settings=settings,
-            )
-
+            data, url = await fetch(pointer, limit if count is None else min(limit, count))
             try:
-                data = (await response.json())["data"]["shortcode_media"]["edge_media_to_comment"]
-                media.comments_count = data["count"]
-                edges = data["edges"]
+                items = parse(data, count)
                 page_info = data["page_info"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    c = Comment(node["id"],
-                                media=media,
-                                owner=Account(node["owner"]["username"]),
-                                text=node["text"],
-                                created_at=node["created_at"])
-                    media.comments.add(c)
-                    comments.append(c)
-
                 pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
-
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get comments '%s' was successfull", media)
-                    return comments, pointer
             except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get comments '%s' was unsuccessfull: %s",
-                        media,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+                raise UnexpectedResponse(exception, url)
+            yield items, pointer
+
+            if pointer is None or not count is None and len(items) >= count:
+                return
+            if not count is None:
+                count -= len(items)
+            await asyncio.sleep(delay)
+
+    async def prefetch_pages(self, fetch, parse, pointer=None, count=None, limit=50, delay=0,
+                             depth=1):
+        # Request for the next page is sent as soon as end_cursor is known, so network time
+        # overlaps with parsing and with the consumer. Up to depth parsed pages wait in the queue
+        queue = asyncio.Queue(maxsize=depth)
+
+        async def request(pointer, count, delay):
+            await asyncio.sleep(delay)
+            return await fetch(pointer, limit if count is None else min(limit, count))
+
+        async def produce(pointer, count):
+            task = asyncio.ensure_future(request(pointer, count, 0))
+            try:
+                while not task is None:
+                    data, url = await task
+                    task = None
+                    try:
+                        page_info = data["page_info"]
+                        pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+                        size = len(data["edges"][:count])
+                    except (ValueError, KeyError) as exception:
+                        raise UnexpectedResponse(exception, url)
+                    # Parsed page can't be larger than the page, so this request is never wasted
+                    if not pointer is None and (count is None or size < count):
+                        task = asyncio.ensure_future(
+                            request(pointer, None if count is None else count - size, delay),
+                        )
+
+                    try:
+                        items = parse(data, count)
+                    except (ValueError, KeyError) as exception:
+                        raise UnexpectedResponse(exception, url)
+                    if not count is None:
+                        count -= len(items)
+                    if task is None and not pointer is None and (count is None or count > 0):
+                        task = asyncio.ensure_future(request(pointer, count, delay))
+                    await queue.put((items, pointer))
+                await queue.put(None)
+            except Exception as exception:
+                await queue.put(exception)
+            finally:
+                if not task is None:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+
+        producer = asyncio.ensure_future(produce(pointer, count))
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+    async def collect(self, pages, store=None):
+        items = [] if store is None else array("q")
+        pointer = None
+        async for page, pointer in pages:
+            if store is None:
+                items.extend(page)
+            else:
+                items.extend(page.indexes)
+        return (items if store is None else StoreView(store, items)), pointer
 
     async def graphql_request(self, query_hash, referer, variables, settings=None):
         if not isinstance(query_hash, str):
@@ -759,6 +1215,7 @@ class AsyncWebAgent:
             raise TypeError("'variables' must be str type")
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
+        await self.bootstrap(settings)
         settings = dict() if settings is None else settings.copy()
 
         if not "params" in settings:
@@ -776,7 +1233,9 @@ class AsyncWebAgent:
             "Referer": referer,
         })
 
-        return await self.get_request("https://www.instagram.com/graphql/query/", **settings)
+        if not self.rate_limiter is None:
+            await self.rate_limiter.acquire_async("graphql:" + query_hash)
+        return await self.get_request(self.root_url + "/graphql/query/", **settings)
 
     async def action_request(self, url, referer, data=None, settings=None):
         if not isinstance(referer, str):
@@ -788,6 +1247,7 @@ class AsyncWebAgent:
         data = dict() if data is None else data.copy()
         if not isinstance(settings, dict) and not settings is None:
             raise TypeError("'settings' must be dict type or None")
+        await self.bootstrap(settings)
         settings = dict() if settings is None else settings.copy()
 
         headers = {
@@ -805,34 +1265,147 @@ class AsyncWebAgent:
         else:
             settings["data"] = data
 
+        if not self.rate_limiter is None:
+            await self.rate_limiter.acquire_async("action")
         return await self.post_request(url, **settings)
 
     async def get_request(self, *args, **kwargs):
-        try:
-            return await self.session.get(*args, **kwargs)
-        except aiohttp.ClientResponseError as exception:
-            raise InternetException(exception)
+        return await self.send_request("GET", *args, **kwargs)
 
     async def post_request(self, *args, **kwargs):
+        return await self.send_request("POST", *args, **kwargs)
+
+    async def send_request(self, method, url, **kwargs):
+        cassette = self.cassette
+        metrics = self.metrics
+        tracer = self.tracer
+        if not metrics is None:
+            started = perf_counter()
+        # Span covers waiting for the concurrency slot, it is a part of the request latency
+        with no_span if tracer is None else tracer.span("http", method=method, url=url) as span:
+            # Recorded responses are replayed without network and concurrency control
+            record = None
+            if not cassette is None:
+                record = cassette.play(method, url, kwargs.get("params"))
+            concurrency = None if not record is None else self.concurrency
+            if not concurrency is None:
+                start = await concurrency.acquire()
+            status = None
+            result = None
+            cancelled = False
+            try:
+                if record is None:
+                    # Body is read inside the context, so the connection always goes back to pool
+                    async with self.session.request(method, url, **kwargs) as response:
+                        status = response.status
+                        result = AsyncResponse(
+                            url=response.url,
+                            status=response.status,
+                            headers=response.headers,
+                            body=await response.read(),
+                            encoding=response.get_encoding(),
+                            loads=self.loads,
+                        )
+                        if not cassette is None:
+                            cassette.record(method, url, kwargs.get("params"), response.status,
+                                            response.reason, response.url, response.headers,
+                                            result.body)
+                        response.raise_for_status()
+                else:
+                    result = AsyncResponse(record.url, record.status, record.headers, record.body,
+                                           loads=self.loads)
+                    result.raise_for_status(method, record.reason)
+                return result
+            except aiohttp.ClientResponseError as exception:
+                status = exception.status
+                raise InternetException(exception, result)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
+                raise InternetException(exception)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                if not concurrency is None:
+                    if cancelled:
+                        concurrency.cancel()
+                    else:
+                        concurrency.release(start, status)
+                if not span is None:
+                    span.attributes["status"] = None if result is None else result.status
+                    span.attributes["replayed"] = not record is None
+                if not metrics is None:
+                    metrics.observe(
+                        get_operation(url, kwargs.get("params")),
+                        method,
+                        None if result is None else result.status,
+                        get_size(kwargs.get("data")),
+                        0 if result is None else len(result.body),
+                        perf_counter() - started,
+                    )
+
+    @asynccontextmanager
+    async def stream_request(self, *args, **kwargs):
+        # Yields aiohttp response with unread body, use response.content to read it by chunks
+        concurrency = self.concurrency
+        if not concurrency is None:
+            start = await concurrency.acquire()
+        status = None
+        cancelled = False
         try:
-            return await self.session.post(*args, **kwargs)
-        except aiohttp.ClientResponseError as exception:
+            async with self.session.get(*args, **kwargs) as response:
+                status = response.status
+                try:
+                    response.raise_for_status()
+                except aiohttp.ClientResponseError as exception:
+                    raise InternetException(exception, response)
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exception:
             raise InternetException(exception)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not concurrency is None:
+                if cancelled:
+                    concurrency.cancel()
+                else:
+                    concurrency.release(start, status)
 
 
 class WebAgentAccount(Account, WebAgent):
     @exception_manager.decorator
-    def __init__(self, username, cookies=None, logger=None):
+    def __init__(self, username, cookies=None, logger=None, **kwargs):
         if not isinstance(username, str):
             raise TypeError("'username' must be str type")
 
         Account.__init__(self, username)
-        WebAgent.__init__(self, cookies=cookies, logger=logger)
+        WebAgent.__init__(self, cookies=cookies, logger=logger, **kwargs)
+
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        state = load_state(state)
+        # Constructor would return the running agent of the account and ignore kwargs, the state
+        # would overwrite its cookies and tokens
+        if not cls.cache.lookup(state["username"]) is None:
+            raise ValueError("Agent of account '%s' already exists" % state["username"])
+        agent = cls(state["username"], **kwargs)
+        agent.set_state(state)
+        return agent
+
+    def get_state(self):
+        state = WebAgent.get_state(self)
+        state["username"] = self.username
+        state["id"] = self.id
+        return state
+
+    def set_state(self, state):
+        WebAgent.set_state(self, state)
+        if not state.get("id") is None:
+            self.id = state["id"]
 
     @exception_manager.decorator
     def auth(self, password, settings=None):
-        if not self.logger is None:
-            self.logger.info("Auth started")
+        self.events.started("Auth")
         if not isinstance(password, str):
             raise TypeError("'password' must be str type")
         if not isinstance(settings, dict) and not settings is None:
@@ -855,18 +1428,18 @@ class WebAgentAccount(Account, WebAgent):
 
         try:
             response = self.post_request(
-                "https://www.instagram.com/accounts/login/ajax/",
+                self.root_url + "/accounts/login/ajax/",
                 **settings,
             )
         except InternetException as exception:
             response = exception.response
 
         try:
-            data = response.json()
+            data = self.loads(response.content)
             if data.get("authenticated") is False:
                 raise AuthException(self.username)
             elif data.get("message") == "checkpoint_required":
-                checkpoint_url = "https://instagram.com" + data.get("checkpoint_url")
+                checkpoint_url = self.root_url + data.get("checkpoint_url")
                 data = self.checkpoint_handle(
                     url=checkpoint_url,
                     settings=settings,
@@ -878,27 +1451,20 @@ class WebAgentAccount(Account, WebAgent):
                     types=data["types"],
                 )
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Auth was unsuccessfully: %s", str(exception))
+            self.events.failed("Auth", None, exception)
             raise UnexpectedResponse(exception, response.url)
-        if not self.logger is None:
-            self.logger.info("Auth was successfully")
+        self.events.succeeded("Auth")
 
     @exception_manager.decorator
     def checkpoint_handle(self, url, settings=None):
-        if not self.logger is None:
-            self.logger.info("Handle checkpoint page for '%s' started", self.username)
+        self.events.started("Handle checkpoint page", self.username)
         response = self.get_request(url)
         try:
-            match = re.search(
-                r"<script[^>]*>\s*window._sharedData\s*=\s*((?!<script>).*)\s*;\s*</script>",
-                response.text,
-            )
-            data = json.loads(match.group(1))
+            data = get_shared_data(response.text, self.loads)
             data = data["entry_data"]["Challenge"][0]
 
             navigation = {
-                key: "https://instagram.com" + value for key, value in data["navigation"].items()
+                key: self.root_url + value for key, value in data["navigation"].items()
             }
 
             data = data["extraData"]["content"]
@@ -907,22 +1473,15 @@ class WebAgentAccount(Account, WebAgent):
             types = []
             for d in data:
                 types.append({"label": d["label"].lower().split(":")[0], "value": d["value"]})
-            if not self.logger is None:
-                self.logger.info("Handle checkpoint page for '%s' was successfull", self.username)
+            self.events.succeeded("Handle checkpoint page", self.username)
             return {"navigation": navigation, "types": types}
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Handle checkpoint page for '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Handle checkpoint page", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     def checkpoint_send(self, checkpoint_url, forward_url, choice, settings=None):
-        if not self.logger is None:
-            self.logger.info("Send verify code for '%s' started", self.username)
+        self.events.started("Send verify code", self.username)
         response = self.action_request(
             referer=checkpoint_url,
             url=forward_url,
@@ -930,51 +1489,36 @@ class WebAgentAccount(Account, WebAgent):
         )
 
         try:
-            navigation = response.json()["navigation"]
-            if not self.logger is None:
-                self.logger.info("Send verify code for '%s' was successfully", self.username)
+            navigation = self.loads(response.content)["navigation"]
+            self.events.succeeded("Send verify code", self.username)
             return {
-                key: "https://instagram.com" + value for key, value in navigation.items()
+                key: self.root_url + value for key, value in navigation.items()
             }
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Send verify code by %s to '%s' was unsuccessfully: %s",
-                    type,
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Send verify code", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     def checkpoint_replay(self, forward_url, replay_url, settings=None):
-        if not self.logger is None:
-            self.logger.info("Resend verify code for '%s' started")
+        self.events.started("Resend verify code", self.username)
         response = self.action_request(
             url=replay_url,
             referer=forward_url,
             settings=settings,
         )
         try:
-            navigation = response.json()["navigation"]
-            if not self.logger is None:
-                self.logger.info("Resend verify code for '%s' was successfull")
+            navigation = self.loads(response.content)["navigation"]
+            self.events.succeeded("Resend verify code", self.username)
             return {
-                key: "https://instagram.com" + value for key, value in navigation.items()
+                key: self.root_url + value for key, value in navigation.items()
             }
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Resend verify code for '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Resend verify code", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     def checkpoint(self, url, code, settings=None):
-        if not self.logger is None:
-            self.logger.info("Verify account '%s' started")
+        self.events.started("Verify account", self.username)
         response = self.action_request(
             referer=url,
             url=url,
@@ -983,17 +1527,11 @@ class WebAgentAccount(Account, WebAgent):
         )
 
         try:
-            result = response.json()["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Verify account '%s' was successfull")
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Verify account", self.username)
             return result
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Verify account '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Verify account", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
@@ -1003,168 +1541,189 @@ class WebAgentAccount(Account, WebAgent):
         return WebAgent.update(self, obj, settings=settings)
 
     @exception_manager.decorator
-    def get_media(self, obj=None, pointer=None, count=12, limit=12, delay=0, settings=None):
+    def get_media(self, obj=None, pointer=None, count=12, limit=12, delay=0, settings=None,
+                  store=None, fields=None, lazy=False):
         if obj is None:
             obj = self
         return WebAgent.get_media(self, obj, pointer=pointer, count=count, limit=limit, delay=delay,
-                               settings=settings)
+                                  settings=settings, store=store, fields=fields, lazy=lazy)
 
+    def iter_media(self, obj=None, pointer=None, count=None, limit=12, delay=0, settings=None,
+                   store=None, fields=None, lazy=False):
+        if obj is None:
+            obj = self
+        return WebAgent.iter_media(self, obj, pointer=pointer, count=count, limit=limit,
+                                   delay=delay, settings=settings, store=store, fields=fields,
+                                   lazy=lazy)
+
+    @traced
     @exception_manager.decorator
-    def get_follows(self, account=None, pointer=None, count=20, limit=50, delay=0, settings=None):
+    def get_follows(self, account=None, pointer=None, count=20, limit=50, delay=0, settings=None,
+                    store=None):
+        if account is None:
+            account = self
+        self.events.started("Get follows", account)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            follows, pointer = self.collect(
+                self.iter_follows(account, pointer=pointer, count=count, limit=limit,
+                                  delay=delay, settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get follows", account, exception)
+            raise
+        self.events.succeeded("Get follows", account)
+        return follows, pointer
+
+    def iter_follows(self, account=None, pointer=None, count=None, limit=50, delay=0,
+                     settings=None, store=None):
         if account is None:
             account = self
-        if not self.logger is None:
-            self.logger.info("Get '%s' follows started", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type or None")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
-        if not isinstance(count, int):
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
+        if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
-
-        if account.id is None:
-            self.update(account, settings=settings)
-
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        def pages():
+            if account.id is None:
+                self.update(account, settings=settings)
+            for page in self.paginate(
+                fetch=lambda pointer, first: self.fetch_follows(account, pointer, first, settings),
+                parse=lambda data, count: parse_accounts(data, count, account.follows, store),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ):
+                yield page
+
+        return Pagination(pages(), pointer)
+
+    def fetch_follows(self, account, pointer=None, first=20, settings=None):
         if pointer is None:
             variables_string = '{{"id":"{id}","first":{first}}}'
         else:
             variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-        follows = []
-
-        while True:
-            data = {"first": min(limit, count), "id": account.id}
-            if not pointer is None:
-                data["after"] = pointer
-
-            response = self.graphql_request(
-                query_hash="58712303d941c6855d4e888c5f0cd22f",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    account.base_url,
-                    getattr(account, account.primary_key),
-                ), 
-                settings=settings,
-            )
-
-            try:
-                data = response.json()["data"]["user"]["edge_follow"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                account.follows_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    a = Account(node["username"])
-                    a.id = node["id"]
-                    a.profile_pic_url = node["profile_pic_url"]
-                    a.is_verified = node["is_verified"]
-                    a.full_name = node["full_name"]
-                    account.follows.add(a)
-                    follows.append(a)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = self.graphql_request(
+            query_hash="58712303d941c6855d4e888c5f0cd22f",
+            variables=variables_string.format(id=account.id, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                account.base_url,
+                getattr(account, account.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get '%s' follows was successfully", account)
-                    return follows, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get '%s' follows was unsuccessfully: %s",
-                        account,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = self.loads(response.content)["data"]["user"]["edge_follow"]
+            account.follows_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
-    def get_followers(self, account=None, pointer=None, count=20, limit=50, delay=0, settings=None):
+    def get_followers(self, account=None, pointer=None, count=20, limit=50, delay=0, settings=None,
+                      store=None):
+        if account is None:
+            account = self
+        self.events.started("Get followers", account)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            followers, pointer = self.collect(
+                self.iter_followers(account, pointer=pointer, count=count, limit=limit,
+                                    delay=delay, settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get followers", account, exception)
+            raise
+        self.events.succeeded("Get followers", account)
+        return followers, pointer
+
+    def iter_followers(self, account=None, pointer=None, count=None, limit=50, delay=0,
+                       settings=None, store=None):
         if account is None:
             account = self
-        if not self.logger is None:
-            self.logger.info("Get '%s' followers started", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type or None")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        def pages():
+            if account.id is None:
+                self.update(account, settings=settings)
+            for page in self.paginate(
+                fetch=lambda pointer, first: self.fetch_followers(
+                    account,
+                    pointer,
+                    first,
+                    settings,
+                ),
+                parse=lambda data, count: parse_accounts(
+                    data,
+                    count,
+                    account.followers,
+                    store,
+                ),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ):
+                yield page
 
-        if account.id is None:
-            self.update(account, settings=settings)
+        return Pagination(pages(), pointer)
 
+    def fetch_followers(self, account, pointer=None, first=20, settings=None):
         if pointer is None:
             variables_string = '{{"id":"{id}","first":{first}}}'
         else:
             variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-        followers = []
-
-        while True:
-            data = {"first": min(limit, count), "id": account.id}
-            if not pointer is None:
-                data["after"] = pointer
-
-            response = self.graphql_request(
-                query_hash="37479f2b8209594dde7facb0d904896a",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    account.base_url,
-                    getattr(account, account.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = response.json()["data"]["user"]["edge_followed_by"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                account.followers_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    a = Account(node["username"])
-                    a.id = node["id"]
-                    a.profile_pic_url = node["profile_pic_url"]
-                    a.is_verified = node["is_verified"]
-                    a.full_name = node["full_name"]
-                    account.followers.add(a)
-                    followers.append(a)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = self.graphql_request(
+            query_hash="37479f2b8209594dde7facb0d904896a",
+            variables=variables_string.format(id=account.id, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                account.base_url,
+                getattr(account, account.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get '%s' followers was successfully", account)
-                    return followers, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get '%s' followers was unsuccessfully: %s",
-                        account,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = self.loads(response.content)["data"]["user"]["edge_followed_by"]
+            account.followers_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def stories(self, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get stories started")
+        self.events.started("Get stories")
         response = self.graphql_request(
             query_hash="60b755363b5c230111347a7a4e242001",
             variables='{"only_stories":true}',
@@ -1173,198 +1732,195 @@ class WebAgentAccount(Account, WebAgent):
         )
 
         try:
-            data = response.json()["data"]["user"]["feed_reels_tray"]["edge_reels_tray_to_reel"]
-            if not self.logger is None:
-                self.logger.info("Get stories was successfully")
+            data = self.loads(response.content)["data"]["user"]["feed_reels_tray"]
+            data = data["edge_reels_tray_to_reel"]
+            self.events.succeeded("Get stories")
             return [Story(edge["node"]["id"]) for edge in data["edges"]]
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Get stories was unsuccessfully: %s", str(exception))
+            self.events.failed("Get stories", None, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
-    def feed(self, pointer=None, count=12, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get feed started")
-        if not isinstance(pointer, str) and not pointer is None:
-            raise TypeError("'pointer' must be str type or None")
+    def feed(self, pointer=None, count=12, limit=50, delay=0, settings=None, store=None,
+             fields=None, lazy=False):
+        self.events.started("Get feed")
         if not isinstance(count, int):
             raise TypeError("'count' must be int type")
+
+        try:
+            feed, pointer = self.collect(
+                self.iter_feed(pointer=pointer, count=count, limit=limit, delay=delay,
+                               settings=settings, store=store, fields=fields, lazy=lazy).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get feed", None, exception)
+            raise
+        self.events.succeeded("Get feed")
+        return feed, pointer
+
+    def iter_feed(self, pointer=None, count=None, limit=50, delay=0, settings=None, store=None,
+                  fields=None, lazy=False):
+        if not isinstance(pointer, str) and not pointer is None:
+            raise TypeError("'pointer' must be str type or None")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, MediaStore) and not store is None:
+            raise TypeError("'store' must be MediaStore type or None")
+        if not isinstance(fields, (tuple, list)) and not fields is None:
+            raise TypeError("'fields' must be tuple or list type or None")
+        if not fields is None and not set(fields).issubset(Media.decoders):
+            raise ValueError("'fields' must contain names of Media attributes only")
+        if not isinstance(lazy, bool):
+            raise TypeError("'lazy' must be bool type")
+
+        return Pagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_feed(pointer, first, settings),
+                parse=lambda data, count: parse_feed(data, count, store=store, fields=fields,
+                                                     lazy=lazy),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
+    def fetch_feed(self, pointer=None, first=12, settings=None):
         variables_string = '{{"fetch_media_item_count":{first},"fetch_media_item_cursor":"{after}",\
             "fetch_comment_count":4,"fetch_like":10,"has_stories":false}}'
-        feed = []
 
-        while True:
-            response = self.graphql_request(
-                query_hash="485c25657308f08317c1e4b967356828",
-                variables=variables_string.format(
-                    after=pointer,
-                    first=min(limit, count),
-                ) if pointer else "{}",
-                referer="https://instagram.com/%s%s" % (
-                    self.base_url,
-                    getattr(self, self.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = response.json()["data"]["user"]["edge_web_feed_timeline"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                length = len(edges)
-
-                for index in range(min(length, count)):
-                    node = edges[index]["node"]
-                    if not "shortcode" in node:
-                        length -= 1
-                        continue
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    feed.append(m)
-
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = self.graphql_request(
+            query_hash="485c25657308f08317c1e4b967356828",
+            variables=variables_string.format(after=pointer, first=first) if pointer else "{}",
+            referer="https://instagram.com/%s%s" % (self.base_url, getattr(self, self.primary_key)),
+            settings=settings,
+        )
 
-                if length < count and page_info["has_next_page"]:
-                    count -= length
-                    sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get feed was successfully")
-                    return feed, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get feed was unsuccessfully: %s", str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = self.loads(response.content)["data"]["user"]["edge_web_feed_timeline"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def like(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Like '%s' started", media)
+        self.events.started("Like", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            self.update(media, settings=settings)
+        self.resolve_media_id(media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/likes/%s/like/" % media.id,
+            url=self.root_url + "/web/likes/%s/like/" % media.id,
             settings=settings,
         )
 
         try:
-            if not self.logger is None:
-                self.logger.info("Like '%s' was successfully", media)
-            return response.json()["status"] == "ok"
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Like", media)
+            return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Like '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Like", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def unlike(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unlike '%s' started", media)
+        self.events.started("Unlike", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            self.update(media, settings=settings)
+        self.resolve_media_id(media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/likes/%s/unlike/" % media.id,
+            url=self.root_url + "/web/likes/%s/unlike/" % media.id,
             settings=settings,
         )
 
         try:
-            result = response.json()["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Like '%s' was successfully", media)
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Unlike", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Like '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Unlike", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def save(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Save '%s' started", media)
+        self.events.started("Save", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            self.update(media, settings=settings)
+        self.resolve_media_id(media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/save/%s/save/" % media.id,
+            url=self.root_url + "/web/save/%s/save/" % media.id,
             settings=settings,
         )
 
         try:
-            if not self.logger is None:
-                self.logger.info("Save '%s' was successfully", media)
-            return response.json()["status"] == "ok"
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Save", media)
+            return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Save '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Save", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def unsave(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unsave '%s' started", media)
+        self.events.started("Unsave", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            self.update(media, settings=settings)
+        self.resolve_media_id(media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/save/%s/unsave/" % media.id,
+            url=self.root_url + "/web/save/%s/unsave/" % media.id,
             settings=settings,
         )
 
         try:
-            result = response.json()["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Unsave '%s' was successfully", media)
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Unsave", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Unsave '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Unsave", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def add_comment(self, media, text, settings=None):
-        if not self.logger is None:
-            self.logger.info("Comment '%s' started")
+        self.events.started("Comment", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(text, str):
             raise TypeError("'text' must be str type")
 
-        if media.id is None:
-            self.update(media, settings=settings)
+        self.resolve_media_id(media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/comments/%s/add/" % media.id,
+            url=self.root_url + "/web/comments/%s/add/" % media.id,
             data={"comment_text": text},
             settings=settings,
         )
 
         try:
-            data = response.json()
+            data = self.loads(response.content)
             if data["status"] == "ok":
                 comment = Comment(
                     data["id"],
@@ -1375,27 +1931,24 @@ class WebAgentAccount(Account, WebAgent):
                 )
             else:
                 comment = None
-            if not self.logger is None:
-                self.logger.info("Comment '%s' was successfully", media)
+            self.events.succeeded("Comment", media)
             return comment
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Comment '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Comment", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def delete_comment(self, comment, settings=None):
-        if not self.logger is None:
-            self.logger.info("Delete comment '%s' started", comment)
+        self.events.started("Delete comment", comment)
         if not isinstance(comment, Comment):
             raise TypeError("'comment' must be Comment type")
 
-        if comment.media.id is None:
-            self.update(comment.media, settings=settings)
+        self.resolve_media_id(comment.media, settings=settings)
 
         response = self.action_request(
             referer="https://www.instagram.com/p/%s/" % comment.media.code,
-            url="https://www.instagram.com/web/comments/%s/delete/%s/" % (
+            url=self.root_url + "/web/comments/%s/delete/%s/" % (
                 comment.media.id,
                 comment.id,
             ),
@@ -1403,24 +1956,18 @@ class WebAgentAccount(Account, WebAgent):
         )
 
         try:
-            result = response.json()["status"] == "ok"
+            result = self.loads(response.content)["status"] == "ok"
             if result:
                 del comment
-            if not self.logger is None:
-                self.logger.info("Delete comment '%s' was successfully", comment)
+            self.events.succeeded("Delete comment", comment)
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Delete comment '%s' was unsuccessfully: %s",
-                    comment,
-                    str(exception),
-                )
+            self.events.failed("Delete comment", comment, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def follow(self, account, settings=None):
-        if not self.logger is None:
-            self.logger.info("Follow to '%s' started", account)
+        self.events.started("Follow", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type")
 
@@ -1429,24 +1976,22 @@ class WebAgentAccount(Account, WebAgent):
 
         response = self.action_request(
             referer="https://www.instagram.com/%s" % account.username,
-            url="https://www.instagram.com/web/friendships/%s/follow/" % account.id,
+            url=self.root_url + "/web/friendships/%s/follow/" % account.id,
             settings=settings,
         )
 
         try:
-            result = response.json()["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Follow to '%s' was successfully", account)
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Follow", account)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Follow to '%s' was unsuccessfully: %s", account, str(exception))
+            self.events.failed("Follow", account, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     def unfollow(self, account, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unfollow to '%s' started", account)
+        self.events.started("Unfollow", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type")
 
@@ -1455,42 +2000,57 @@ class WebAgentAccount(Account, WebAgent):
 
         response = self.action_request(
             referer="https://www.instagram.com/%s" % account.username,
-            url="https://www.instagram.com/web/friendships/%s/unfollow/" % account.id,
+            url=self.root_url + "/web/friendships/%s/unfollow/" % account.id,
             settings=settings,
         )
 
         try:
-            result = response.json()["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Unfollow to '%s' was successfully", account)
+            result = self.loads(response.content)["status"] == "ok"
+            self.events.succeeded("Unfollow", account)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Unfollow to '%s' was unsuccessfully: %s",
-                    account,
-                    str(exception),
-                )
+            self.events.failed("Unfollow", account, exception)
             raise UnexpectedResponse(exception, response.url)
 
 
 class AsyncWebAgentAccount(Account, AsyncWebAgent):
-    def __init__(self, username, cookies=None, logger=None):
+    def __init__(self, username, cookies=None, logger=None, **kwargs):
         if not isinstance(username, str):
             raise TypeError("'username' must be str type")
 
         Account.__init__(self, username)
-        AsyncWebAgent.__init__(self, cookies=cookies, logger=logger)
+        AsyncWebAgent.__init__(self, cookies=cookies, logger=logger, **kwargs)
 
     def __del__(self):
         Account.__del__(self)
 
+    @classmethod
+    def from_state(cls, state, **kwargs):
+        state = load_state(state)
+        # Constructor would return the running agent of the account and ignore kwargs, the state
+        # would overwrite its cookies and tokens
+        if not cls.cache.lookup(state["username"]) is None:
+            raise ValueError("Agent of account '%s' already exists" % state["username"])
+        agent = cls(state["username"], **kwargs)
+        agent.set_state(state)
+        return agent
+
+    def get_state(self):
+        state = AsyncWebAgent.get_state(self)
+        state["username"] = self.username
+        state["id"] = self.id
+        return state
+
+    def set_state(self, state):
+        AsyncWebAgent.set_state(self, state)
+        if not state.get("id") is None:
+            self.id = state["id"]
+
     async def delete(self):    
         await self.session.close()
 
     async def auth(self, password, settings=None):
-        if not self.logger is None:
-            self.logger.info("Auth started")
+        self.events.started("Auth")
         if not isinstance(password, str):
             raise TypeError("'password' must be str type")
         if not isinstance(settings, dict) and not settings is None:
@@ -1511,17 +2071,22 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
             settings["data"] = {}
         settings["data"].update({"username": self.username, "password": password})
 
-        response = await self.post_request(
-            "https://www.instagram.com/accounts/login/ajax/",
-            **settings,
-        )
+        try:
+            response = await self.post_request(
+                self.root_url + "/accounts/login/ajax/",
+                **settings,
+            )
+        except InternetException as exception:
+            if exception.response is None:
+                raise
+            response = exception.response
 
         try:
             data = await response.json()
             if data.get("authenticated") is False:
                 raise AuthException(self.username)
             elif data.get("message") == "checkpoint_required":
-                checkpoint_url = "https://instagram.com" + data.get("checkpoint_url")
+                checkpoint_url = self.root_url + data.get("checkpoint_url")
                 data = await self.checkpoint_handle(
                     url=checkpoint_url,
                     settings=settings,
@@ -1533,27 +2098,20 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
                     types=data["types"],
                 )
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Auth was unsuccessfully: %s", str(exception))
+            self.events.failed("Auth", None, exception)
             raise UnexpectedResponse(exception, response.url)
-        if not self.logger is None:
-            self.logger.info("Auth was successfully")       
+        self.events.succeeded("Auth")
 
     @exception_manager.decorator
     async def checkpoint_handle(self, url, settings=None):
-        if not self.logger is None:
-            self.logger.info("Handle checkpoint page for '%s' started", self.username)
+        self.events.started("Handle checkpoint page", self.username)
         response = await self.get_request(url)
         try:
-            match = re.search(
-                r"<script[^>]*>\s*window._sharedData\s*=\s*((?!<script>).*)\s*;\s*</script>",
-                await response.text(),
-            )
-            data = json.loads(match.group(1))
+            data = get_shared_data(await response.text(), self.loads)
             data = data["entry_data"]["Challenge"][0]
 
             navigation = {
-                key: "https://instagram.com" + value for key, value in data["navigation"].items()
+                key: self.root_url + value for key, value in data["navigation"].items()
             }
 
             data = data["extraData"]["content"]
@@ -1562,22 +2120,15 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
             types = []
             for d in data:
                 types.append({"label": d["label"].lower().split(":")[0], "value": d["value"]})
-            if not self.logger is None:
-                self.logger.info("Handle checkpoint page for '%s' was successfull", self.username)
+            self.events.succeeded("Handle checkpoint page", self.username)
             return {"navigation": navigation, "types": types}
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Handle checkpoint page for '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Handle checkpoint page", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     async def checkpoint_send(self, checkpoint_url, forward_url, choice, settings=None):
-        if not self.logger is None:
-            self.logger.info("Send verify code for '%s' started", self.username)
+        self.events.started("Send verify code", self.username)
         response = await self.action_request(
             referer=checkpoint_url,
             url=forward_url,
@@ -1586,25 +2137,17 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
 
         try:
             navigation = (await response.json())["navigation"]
-            if not self.logger is None:
-                self.logger.info("Send verify code for '%s' was successfully", self.username)
+            self.events.succeeded("Send verify code", self.username)
             return {
-                key: "https://instagram.com" + value for key, value in navigation.items()
+                key: self.root_url + value for key, value in navigation.items()
             }
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Send verify code by %s to '%s' was unsuccessfully: %s",
-                    type,
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Send verify code", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     async def checkpoint_replay(self, forward_url, replay_url, settings=None):
-        if not self.logger is None:
-            self.logger.info("Resend verify code for '%s' started")
+        self.events.started("Resend verify code", self.username)
         response = await self.action_request(
             url=replay_url,
             referer=forward_url,
@@ -1612,24 +2155,17 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
         )
         try:
             navigation = (await response.json())["navigation"]
-            if not self.logger is None:
-                self.logger.info("Resend verify code for '%s' was successfull")
+            self.events.succeeded("Resend verify code", self.username)
             return {
-                key: "https://instagram.com" + value for key, value in navigation.items()
+                key: self.root_url + value for key, value in navigation.items()
             }
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Resend verify code for '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Resend verify code", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
     async def checkpoint(self, url, code, settings=None):
-        if not self.logger is None:
-            self.logger.info("Verify account '%s' started")
+        self.events.started("Verify account", self.username)
         response = await self.action_request(
             referer=url,
             url=url,
@@ -1639,16 +2175,10 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Verify account '%s' was successfull", self.username)
+            self.events.succeeded("Verify account", self.username)
             return result
         except (AttributeError, KeyError, ValueError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Verify account '%s' was unsuccessfull: %s",
-                    self.username,
-                    str(exception),
-                )
+            self.events.failed("Verify account", self.username, exception)
             raise UnexpectedResponse(exception, response.url)
 
     @exception_manager.decorator
@@ -1658,170 +2188,190 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
         return await AsyncWebAgent.update(self, obj, settings=settings)
 
     @exception_manager.decorator
-    async def get_media(self, obj=None, pointer=None, count=12, limit=12, delay=0, settings=None):
+    async def get_media(self, obj=None, pointer=None, count=12, limit=12, delay=0, settings=None,
+                        store=None, fields=None, lazy=False):
         if obj is None:
             obj = self
         return await AsyncWebAgent.get_media(self, obj, pointer=pointer, count=count, limit=limit,
-                                          delay=delay, settings=settings)
+                                             delay=delay, settings=settings, store=store,
+                                             fields=fields, lazy=lazy)
 
+    def iter_media(self, obj=None, pointer=None, count=None, limit=12, delay=0, settings=None,
+                   store=None, fields=None, lazy=False):
+        if obj is None:
+            obj = self
+        return AsyncWebAgent.iter_media(self, obj, pointer=pointer, count=count, limit=limit,
+                                        delay=delay, settings=settings, store=store,
+                                        fields=fields, lazy=lazy)
+
+    @traced
     @exception_manager.decorator
     async def get_follows(self, account=None, pointer=None, count=20, limit=50, delay=0,
-                          settings=None):
+                          settings=None, store=None):
+        if account is None:
+            account = self
+        self.events.started("Get follows", account)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            follows, pointer = await self.collect(
+                self.iter_follows(account, pointer=pointer, count=count, limit=limit,
+                                  delay=delay, settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get follows", account, exception)
+            raise
+        self.events.succeeded("Get follows", account)
+        return follows, pointer
+
+    def iter_follows(self, account=None, pointer=None, count=None, limit=50, delay=0,
+                     settings=None, store=None):
         if account is None:
             account = self
-        if not self.logger is None:
-            self.logger.info("Get '%s' follows started", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type or None")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
-        if not isinstance(count, int):
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
+        if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
-
-        if account.id is None:
-            await self.update(account, settings=settings)
-
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        async def pages():
+            if account.id is None:
+                await self.update(account, settings=settings)
+            async for page in self.paginate(
+                fetch=lambda pointer, first: self.fetch_follows(account, pointer, first, settings),
+                parse=lambda data, count: parse_accounts(data, count, account.follows, store),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ):
+                yield page
+
+        return AsyncPagination(pages(), pointer)
+
+    async def fetch_follows(self, account, pointer=None, first=20, settings=None):
         if pointer is None:
             variables_string = '{{"id":"{id}","first":{first}}}'
         else:
             variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-        follows = []
-
-        while True:
-            data = {"first": min(limit, count), "id": account.id}
-            if not pointer is None:
-                data["after"] = pointer
-
-            response = await self.graphql_request(
-                query_hash="58712303d941c6855d4e888c5f0cd22f",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    account.base_url,
-                    getattr(account, account.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = (await response.json())["data"]["user"]["edge_follow"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                account.follows_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    a = Account(node["username"])
-                    a.id = node["id"]
-                    a.profile_pic_url = node["profile_pic_url"]
-                    a.is_verified = node["is_verified"]
-                    a.full_name = node["full_name"]
-                    account.follows.add(a)
-                    follows.append(a)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = await self.graphql_request(
+            query_hash="58712303d941c6855d4e888c5f0cd22f",
+            variables=variables_string.format(id=account.id, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                account.base_url,
+                getattr(account, account.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get '%s' follows was successfully", account)
-                    return follows, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get '%s' follows was unsuccessfully: %s",
-                        account,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = (await response.json())["data"]["user"]["edge_follow"]
+            account.follows_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def get_followers(self, account=None, pointer=None, count=20, limit=50, delay=0,
-                            settings=None):
+                            settings=None, store=None):
+        if account is None:
+            account = self
+        self.events.started("Get followers", account)
+        if not isinstance(count, int):
+            raise TypeError("'count' must be int type")
+
+        try:
+            followers, pointer = await self.collect(
+                self.iter_followers(account, pointer=pointer, count=count, limit=limit,
+                                    delay=delay, settings=settings, store=store).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get followers", account, exception)
+            raise
+        self.events.succeeded("Get followers", account)
+        return followers, pointer
+
+    def iter_followers(self, account=None, pointer=None, count=None, limit=50, delay=0,
+                       settings=None, store=None):
         if account is None:
             account = self
-        if not self.logger is None:
-            self.logger.info("Get '%s' followers started", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type or None")
         if not isinstance(pointer, str) and not pointer is None:
             raise TypeError("'pointer' must be str type or None")
-        if not isinstance(count, int):
-            raise TypeError("'count' must be int type")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, AccountStore) and not store is None:
+            raise TypeError("'store' must be AccountStore type or None")
+
+        async def pages():
+            if account.id is None:
+                await self.update(account, settings=settings)
+            async for page in self.paginate(
+                fetch=lambda pointer, first: self.fetch_followers(
+                    account,
+                    pointer,
+                    first,
+                    settings,
+                ),
+                parse=lambda data, count: parse_accounts(
+                    data,
+                    count,
+                    account.followers,
+                    store,
+                ),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ):
+                yield page
 
-        if account.id is None:
-            await self.update(account, settings=settings)
+        return AsyncPagination(pages(), pointer)
 
+    async def fetch_followers(self, account, pointer=None, first=20, settings=None):
         if pointer is None:
             variables_string = '{{"id":"{id}","first":{first}}}'
         else:
             variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-        followers = []
-
-        while True:
-            data = {"first": min(limit, count), "id": account.id}
-            if not pointer is None:
-                data["after"] = pointer
-
-            response = await self.graphql_request(
-                query_hash="37479f2b8209594dde7facb0d904896a",
-                variables=variables_string.format(**data),
-                referer="https://instagram.com/%s%s" % (
-                    account.base_url,
-                    getattr(account, account.primary_key),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = (await response.json())["data"]["user"]["edge_followed_by"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                account.followers_count = data["count"]
-
-                for index in range(min(len(edges), count)):
-                    node = edges[index]["node"]
-                    a = Account(node["username"])
-                    a.id = node["id"]
-                    a.profile_pic_url = node["profile_pic_url"]
-                    a.is_verified = node["is_verified"]
-                    a.full_name = node["full_name"]
-                    account.followers.add(a)
-                    followers.append(a)
 
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = await self.graphql_request(
+            query_hash="37479f2b8209594dde7facb0d904896a",
+            variables=variables_string.format(id=account.id, first=first, after=pointer),
+            referer="https://instagram.com/%s%s" % (
+                account.base_url,
+                getattr(account, account.primary_key),
+            ),
+            settings=settings,
+        )
 
-                if len(edges) < count and page_info["has_next_page"]:
-                    count = count - len(edges)
-                    variables_string = '{{"id":"{id}","first":{first},"after":"{after}"}}'
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get '%s' followers was successfully", account)
-                    return followers, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error(
-                        "Get '%s' followers was unsuccessfully: %s",
-                        account,
-                        str(exception),
-                    )
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            data = (await response.json())["data"]["user"]["edge_followed_by"]
+            account.followers_count = data["count"]
+            return data, response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def stories(self, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get stories started")
+        self.events.started("Get stories")
         response = await self.graphql_request(
             query_hash="60b755363b5c230111347a7a4e242001",
             variables='{"only_stories":true}',
@@ -1833,193 +2383,186 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
             data = (await response.json())["data"]["user"]["feed_reels_tray"]
             data = data["edge_reels_tray_to_reel"]
             result = [Story(edge["node"]["id"]) for edge in data["edges"]]
-            if not self.logger is None:
-                self.logger.info("Get stories was successfully")
+            self.events.succeeded("Get stories")
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Get stories was unsuccessfully: %s", str(exception))
+            self.events.failed("Get stories", None, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
-    async def feed(self, pointer=None, count=12, limit=50, delay=0, settings=None):
-        if not self.logger is None:
-            self.logger.info("Get feed started")
-        if not isinstance(pointer, str) and not pointer is None:
-            raise TypeError("'pointer' must be str type or None")
+    async def feed(self, pointer=None, count=12, limit=50, delay=0, settings=None, store=None,
+                   fields=None, lazy=False):
+        self.events.started("Get feed")
         if not isinstance(count, int):
             raise TypeError("'count' must be int type")
+
+        try:
+            feed, pointer = await self.collect(
+                self.iter_feed(pointer=pointer, count=count, limit=limit, delay=delay,
+                               settings=settings, store=store, fields=fields, lazy=lazy).pages,
+                store=store,
+            )
+        except UnexpectedResponse as exception:
+            self.events.failed("Get feed", None, exception)
+            raise
+        self.events.succeeded("Get feed")
+        return feed, pointer
+
+    def iter_feed(self, pointer=None, count=None, limit=50, delay=0, settings=None, store=None,
+                  fields=None, lazy=False):
+        if not isinstance(pointer, str) and not pointer is None:
+            raise TypeError("'pointer' must be str type or None")
+        if not isinstance(count, int) and not count is None:
+            raise TypeError("'count' must be int type or None")
         if not isinstance(limit, int):
             raise TypeError("'limit' must be int type")
         if not isinstance(delay, (int, float)):
             raise TypeError("'delay' must be int or float type")
+        if not isinstance(store, MediaStore) and not store is None:
+            raise TypeError("'store' must be MediaStore type or None")
+        if not isinstance(fields, (tuple, list)) and not fields is None:
+            raise TypeError("'fields' must be tuple or list type or None")
+        if not fields is None and not set(fields).issubset(Media.decoders):
+            raise ValueError("'fields' must contain names of Media attributes only")
+        if not isinstance(lazy, bool):
+            raise TypeError("'lazy' must be bool type")
+
+        return AsyncPagination(
+            self.paginate(
+                fetch=lambda pointer, first: self.fetch_feed(pointer, first, settings),
+                parse=lambda data, count: parse_feed(data, count, store=store, fields=fields,
+                                                     lazy=lazy),
+                pointer=pointer,
+                count=count,
+                limit=limit,
+                delay=delay,
+            ),
+            pointer,
+        )
 
+    async def fetch_feed(self, pointer=None, first=12, settings=None):
         variables_string = '{{"fetch_media_item_count":{first},"fetch_media_item_cursor":"{after}",\
             "fetch_comment_count":4,"fetch_like":10,"has_stories":false}}'
-        feed = []
 
-        while True:
-            response = await self.graphql_request(
-                query_hash="485c25657308f08317c1e4b967356828",
-                variables=variables_string.format(
-                    after=pointer,
-                    first=min(limit, count),
-                ) if pointer else "{}",
-                referer="https://instagram.com/%s%s" % (
-                    self.base_url,
-                    getattr(self, self.post_request),
-                ),
-                settings=settings,
-            )
-
-            try:
-                data = (await response.json())["data"]["user"]["edge_web_feed_timeline"]
-                edges = data["edges"]
-                page_info = data["page_info"]
-                length = len(edges)
-
-                for index in range(min(length, count)):
-                    node = edges[index]["node"]
-                    if not "shortcode" in node:
-                        length -= 1
-                        continue
-                    m = Media(node["shortcode"])
-                    m.set_data(node)
-                    feed.append(m)
-
-                pointer = page_info["end_cursor"] if page_info["has_next_page"] else None
+        response = await self.graphql_request(
+            query_hash="485c25657308f08317c1e4b967356828",
+            variables=variables_string.format(after=pointer, first=first) if pointer else "{}",
+            referer="https://instagram.com/%s%s" % (self.base_url, getattr(self, self.primary_key)),
+            settings=settings,
+        )
 
-                if length < count and page_info["has_next_page"]:
-                    count -= length
-                    await asyncio.sleep(delay)
-                else:
-                    if not self.logger is None:
-                        self.logger.info("Get feed was successfully")
-                    return feed, pointer
-            except (ValueError, KeyError) as exception:
-                if not self.logger is None:
-                    self.logger.error("Get feed was unsuccessfully: %s", str(exception))
-                raise UnexpectedResponse(exception, response.url)
+        try:
+            return (await response.json())["data"]["user"]["edge_web_feed_timeline"], response.url
+        except (ValueError, KeyError) as exception:
+            raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def like(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Like '%s' started", media)
+        self.events.started("Like", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         
-        if media.id is None:
-            await self.update(media, settings=settings)
+        await self.resolve_media_id(media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/likes/%s/like/" % media.id,
+            url=self.root_url + "/web/likes/%s/like/" % media.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Like '%s' was successfully", media)
+            self.events.succeeded("Like", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Like '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Like", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def unlike(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unlike '%s' started", media)
+        self.events.started("Unlike", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            await self.update(media, settings=settings)
+        await self.resolve_media_id(media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/likes/%s/unlike/" % media.id,
+            url=self.root_url + "/web/likes/%s/unlike/" % media.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Like '%s' was successfully", media)
+            self.events.succeeded("Unlike", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Like '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Unlike", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def save(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Save '%s' started", media)
+        self.events.started("Save", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            await self.update(media, settings=settings)
+        await self.resolve_media_id(media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/save/%s/save/" % media.id,
+            url=self.root_url + "/web/save/%s/save/" % media.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Save '%s' was successfully", media)
+            self.events.succeeded("Save", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Save '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Save", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def unsave(self, media, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unsave '%s' started", media)
+        self.events.started("Unsave", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
 
-        if media.id is None:
-            await self.update(media, settings=settings)
+        await self.resolve_media_id(media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/save/%s/unsave/" % media.id,
+            url=self.root_url + "/web/save/%s/unsave/" % media.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Unsave '%s' was successfully", media)
+            self.events.succeeded("Unsave", media)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Unsave '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Unsave", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def add_comment(self, media, text, settings=None):
-        if not self.logger is None:
-            self.logger.info("Comment '%s' started")
+        self.events.started("Comment", media)
         if not isinstance(media, Media):
             raise TypeError("'media' must be Media type")
         if not isinstance(text, str):
             raise TypeError("'text' must be str type")
 
-        if media.id is None:
-            await self.update(media, settings=settings)
+        await self.resolve_media_id(media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % media.code,
-            url="https://www.instagram.com/web/comments/%s/add/" % media.id,
+            url=self.root_url + "/web/comments/%s/add/" % media.id,
             data={"comment_text": text},
             settings=settings,
         )
@@ -2036,27 +2579,24 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
                 )
             else:
                 comment = None
-            if not self.logger is None:
-                self.logger.info("Comment '%s' was successfully", media)
+            self.events.succeeded("Comment", media)
             return comment
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Comment '%s' was unsuccessfully: %s", media, str(exception))
+            self.events.failed("Comment", media, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def delete_comment(self, comment, settings=None):
-        if not self.logger is None:
-            self.logger.info("Delete comment '%s' started", comment)
+        self.events.started("Delete comment", comment)
         if not isinstance(comment, Comment):
             raise TypeError("'comment' must be Comment type")
 
-        if comment.media.id is None:
-            await self.update(comment.media, settings=settings)
+        await self.resolve_media_id(comment.media, settings=settings)
 
         response = await self.action_request(
             referer="https://www.instagram.com/p/%s/" % comment.media.code,
-            url="https://www.instagram.com/web/comments/%s/delete/%s/" % (
+            url=self.root_url + "/web/comments/%s/delete/%s/" % (
                 comment.media.id,
                 comment.id,
             ),
@@ -2067,22 +2607,16 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
             result = (await response.json())["status"] == "ok"
             if result:
                 del comment
-            if not self.logger is None:
-                self.logger.info("Delete comment '%s' was successfully", comment)
+            self.events.succeeded("Delete comment", comment)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Delete comment '%s' was unsuccessfully: %s",
-                    comment,
-                    str(exception),
-                )
+            self.events.failed("Delete comment", comment, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def follow(self, account, settings=None):
-        if not self.logger is None:
-            self.logger.info("Follow to '%s' started", account)
+        self.events.started("Follow", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type")
 
@@ -2091,24 +2625,22 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
 
         response = await self.action_request(
             referer="https://www.instagram.com/%s" % account.username,
-            url="https://www.instagram.com/web/friendships/%s/follow/" % account.id,
+            url=self.root_url + "/web/friendships/%s/follow/" % account.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Follow to '%s' was successfully", account)
+            self.events.succeeded("Follow", account)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error("Follow to '%s' was unsuccessfully: %s", account, str(exception))
+            self.events.failed("Follow", account, exception)
             raise UnexpectedResponse(exception, response.url)
 
+    @traced
     @exception_manager.decorator
     async def unfollow(self, account, settings=None):
-        if not self.logger is None:
-            self.logger.info("Unfollow to '%s' started", account)
+        self.events.started("Unfollow", account)
         if not isinstance(account, Account):
             raise TypeError("'account' must be Account type")
 
@@ -2117,20 +2649,14 @@ class AsyncWebAgentAccount(Account, AsyncWebAgent):
 
         response = await self.action_request(
             referer="https://www.instagram.com/%s" % account.username,
-            url="https://www.instagram.com/web/friendships/%s/unfollow/" % account.id,
+            url=self.root_url + "/web/friendships/%s/unfollow/" % account.id,
             settings=settings,
         )
 
         try:
             result = (await response.json())["status"] == "ok"
-            if not self.logger is None:
-                self.logger.info("Unfollow to '%s' was successfully", account)
+            self.events.succeeded("Unfollow", account)
             return result
         except (ValueError, KeyError) as exception:
-            if not self.logger is None:
-                self.logger.error(
-                    "Unfollow to '%s' was unsuccessfully: %s",
-                    account,
-                    str(exception),
-                )
+            self.events.failed("Unfollow", account, exception)
             raise UnexpectedResponse(exception, response.url)
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from .exceptions import NotRecordedRequest
+from hashlib import sha1
+import json
+import os
+from urllib.parse import urlsplit
+import zlib
+
+
+Record = namedtuple("Record", ("status", "reason", "url", "headers", "body"))
+
+
+class Cassette:
+    # Recorded responses of the agents. Requests are matched by method, url and params, bodies
+    # are stored once per content, so repeated pages take no space. Modes:
+    # "auto" - recorded responses are replayed, other requests are sent and recorded
+    # "record" - all requests are sent and recorded
+    # "replay" - only recorded responses are used, there is no network at all
+    modes = ("auto", "record", "replay")
+
+    def __init__(self, path=None, mode="auto"):
+        if not isinstance(path, str) and not path is None:
+            raise TypeError("'path' must be str type or None")
+        if not isinstance(mode, str):
+            raise TypeError("'mode' must be str type")
+        if not mode in self.modes:
+            raise ValueError("'mode' must be one of: %s" % ", ".join(self.modes))
+
+        self.path = path
+        self.mode = mode
+        # Request key -> list of [status, reason, url, headers, body hash]
+        self.interactions = dict()
+        # Body hash -> body
+        self.bodies = dict()
+        # Request key -> index of the next response to replay
+        self.positions = dict()
+        # Keys recorded in this session, old responses for them are replaced
+        self.recorded = set()
+        self.changed = False
+        if not path is None and os.path.exists(path):
+            self.load(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.changed and not self.path is None:
+            self.save()
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.interactions.values())
+
+    @staticmethod
+    def key(method, url, params=None):
+        # Only the path of the url is matched, so the same cassette works with any root url.
+        # Headers and form data are not matched, they have tokens and passwords
+        path = urlsplit(url).path
+        if not params:
+            return "%s %s" % (method.upper(), path)
+        return "%s %s %s" % (method.upper(), path, json.dumps(params, sort_keys=True))
+
+    def play(self, method, url, params=None):
+        if self.mode == "record":
+            return None
+        key = self.key(method, url, params)
+        responses = self.interactions.get(key)
+        if not responses:
+            if self.mode == "replay":
+                raise NotRecordedRequest(key)
+            return None
+
+        # Responses of the same request are replayed in order, the last one is repeated
+        position = self.positions.get(key, 0)
+        self.positions[key] = position + 1
+        status, reason, response_url, headers, body = responses[min(position, len(responses) - 1)]
+        return Record(status, reason, response_url, headers, self.bodies[body])
+
+    def record(self, method, url, params, status, reason, response_url, headers, body):
+        if self.mode == "replay":
+            return
+        key = self.key(method, url, params)
+        if not key in self.recorded:
+            self.recorded.add(key)
+            self.interactions[key] = []
+        digest = sha1(body).hexdigest()
+        self.bodies[digest] = body
+        # Cookies are not replayed, and they must not get into cassettes committed to repositories
+        headers = {name: value for name, value in headers.items() if name.lower() != "set-cookie"}
+        self.interactions[key].append([status, reason, str(response_url), headers, digest])
+        self.changed = True
+
+    def rewind(self):
+        self.positions.clear()
+
+    def dumps(self):
+        data = {
+            "interactions": self.interactions,
+            # Bodies are text in almost all cases, surrogateescape keeps other bytes as they are
+            "bodies": {
+                digest: body.decode("utf-8", "surrogateescape")
+                for digest, body in self.bodies.items()
+            },
+        }
+        return zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 9)
+
+    def loads(self, data):
+        data = json.loads(zlib.decompress(data).decode("utf-8"))
+        self.interactions.update(data["interactions"])
+        self.bodies.update({
+            digest: body.encode("utf-8", "surrogateescape")
+            for digest, body in data["bodies"].items()
+        })
+
+    def save(self, path=None):
+        path = self.path if path is None else path
+        if path is None:
+            raise ValueError("'path' must be set")
+        with open(path, "wb") as f:
+            f.write(self.dumps())
+        self.changed = False
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            self.loads(f.read())
@@ -0,0 +1,35 @@
+from importlib import import_module
+import json
+
+
+# Backends in order of preference, the first installed one is used by default
+JSON_BACKENDS = ("orjson", "ujson", "simdjson", "json")
+
+
+def get_json_loads(backend=None):
+    if not isinstance(backend, str) and not backend is None:
+        raise TypeError("'backend' must be str type or None")
+    if not backend is None and not backend in JSON_BACKENDS:
+        raise ValueError("'backend' must be one of: %s" % ", ".join(JSON_BACKENDS))
+
+    for name in JSON_BACKENDS if backend is None else (backend,):
+        if name == "json":
+            return json.loads
+        try:
+            # All of them accept str and bytes and raise ValueError subclasses on invalid data
+            return import_module(name).loads
+        except ImportError:
+            if not backend is None:
+                raise
+    return json.loads
+
+
+def available_json_backends():
+    backends = []
+    for name in JSON_BACKENDS:
+        try:
+            get_json_loads(name)
+            backends.append(name)
+        except ImportError:
+            pass
+    return backends
@@ -1,27 +1,482 @@
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from .exceptions import NotUpdatedElement
+import sys
+from time import monotonic
+from weakref import WeakValueDictionary
+
+
+# Decoders return it when the node has no value for the attribute, the known value is kept then
+NOT_PRESENT = object()
+
+def sizeof(element):
+    size = sys.getsizeof(element)
+    if hasattr(element, "__dict__"):
+        size += sys.getsizeof(element.__dict__)
+        size += sum(sys.getsizeof(value) for value in element.__dict__.values())
+    for name in getattr(type(element), "__slots__", ()):
+        # object.__getattribute__ doesn't decode attributes of lazy elements
+        try:
+            value = object.__getattribute__(element, name)
+        except AttributeError:
+            continue
+        if name != "__weakref__":
+            size += sys.getsizeof(value)
+    return size
+
+
+def merge(first, second, left, both, right):
+    # Linear merge of two sorted arrays of unique ids. Ids only in the first array are kept if
+    # left is set, ids in both arrays if both is set and ids only in the second one if right is set
+    result = array("q")
+    i = 0
+    j = 0
+    first_size = len(first)
+    second_size = len(second)
+    while i < first_size and j < second_size:
+        a = first[i]
+        b = second[j]
+        if a < b:
+            if left:
+                result.append(a)
+            i += 1
+        elif a > b:
+            if right:
+                result.append(b)
+            j += 1
+        else:
+            if both:
+                result.append(a)
+            i += 1
+            j += 1
+    if left:
+        result.extend(first[i:])
+    if right:
+        result.extend(second[j:])
+    return result
+
+
+class Relation:
+    def __init__(self, accounts=()):
+        self.ids = array("q")
+        # Ids added after the last compaction, they are merged into ids when the order is needed
+        self.pending = set()
+        # Id -> username, accounts are materialized from it
+        self.names = dict()
+        for account in accounts:
+            self.add(account)
+
+    @classmethod
+    def from_ids(cls, ids, names):
+        if not isinstance(names, dict):
+            raise TypeError("'names' must be dict type")
+
+        relation = cls()
+        relation.ids = array("q", sorted(set(ids)))
+        # Accounts are materialized by usernames, so every id must have one
+        try:
+            relation.names = {id: names[id] for id in relation.ids}
+        except KeyError as exception:
+            raise ValueError("'names' has no username for id %s" % exception)
+        return relation
+
+    def __len__(self):
+        self.compact()
+        return len(self.ids)
+
+    def __bool__(self):
+        return bool(self.ids) or bool(self.pending)
+
+    def __iter__(self):
+        self.compact()
+        for id in self.ids:
+            account = Account(self.names[id])
+            if account.id is None:
+                account.id = str(id)
+            yield account
+
+    def __contains__(self, account):
+        if not isinstance(account, Account) or account.id is None:
+            return False
+        id = int(account.id)
+        if id in self.pending:
+            return True
+        index = bisect_left(self.ids, id)
+        return index < len(self.ids) and self.ids[index] == id
+
+    def __eq__(self, other):
+        if isinstance(other, Relation):
+            self.compact()
+            other.compact()
+            return self.ids == other.ids
+        if isinstance(other, (set, frozenset)):
+            return set(self) == other
+        return NotImplemented
+
+    # Relations replaced sets of accounts, so operators accept sets of accounts too
+    def __or__(self, other):
+        if not isinstance(other, (Relation, set, frozenset)):
+            return NotImplemented
+        return self.union(other)
+
+    __ror__ = __or__
+
+    def __and__(self, other):
+        if not isinstance(other, (Relation, set, frozenset)):
+            return NotImplemented
+        return self.intersection(other)
+
+    __rand__ = __and__
+
+    def __sub__(self, other):
+        if not isinstance(other, (Relation, set, frozenset)):
+            return NotImplemented
+        return self.difference(other)
+
+    def __rsub__(self, other):
+        if not isinstance(other, (set, frozenset)):
+            return NotImplemented
+        return Relation(other).difference(self)
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, list(self))
+
+    def compact(self):
+        if self.pending:
+            self.ids = merge(self.ids, array("q", sorted(self.pending)), True, True, True)
+            self.pending = set()
+
+    def add(self, account):
+        if account.id is None:
+            raise NotUpdatedElement(account, "id")
+
+        id = int(account.id)
+        self.names[id] = account.username
+        self.pending.add(id)
+
+    def discard(self, account):
+        if not isinstance(account, Account) or account.id is None:
+            return
+        id = int(account.id)
+        self.pending.discard(id)
+        self.names.pop(id, None)
+        index = bisect_left(self.ids, id)
+        if index < len(self.ids) and self.ids[index] == id:
+            del self.ids[index]
+
+    def remove(self, account):
+        if not account in self:
+            raise KeyError(account)
+        self.discard(account)
+
+    def clear(self):
+        self.ids = array("q")
+        self.pending = set()
+        self.names = dict()
+
+    def copy(self):
+        self.compact()
+        relation = Relation()
+        relation.ids = array("q", self.ids)
+        relation.names = self.names.copy()
+        return relation
+
+    def combine(self, other, left, both, right):
+        if not isinstance(other, Relation):
+            other = Relation(other)
+        self.compact()
+        other.compact()
+        relation = Relation()
+        relation.ids = merge(self.ids, other.ids, left, both, right)
+        # Result keeps names of its own ids only
+        for id in relation.ids:
+            name = self.names.get(id)
+            if name is None:
+                name = other.names.get(id)
+            if not name is None:
+                relation.names[id] = name
+        return relation
+
+    def union(self, other):
+        return self.combine(other, True, True, True)
+
+    def intersection(self, other):
+        return self.combine(other, False, True, False)
+
+    def difference(self, other):
+        return self.combine(other, True, False, False)
+
+
+def relation(name, factory):
+    slot = "_" + name
+
+    def getter(self):
+        try:
+            return getattr(self, slot)
+        except AttributeError:
+            # Relations of lazy elements are decoded from the node on first access
+            node = self.node if name in self.decoders else None
+            value = factory() if node is None else self.decoders[name](node)
+            setattr(self, slot, value)
+            return value
+
+    def setter(self, value):
+        # Empty containers are not stored, they will be created on first access
+        if isinstance(value, factory) and not value:
+            if hasattr(self, slot):
+                delattr(self, slot)
+        else:
+            setattr(self, slot, value)
+
+    def deleter(self):
+        if hasattr(self, slot):
+            delattr(self, slot)
+
+    return property(getter, setter, deleter)
+
+
+def slotted(cls):
+    namespace = dict()
+    for base in reversed(cls.__mro__[:-1]):
+        namespace.update(base.__dict__)
+    for key in ("__dict__", "__weakref__", "cache", "slotted", "compact", "clear_cache",
+                "set_cache", "set_compact"):
+        namespace.pop(key, None)
+
+    relations = namespace.get("relations", dict())
+    namespace["__slots__"] = tuple(name for name in cls.attributes if not name in relations) + \
+        tuple("_" + name for name in relations) + ("__weakref__",)
+    if namespace.get("decoders"):
+        namespace["__slots__"] += ("node",)
+    for name, factory in relations.items():
+        namespace[name] = relation(name, factory)
+    namespace["__module__"] = cls.__module__
+    namespace["__qualname__"] = "Compact" + cls.__qualname__
+    namespace["origin"] = cls
+    namespace["cache"] = cls.cache
+
+    return type("Compact" + cls.__name__, (), namespace)
+
+
+class ElementCache(OrderedDict):
+    # Attributes are read on every constructor call, slots are faster than the dict of instance
+    __slots__ = ("max_size", "ttl", "max_bytes", "sizeof", "limited", "bytes", "sizes",
+                 "deadlines", "released", "hits", "misses", "evictions")
+
+    def __init__(self, max_size=None, ttl=None, max_bytes=None, sizeof=sizeof):
+        if not isinstance(max_size, int) and not max_size is None:
+            raise TypeError("'max_size' must be int type or None")
+        if not isinstance(ttl, (int, float)) and not ttl is None:
+            raise TypeError("'ttl' must be int or float type or None")
+        if not isinstance(max_bytes, int) and not max_bytes is None:
+            raise TypeError("'max_bytes' must be int type or None")
+        if not callable(sizeof):
+            raise TypeError("'sizeof' must be function")
+
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        # Unlimited cache is a plain map, lookups skip the bookkeeping of the limits
+        self.limited = not (max_size is None and ttl is None and max_bytes is None)
+        self.bytes = 0
+        self.sizes = dict()
+        self.deadlines = OrderedDict()
+        # Evicted elements which are still referenced somewhere. They are restored on lookup, so
+        # eviction never breaks the "one object per key" guarantee
+        self.released = WeakValueDictionary()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __setitem__(self, key, value):
+        if key in self:
+            del self[key]
+        super().__setitem__(key, value)
+        if not self.ttl is None:
+            self.deadlines[key] = monotonic() + self.ttl
+        if not self.max_bytes is None:
+            self.sizes[key] = self.sizeof(value)
+            self.bytes += self.sizes[key]
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.deadlines.pop(key, None)
+        self.bytes -= self.sizes.pop(key, 0)
+
+    def clear(self):
+        super().clear()
+        self.deadlines.clear()
+        self.sizes.clear()
+        self.released.clear()
+        self.bytes = 0
+
+    def lookup(self, key):
+        element = self.get(key)
+        if self.limited:
+            # Only ttl can expire elements between stores, size limits are checked in store
+            if self.deadlines:
+                self.evict()
+                element = self.get(key)
+            if not element is None:
+                # Order is used only for eviction by the limits
+                self.move_to_end(key)
+                if not self.max_bytes is None:
+                    self.bytes -= self.sizes[key]
+                    self.sizes[key] = self.sizeof(element)
+                    self.bytes += self.sizes[key]
+        if not element is None:
+            self.hits += 1
+            return element
+
+        element = self.released.pop(key, None)
+        if element is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.store(key, element)
+        return element
+
+    def store(self, key, element):
+        self[key] = element
+        self.evict()
+
+    def release(self, key):
+        element = super().__getitem__(key)
+        del self[key]
+        self.released[key] = element
+        self.evictions += 1
+
+    def evict(self):
+        if self.deadlines:
+            now = monotonic()
+            while self.deadlines:
+                key, deadline = next(iter(self.deadlines.items()))
+                if deadline > now:
+                    break
+                self.release(key)
+        if not self.max_size is None:
+            while len(self) > self.max_size:
+                self.release(next(iter(self)))
+        if not self.max_bytes is None:
+            while self.bytes > self.max_bytes and self:
+                self.release(next(iter(self)))
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self),
+            "bytes": self.bytes,
+        }
+
+
+class WeakElementCache(WeakValueDictionary):
+    def __init__(self):
+        super().__init__()
+        self.limited = False
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key):
+        element = self.get(key)
+        if element is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return element
+
+    def store(self, key, element):
+        self[key] = element
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": 0,
+            "size": len(self),
+            "bytes": 0,
+        }
+
+
 class ElementConstructor(type):
     def __new__(mcs, name, classes, fields):
         def delete(self):
             key = self.__getattribute__(self.primary_key)
-            if key in self.cache:
+            if self.cache.get(key) is self:
                 del self.cache[key]
 
         @classmethod
         def clear_cache(cls):
             cls.cache.clear()
 
+        @classmethod
+        def set_cache(cls, cache):
+            if not isinstance(cache, (ElementCache, WeakElementCache)):
+                raise TypeError("'cache' must be ElementCache or WeakElementCache type")
+
+            for key, element in cls.cache.items():
+                cache.store(key, element)
+            cls.cache = cache
+            if not cls.slotted is None:
+                cls.slotted.cache = cache
+
+        @classmethod
+        def set_compact(cls, compact=True):
+            if cls.slotted is None:
+                raise TypeError("'%s' has no compact variant" % cls.__name__)
+
+            cls.compact = compact
+            # Compact elements are instances of their classes for isinstance. The hooks are
+            # installed only when they are needed, they make every isinstance check slower
+            if compact and not "__instancecheck__" in mcs.__dict__:
+                mcs.__instancecheck__ = instancecheck
+                mcs.__subclasscheck__ = subclasscheck
+
         fields["__del__"] = delete
         fields["clear_cache"] = clear_cache
+        fields["set_cache"] = set_cache
+        fields["set_compact"] = set_compact
         fields["__str__"] = lambda self: str(self.__getattribute__(self.primary_key))
         fields["__repr__"] = lambda self: str(self.__getattribute__(self.primary_key))
-        fields["cache"] = dict()
+        fields["cache"] = ElementCache()
+        fields["slotted"] = None
+        fields["compact"] = False
+
+        cls = super().__new__(mcs, name, classes, fields)
+        if "attributes" in fields:
+            cls.slotted = slotted(cls)
 
-        return super().__new__(mcs, name, classes, fields)
+        return cls
 
     def __call__(cls, key, *args, **kwargs):
-        if not str(key) in cls.cache:
-            cls.cache[str(key)] = super().__call__(str(key), *args, **kwargs)
+        key = str(key)
+        cache = cls.cache
+        # Hit in the unlimited cache is inlined, it is the most frequent call of the library
+        element = cache.get(key)
+        if not element is None and not cache.limited:
+            cache.hits += 1
+            return element
+        element = cache.lookup(key)
+        if element is None:
+            if cls.compact:
+                element = cls.slotted(key, *args, **kwargs)
+            else:
+                element = super().__call__(key, *args, **kwargs)
+            cls.cache.store(key, element)
+
+        return element
+
+
+def instancecheck(cls, instance):
+    return cls.__subclasscheck__(type(instance))
+
 
-        return cls.cache[str(key)]
+def subclasscheck(cls, subclass):
+    return type.__subclasscheck__(cls, getattr(subclass, "origin", subclass))
 
 
 # Common abstract classes 
@@ -31,8 +486,39 @@ class Element(metaclass=ElementConstructor):
 
 
 class UpdatableElement(Element):
+    # Attribute -> function which decodes it from the node of the element. Elements with decoders
+    # can be decoded partially (set_data with fields) or lazily (set_lazy)
+    decoders = dict()
+    # Attributes which are missing in some nodes, set_lazy keeps their known values
+    optional = ()
+
+    def __getattr__(self, name):
+        # Called only for unset attributes, so decoded attributes cost nothing
+        node = getattr(self, "node", None) if name in self.decoders else None
+        if node is None:
+            raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+        value = self.decoders[name](node)
+        if value is NOT_PRESENT:
+            value = None
+        setattr(self, name, value)
+        return value
+
     def set_data(self):
         raise NotImplementedError
+
+    def set_lazy(self, data):
+        # Element keeps the node and decodes attributes from it on first access
+        for name, decoder in self.decoders.items():
+            if name in self.optional and not getattr(self, name, None) is None:
+                value = decoder(data)
+                if not value is NOT_PRESENT:
+                    setattr(self, name, value)
+                continue
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass
+        self.node = data
     
     def entry_data_path(self):
         raise NotImplementedError
@@ -56,6 +542,10 @@ class Account(HasMediaElement):
     base_url = ""
     media_path = ("user", "edge_owner_to_timeline_media")
     media_query_hash = "c6809c9c025875ac6f02619eae97a80e"
+    attributes = ("id", "username", "full_name", "profile_pic_url", "profile_pic_url_hd",
+                  "fb_page", "biography", "follows_count", "followers_count", "media_count",
+                  "is_private", "is_verified", "country_block")
+    relations = {"media": set, "follows": Relation, "followers": Relation}
 
     def __init__(self, username):
         self.id = None
@@ -73,8 +563,8 @@ class Account(HasMediaElement):
         self.country_block = None
 
         self.media = set()
-        self.follows = set()
-        self.followers = set()
+        self.follows = Relation()
+        self.followers = Relation()
 
     def set_data(self, data):
         self.id = data["id"]
@@ -91,10 +581,80 @@ class Account(HasMediaElement):
         self.country_block = data["country_block"]
 
 
+def decode_caption(data):
+    edges = data["edge_media_to_caption"]["edges"]
+    return edges[0]["node"]["text"] if edges else None
+
+
+def decode_location(data):
+    location = data.get("location")
+    return Location(location["id"]) if location and "id" in location else NOT_PRESENT
+
+
+def decode_comments_count(data):
+    if "edge_media_to_comment" in data:
+        return data["edge_media_to_comment"]["count"]
+    return data["edge_media_to_parent_comment"]["count"]
+
+
+def decode_resources(data):
+    if "display_resources" in data:
+        return [resource["src"] for resource in data["display_resources"]]
+    return [resource["src"] for resource in data["thumbnail_resources"]]
+
+
+def decode_album(data):
+    album = set()
+    if "edge_sidecar_to_children" in data:
+        for edge in data["edge_sidecar_to_children"]["edges"]:
+            if edge["node"].get("shortcode", data["shortcode"]) != data["shortcode"]:
+                album.add(Media(edge["node"]["shortcode"]))
+    return album
+
+
 class Media(UpdatableElement):
     primary_key = "code"
     entry_data_path = ("PostPage", 0, "graphql", "shortcode_media")
     base_url = "p/"
+    attributes = ("id", "code", "caption", "owner", "date", "location", "likes_count",
+                  "comments_count", "comments_disabled", "is_video", "video_url", "is_ad",
+                  "display_url", "resources", "is_album")
+    relations = {"album": set, "likes": Relation, "comments": set}
+    code_alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+    decoders = {
+        "id": lambda data: data["id"],
+        "caption": decode_caption,
+        "owner": lambda data: Account(data["owner"]["username"]) \
+            if "username" in data["owner"] else NOT_PRESENT,
+        "date": lambda data: data["taken_at_timestamp"],
+        "location": decode_location,
+        "likes_count": lambda data: data["edge_media_preview_like"]["count"],
+        "comments_count": decode_comments_count,
+        "comments_disabled": lambda data: data["comments_disabled"],
+        "is_video": lambda data: data["is_video"],
+        "video_url": lambda data: data.get("video_url", NOT_PRESENT) if data["is_video"] \
+            else NOT_PRESENT,
+        "is_ad": lambda data: data.get("is_ad", NOT_PRESENT),
+        "display_url": lambda data: data["display_url"],
+        "resources": decode_resources,
+        "is_album": lambda data: data.get("__typename") == "GraphSidecar",
+        "album": decode_album,
+    }
+    optional = ("owner", "location", "video_url", "is_ad")
+
+    @classmethod
+    def code_to_id(cls, code):
+        # Short code of public media is its id in base64 with url alphabet. Codes of private
+        # media are longer and can't be decoded, None is returned for them
+        if len(code) > 11:
+            return None
+        result = 0
+        for char in code:
+            index = cls.code_alphabet.find(char)
+            if index < 0:
+                return None
+            result = result * 64 + index
+        return str(result)
 
     def __init__(self, code):
         self.id = None
@@ -112,49 +672,31 @@ class Media(UpdatableElement):
         self.display_url = None
         self.resources = None
         self.is_album = None
+        self.node = None
 
         self.album = set()
-        self.likes = set()
+        self.likes = Relation()
         self.comments = set()
 
-    def set_data(self, data):
-        self.id = data["id"]
+    def set_data(self, data, fields=None):
+        # Only named attributes are decoded when fields are set, others are left as they are
         self.code = data["shortcode"]
-        if data["edge_media_to_caption"]["edges"]:
-            self.caption = data["edge_media_to_caption"]["edges"][0]["node"]["text"]
-        else:
-            self.caption = None
-        if "username" in data["owner"]:
-            self.owner = Account(data["owner"]["username"])
-        self.date = data["taken_at_timestamp"]
-        if "location" in data and data["location"] and "id" in data["location"]:
-            self.location = Location(data["location"]["id"])
-        self.likes_count = data["edge_media_preview_like"]["count"]
-        if "edge_media_to_comment" in data:
-            self.comments_count = data["edge_media_to_comment"]["count"]
+        if fields is None:
+            for name, decoder in self.decoders.items():
+                value = decoder(data)
+                if not value is NOT_PRESENT:
+                    setattr(self, name, value)
+            self.node = None
         else:
-            self.comments_count = data["edge_media_to_parent_comment"]["count"]
-        self.comments_disabled = data["comments_disabled"]
-        self.is_video = data["is_video"]
-        if self.is_video and "video_url" in data:
-            self.video_url = data["video_url"]
-        if "is_ad" in data:
-            self.is_ad = data["is_ad"]
-        self.display_url = data["display_url"]
-        if "display_resources" in data:
-            self.resources = [resource["src"] for resource in data["display_resources"]]
-        else:
-            self.resources = [resource["src"] for resource in data["thumbnail_resources"]]
-        self.album = set()
-        self.is_album = data.get("__typename") == "GraphSidecar"
-        if "edge_sidecar_to_children" in data:
-            for edge in data["edge_sidecar_to_children"]["edges"]:
-                if edge["node"].get("shortcode", self.code) != self.code:
-                    self.album.add(Media(edge["node"]["shortcode"]))
+            for name in fields:
+                value = self.decoders[name](data)
+                if not value is NOT_PRESENT:
+                    setattr(self, name, value)
 
 
 class Story(Element):
     primary_key = "id"
+    attributes = ("id",)
 
     def __init__(self, id):
         self.id = id
@@ -166,6 +708,9 @@ class Location(HasMediaElement):
     base_url = "explore/locations/"
     media_path = ("location", "edge_location_to_media")
     media_query_hash = "ac38b90f0f3981c42092016a37c59bf7"
+    attributes = ("id", "slug", "name", "has_public_page", "directory", "coordinates",
+                  "media_count")
+    relations = {"media": set, "top_posts": set}
 
     def __init__(self, id):
         self.id = id
@@ -198,6 +743,8 @@ class Tag(HasMediaElement):
     base_url = "explore/tags/"
     media_path = ("hashtag", "edge_hashtag_to_media")
     media_query_hash = "ded47faa9a1aaded10161a2ff32abb6b"
+    attributes = ("name", "media_count")
+    relations = {"media": set, "top_posts": set}
 
     def __init__(self, name):
         self.name = name
@@ -215,6 +762,7 @@ class Tag(HasMediaElement):
 
 class Comment(Element):
     primary_key = "id"
+    attributes = ("id", "media", "owner", "text", "created_at")
 
     def __init__(self, id, media, owner, text, created_at):
         self.id = id
@@ -0,0 +1,57 @@
+from logging import DEBUG, ERROR, INFO
+
+
+class EventLog:
+    # Events of the agents for the logger. Levels are checked once, when the log is created, so
+    # disabled events cost one call without formatting. Arguments are formatted by the logger
+    # only when the message is emitted. Call refresh after changing levels of the logger
+    def __init__(self, logger=None, pages=False):
+        if not isinstance(pages, bool):
+            raise TypeError("'pages' must be bool type")
+
+        self.logger = logger
+        # Debug message for every page of the lists
+        self.pages = pages
+        self.refresh()
+
+    def refresh(self):
+        logger = self.logger
+        self.info = not logger is None and logger.isEnabledFor(INFO)
+        self.error = not logger is None and logger.isEnabledFor(ERROR)
+        self.debug = self.pages and not logger is None and logger.isEnabledFor(DEBUG)
+
+    def started(self, operation, target=None):
+        if self.info:
+            if target is None:
+                self.logger.info("%s started", operation)
+            else:
+                self.logger.info("%s '%s' started", operation, target)
+
+    def succeeded(self, operation, target=None):
+        if self.info:
+            if target is None:
+                self.logger.info("%s was successful", operation)
+            else:
+                self.logger.info("%s '%s' was successful", operation, target)
+
+    def failed(self, operation, target=None, exception=None):
+        if self.error:
+            if target is None:
+                self.logger.error("%s was unsuccessful: %s", operation, exception)
+            else:
+                self.logger.error("%s '%s' was unsuccessful: %s", operation, target, exception)
+
+    def parser(self, parse):
+        # Parser of the pages with debug messages. Pagination uses it only if page messages are
+        # enabled, otherwise there is no code for them in the loop at all
+        if not self.debug:
+            return parse
+        logger = self.logger
+
+        def wrapper(data, count):
+            items = parse(data, count)
+            logger.debug("Page of %d items parsed, end cursor: %s", len(items),
+                         data["page_info"]["end_cursor"])
+            return items
+
+        return wrapper
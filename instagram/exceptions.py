@@ -1,5 +1,10 @@
 from aiohttp import ClientResponseError
+import asyncio
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from random import uniform
 from requests.exceptions import HTTPError
+import time
 
 
 class InstagramException(Exception):
@@ -7,7 +12,11 @@ class InstagramException(Exception):
 
 
 class InternetException(InstagramException):
-    def __init__(self, exception):
+    def __init__(self, exception, response=None):
+        self.request = None
+        self.response = response
+        self.status = None
+        self.headers = {}
         if isinstance(exception, HTTPError):
             super().__init__(
                 "Error by connection with Instagram to '%s' with response code '%s'" % (
@@ -17,6 +26,8 @@ class InternetException(InstagramException):
             )
             self.request = exception.request
             self.response = exception.response
+            self.status = exception.response.status_code
+            self.headers = exception.response.headers
         elif isinstance(exception, ClientResponseError):
             super().__init__(
                 "Error by connection with Instagram to '%s' with response code '%s'" % (
@@ -24,6 +35,11 @@ class InternetException(InstagramException):
                     exception.status,
                 ),
             )
+            self.request = exception.request_info
+            self.status = exception.status
+            self.headers = exception.headers or {}
+        else:
+            super().__init__(str(exception))
 
 
 class AuthException(InstagramException):
@@ -61,13 +77,79 @@ class NotUpdatedElement(InstagramException):
         ))
 
 
+class NotRecordedRequest(InstagramException):
+    def __init__(self, key):
+        super().__init__("There is no recorded response for '%s'" % key)
+        self.key = key
+
+
+class RetryPolicy:
+    def __init__(self, delay=1, multiplier=2, max_delay=60, jitter=True, max_elapsed=None,
+                 retry_after=True):
+        if not isinstance(delay, (int, float)):
+            raise TypeError("'delay' must be int or float type")
+        if not isinstance(multiplier, (int, float)):
+            raise TypeError("'multiplier' must be int or float type")
+        if not isinstance(max_delay, (int, float)) and not max_delay is None:
+            raise TypeError("'max_delay' must be int or float type or None")
+        if not isinstance(max_elapsed, (int, float)) and not max_elapsed is None:
+            raise TypeError("'max_elapsed' must be int or float type or None")
+
+        self.delay = delay
+        self.multiplier = multiplier
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.max_elapsed = max_elapsed
+        self.retry_after = retry_after
+
+    def backoff(self, attempt, exception=None, elapsed=0):
+        # Returns delay before the next attempt or None if the budget is exhausted
+        delay = self.delay * self.multiplier ** attempt
+        if not self.max_delay is None:
+            delay = min(delay, self.max_delay)
+        if self.jitter:
+            delay = uniform(0, delay)
+        if self.retry_after:
+            retry_after = self.get_retry_after(exception)
+            if not retry_after is None:
+                delay = max(delay, retry_after)
+        if not self.max_elapsed is None and elapsed + delay > self.max_elapsed:
+            return None
+        return delay
+
+    @staticmethod
+    def get_retry_after(exception):
+        headers = getattr(exception, "headers", None)
+        if not headers:
+            response = getattr(exception, "response", None)
+            headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        value = headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
 class ExceptionManager:
-    def __init__(self, repeats=1):
+    def __init__(self, repeats=1, delay=0):
         self.tree = {
             "action": lambda exception, *args, **kwargs: (args, kwargs),
             "branch": {},
         }
         self.repeats = repeats
+        self.delay = delay
+        self.policies = {}
+        # Exception type -> result of search or policy, reset when handlers or policies change
+        self.search_cache = {}
+        self.policy_cache = {}
 
 
     def __getitem__(self, key):
@@ -78,6 +160,13 @@ class ExceptionManager:
 
 
     def search(self, exception):
+        result = self.search_cache.get(exception)
+        if result is None:
+            result = self.search_cache[exception] = self.search_tree(exception)
+        return result
+
+
+    def search_tree(self, exception):
         if not issubclass(exception, Exception):
             raise TypeError("'exception' must be Exception type")
 
@@ -105,16 +194,85 @@ class ExceptionManager:
             item["action"] = value
         else:
             item["branch"][key] = {"branch": {}, "action": value}
+        self.search_cache.clear()
+
+
+    def set_policy(self, key, policy):
+        if not issubclass(key, Exception):
+            raise TypeError("Key must be Exception type")
+        if not isinstance(policy, RetryPolicy) and not policy is None:
+            raise TypeError("'policy' must be RetryPolicy type or None")
+
+        if policy is None:
+            self.policies.pop(key, None)
+        else:
+            self.policies[key] = policy
+        self.policy_cache.clear()
+
+
+    def get_policy(self, key):
+        if not issubclass(key, Exception):
+            raise TypeError("Key must be Exception type")
+
+        if key in self.policy_cache:
+            return self.policy_cache[key]
+        for cls in key.__mro__:
+            if cls in self.policies:
+                policy = self.policies[cls]
+                break
+        else:
+            policy = None
+        self.policy_cache[key] = policy
+        return policy
+
+
+    def backoff(self, exception, attempt, elapsed):
+        policy = self.get_policy(exception.__class__)
+        if policy is None:
+            return self.delay
+        return policy.backoff(attempt, exception, elapsed)
 
 
     def decorator(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(obj, *args, **kwargs):
+                start = time.monotonic()
+                for repeat in range(self.repeats):
+                    try:
+                        return await func(obj, *args, **kwargs)
+                    except Exception as e:
+                        exception = e
+                        result = self[exception.__class__](exception, *args, **kwargs)
+                        if asyncio.iscoroutine(result):
+                            result = await result
+                        args, kwargs = result
+                        if repeat + 1 < self.repeats:
+                            delay = self.backoff(exception, repeat, time.monotonic() - start)
+                            if delay is None:
+                                raise
+                            if delay:
+                                await asyncio.sleep(delay)
+                else:
+                    raise exception
+
+            return async_wrapper
+
+        @wraps(func)
         def wrapper(obj, *args, **kwargs):
-            for _ in range(self.repeats):
+            start = time.monotonic()
+            for repeat in range(self.repeats):
                 try:
                     return func(obj, *args, **kwargs)
                 except Exception as e:
                     exception = e
                     args, kwargs = self[exception.__class__](exception, *args, **kwargs)
+                    if repeat + 1 < self.repeats:
+                        delay = self.backoff(exception, repeat, time.monotonic() - start)
+                        if delay is None:
+                            raise
+                        if delay:
+                            time.sleep(delay)
             else:
                 raise exception
 
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from .entities import Account, Location, Tag
+from threading import Lock
+from urllib.parse import urlencode, urlsplit
+
+
+# query_hash -> operation name used as a label of the metrics
+OPERATIONS = {
+    Account.media_query_hash: "media",
+    Location.media_query_hash: "location_media",
+    Tag.media_query_hash: "tag_media",
+    "1cb6ec562846122743b61e492c85999f": "likes",
+    "f0986789a5c5d17c2400faebf16efd0d": "comments",
+    "58712303d941c6855d4e888c5f0cd22f": "follows",
+    "37479f2b8209594dde7facb0d904896a": "followers",
+    "485c25657308f08317c1e4b967356828": "feed",
+    "60b755363b5c230111347a7a4e242001": "stories",
+}
+
+
+def get_operation(url, params=None):
+    path = urlsplit(url).path
+    if path.startswith("/graphql/"):
+        query_hash = None if params is None else params.get("query_hash")
+        return OPERATIONS.get(query_hash, "graphql")
+    if path.startswith("/web/"):
+        # /web/likes/<id>/like/ -> likes/like, /web/comments/<id>/delete/<id>/ -> comments/delete
+        parts = path.strip("/").split("/")
+        return "/".join(parts[1:4:2])
+    if path.startswith("/accounts/login/"):
+        return "login"
+    if path.startswith("/challenge/"):
+        return "checkpoint"
+    return "page"
+
+
+def get_size(data):
+    if not data:
+        return 0
+    if isinstance(data, dict):
+        return len(urlencode(data))
+    return len(data)
+
+
+class Metrics:
+    # Sink for the metrics of the agent requests. Counters and histograms are kept in memory and
+    # can be exported in Prometheus text format. Override observe to send them somewhere else
+    buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+    def __init__(self, buckets=None, prefix="instagram"):
+        if not isinstance(buckets, (tuple, list)) and not buckets is None:
+            raise TypeError("'buckets' must be tuple or list type or None")
+        if not isinstance(prefix, str):
+            raise TypeError("'prefix' must be str type")
+
+        if not buckets is None:
+            self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        # (operation, method, status) -> count
+        self.requests = dict()
+        # operation -> bytes
+        self.sent = dict()
+        self.received = dict()
+        # operation -> [count for each bucket and +Inf, sum]
+        self.latencies = dict()
+        self.lock = Lock()
+
+    def observe(self, operation, method, status, sent, received, latency):
+        # Status is None when the request failed without response
+        key = (operation, method, "error" if status is None else str(status))
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.sent[operation] = self.sent.get(operation, 0) + sent
+            self.received[operation] = self.received.get(operation, 0) + received
+            histogram = self.latencies.get(operation)
+            if histogram is None:
+                histogram = self.latencies[operation] = [0] * (len(self.buckets) + 2)
+            histogram[bisect_left(self.buckets, latency)] += 1
+            histogram[-1] += latency
+
+    def clear(self):
+        with self.lock:
+            self.requests.clear()
+            self.sent.clear()
+            self.received.clear()
+            self.latencies.clear()
+
+    def stats(self):
+        with self.lock:
+            operations = dict()
+            for (operation, method, status), count in self.requests.items():
+                stats = operations.setdefault(operation, {"requests": 0, "statuses": dict()})
+                stats["requests"] += count
+                stats["statuses"][status] = stats["statuses"].get(status, 0) + count
+            for operation, stats in operations.items():
+                histogram = self.latencies[operation]
+                stats["sent"] = self.sent[operation]
+                stats["received"] = self.received[operation]
+                stats["latency"] = histogram[-1] / stats["requests"]
+            return operations
+
+    def prometheus(self):
+        name = self.prefix + "_requests_total"
+        lines = [
+            "# HELP %s Requests sent by the agents" % name,
+            "# TYPE %s counter" % name,
+        ]
+        with self.lock:
+            for (operation, method, status), count in sorted(self.requests.items()):
+                lines.append('%s{operation="%s",method="%s",status="%s"} %d' % (
+                    name, operation, method, status, count))
+            for name, help, values in (
+                ("_sent_bytes_total", "Bytes of request bodies", self.sent),
+                ("_received_bytes_total", "Bytes of response bodies", self.received),
+            ):
+                name = self.prefix + name
+                lines.append("# HELP %s %s" % (name, help))
+                lines.append("# TYPE %s counter" % name)
+                for operation, value in sorted(values.items()):
+                    lines.append('%s{operation="%s"} %d' % (name, operation, value))
+
+            name = self.prefix + "_request_duration_seconds"
+            lines.append("# HELP %s Latency of the requests" % name)
+            lines.append("# TYPE %s histogram" % name)
+            for operation, histogram in sorted(self.latencies.items()):
+                count = 0
+                for bucket, value in zip(self.buckets + ("+Inf",), histogram):
+                    count += value
+                    lines.append('%s_bucket{operation="%s",le="%s"} %d' % (
+                        name, operation, bucket, count))
+                lines.append('%s_sum{operation="%s"} %s' % (name, operation, repr(histogram[-1])))
+                lines.append('%s_count{operation="%s"} %d' % (name, operation, count))
+        return "\n".join(lines) + "\n"
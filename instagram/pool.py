@@ -0,0 +1,139 @@
+from .agents import AsyncWebAgentAccount, load_state
+import aiohttp
+import asyncio
+from contextlib import asynccontextmanager
+from .exceptions import InternetException, RetryPolicy
+from time import monotonic
+
+
+async def close_agent(agent):
+    await agent.delete()
+    # Agent with closed session must not be returned for the same username later
+    if AsyncWebAgentAccount.cache.get(agent.username) is agent:
+        del AsyncWebAgentAccount.cache[agent.username]
+
+
+class SessionPool:
+    # Authorized accounts with own cookies and csrf tokens sharing one connection pool. Read
+    # requests are sent by the account which was used least recently or throttled least
+    def __init__(self, connector=None, strategy="lru", cooldown=60, max_cooldown=3600,
+                 **settings):
+        if not isinstance(connector, aiohttp.BaseConnector) and not connector is None:
+            raise TypeError("'connector' must be aiohttp.BaseConnector type or None")
+        if not strategy in ("lru", "throttled"):
+            raise ValueError("'strategy' must be 'lru' or 'throttled'")
+        if not isinstance(cooldown, (int, float)):
+            raise TypeError("'cooldown' must be int or float type")
+        if not isinstance(max_cooldown, (int, float)):
+            raise TypeError("'max_cooldown' must be int or float type")
+
+        self.connector_owner = connector is None
+        self.connector = aiohttp.TCPConnector() if connector is None else connector
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.settings = settings
+        self.agents = dict()
+        self.used = dict()
+        self.throttles = dict()
+        self.ready = dict()
+
+    def __len__(self):
+        return len(self.agents)
+
+    def __iter__(self):
+        return iter(self.agents.values())
+
+    async def add(self, username, password=None, cookies=None, settings=None, state=None):
+        if not isinstance(username, str):
+            raise TypeError("'username' must be str type")
+        if password is None and cookies is None and state is None:
+            raise ValueError("'password', 'cookies' or 'state' must be set")
+        if username in self.agents:
+            raise ValueError("Account '%s' is already in the pool" % username)
+        # Constructor returns the existing agent of the account with its own session and
+        # connector, and the cookies are ignored
+        if not AsyncWebAgentAccount.cache.lookup(username) is None:
+            raise ValueError("Agent of account '%s' already exists" % username)
+
+        if not state is None:
+            state = load_state(state)
+            if state.get("username", username) != username:
+                raise ValueError("State of account '%s' can't be used for account '%s'" % (
+                    state["username"],
+                    username,
+                ))
+
+        agent = AsyncWebAgentAccount(username, cookies=cookies, connector=self.connector,
+                                     **self.settings)
+        try:
+            if not state is None:
+                agent.set_state(state)
+            if not password is None:
+                await agent.auth(password, settings=settings)
+        except Exception:
+            await close_agent(agent)
+            raise
+        self.agents[username] = agent
+        self.used[username] = 0
+        self.throttles[username] = 0
+        self.ready[username] = 0
+        return agent
+
+    async def remove(self, username):
+        agent = self.agents.pop(username)
+        del self.used[username]
+        del self.throttles[username]
+        del self.ready[username]
+        await close_agent(agent)
+
+    def pick(self):
+        # Returns an account which isn't cooling down after throttling or None
+        now = monotonic()
+        candidates = [username for username in self.agents if self.ready[username] <= now]
+        if not candidates:
+            return None
+        if self.strategy == "throttled":
+            username = min(candidates, key=lambda name: (self.throttles[name], self.used[name]))
+        else:
+            username = min(candidates, key=lambda name: self.used[name])
+        self.used[username] = now
+        return self.agents[username]
+
+    def throttle(self, username, exception=None):
+        self.throttles[username] += 1
+        delay = min(self.max_cooldown, self.cooldown * 2 ** (self.throttles[username] - 1))
+        retry_after = RetryPolicy.get_retry_after(exception)
+        if not retry_after is None:
+            delay = max(delay, retry_after)
+        self.ready[username] = monotonic() + delay
+
+    @asynccontextmanager
+    async def acquire(self):
+        if not self.agents:
+            raise ValueError("Session pool is empty")
+
+        agent = self.pick()
+        while agent is None:
+            await asyncio.sleep(max(0, min(self.ready.values()) - monotonic()))
+            agent = self.pick()
+        try:
+            yield agent
+        except InternetException as exception:
+            if exception.status == 429 and agent.username in self.agents:
+                self.throttle(agent.username, exception)
+            raise
+        else:
+            # Successful request slowly brings the account back to the top of the queue
+            if self.throttles.get(agent.username):
+                self.throttles[agent.username] -= 1
+
+    async def call(self, method, *args, **kwargs):
+        async with self.acquire() as agent:
+            return await getattr(agent, method)(*args, **kwargs)
+
+    async def close(self):
+        for username in list(self.agents):
+            await self.remove(username)
+        if self.connector_owner:
+            await self.connector.close()
@@ -0,0 +1,254 @@
+from array import array
+from .entities import Account, Media
+
+
+class StringTable:
+    def __init__(self):
+        self.strings = []
+        self.indexes = dict()
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, index):
+        return None if index < 0 else self.strings[index]
+
+    def add(self, string):
+        if string is None:
+            return -1
+        index = self.indexes.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(string)
+            self.indexes[string] = index
+        return index
+
+    def find(self, string):
+        return self.indexes.get(string, -1)
+
+
+class Row:
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getattr__(self, name):
+        return self.store.get(self.index, name)
+
+    def __eq__(self, other):
+        return isinstance(other, Row) and self.store is other.store and self.index == other.index
+
+    def __hash__(self):
+        return hash((id(self.store), self.index))
+
+    def __str__(self):
+        return str(self.store.get(self.index, self.store.primary_key))
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, self)
+
+    def entity(self):
+        return self.store.entity(self.index)
+
+
+class StoreView:
+    def __init__(self, store, indexes):
+        self.store = store
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __iter__(self):
+        for index in self.indexes:
+            yield Row(self.store, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return StoreView(self.store, self.indexes[key])
+        return Row(self.store, self.indexes[key])
+
+    def where(self, name, predicate):
+        # Predicate gets decoded values, the same as attributes of the rows, None included
+        store = self.store
+        column = store.columns[name]
+        if store.schema[name] == "s":
+            # Predicate is called once for every distinct string, not for every row
+            matches = {
+                index for index, string in enumerate(store.tables[name].strings)
+                if predicate(string)
+            }
+            if -1 in column and predicate(None):
+                matches.add(-1)
+            indexes = (index for index in self.indexes if column[index] in matches)
+        else:
+            indexes = (index for index in self.indexes if predicate(store.get(index, name)))
+        return StoreView(store, array("q", indexes))
+
+
+class Store:
+    # Column name -> type. "q" and "b" columns are stored in arrays with -1 instead of None, "s"
+    # columns are stored as indexes in the string table of the column, "t" columns are plain lists
+    # for strings which are almost never repeated
+    schema = dict()
+    primary_key = None
+    entity_class = None
+
+    def __init__(self):
+        self.columns = dict()
+        self.tables = dict()
+        for name, kind in self.schema.items():
+            if kind == "s":
+                self.columns[name] = array("l")
+                self.tables[name] = StringTable()
+            elif kind == "t":
+                self.columns[name] = []
+            else:
+                self.columns[name] = array(kind)
+        # Index of the primary key in its string table -> first row with it
+        self.keys = dict()
+        self.rows = 0
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        for index in range(self.rows):
+            yield Row(self, index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return StoreView(self, range(self.rows)[key])
+        if key < 0:
+            key += self.rows
+        if not 0 <= key < self.rows:
+            raise IndexError("store index out of range")
+        return Row(self, key)
+
+    def get(self, index, name):
+        if not name in self.columns:
+            raise AttributeError("'%s' has no column '%s'" % (self.__class__.__name__, name))
+        kind = self.schema[name]
+        value = self.columns[name][index]
+        if kind == "s":
+            return self.tables[name][value]
+        if kind == "t":
+            return value
+        if value == -1:
+            return None
+        if kind == "b":
+            return bool(value)
+        return value
+
+    def append(self, **values):
+        for name, kind in self.schema.items():
+            value = values.get(name)
+            if kind == "s":
+                index = self.tables[name].add(value)
+                self.columns[name].append(index)
+                if name == self.primary_key and index >= 0:
+                    self.keys.setdefault(index, self.rows)
+            elif kind == "t":
+                self.columns[name].append(value)
+            elif value is None:
+                self.columns[name].append(-1)
+            else:
+                self.columns[name].append(int(value))
+        self.rows += 1
+        return self.rows - 1
+
+    def view(self, start, stop=None):
+        return StoreView(self, range(start, self.rows if stop is None else stop))
+
+    def column(self, name):
+        return self.columns[name]
+
+    def where(self, name, predicate):
+        return self[:].where(name, predicate)
+
+    def find(self, key):
+        row = self.keys.get(self.tables[self.primary_key].find(key))
+        return None if row is None else Row(self, row)
+
+    def entity(self, index):
+        entity = self.entity_class(self.get(index, self.primary_key))
+        for name in self.schema:
+            value = self.get(index, name)
+            if not value is None and name != self.primary_key:
+                setattr(entity, name, value)
+        # Ids of entities are strings, the store keeps them as numbers
+        if not entity.id is None:
+            entity.id = str(entity.id)
+        return entity
+
+
+class AccountStore(Store):
+    schema = {
+        "id": "q",
+        "username": "s",
+        "full_name": "t",
+        "profile_pic_url": "t",
+        "is_verified": "b",
+        "follows_count": "q",
+        "followers_count": "q",
+        "media_count": "q",
+    }
+    primary_key = "username"
+    entity_class = Account
+
+    def append_node(self, node):
+        return self.append(
+            id=node["id"],
+            username=node["username"],
+            full_name=node.get("full_name"),
+            profile_pic_url=node.get("profile_pic_url"),
+            is_verified=node.get("is_verified"),
+            follows_count=node["edge_follow"]["count"] if "edge_follow" in node else None,
+            followers_count=node["edge_followed_by"]["count"] if "edge_followed_by" in node \
+                else None,
+        )
+
+
+class MediaStore(Store):
+    schema = {
+        "id": "q",
+        "code": "s",
+        "owner": "s",
+        "date": "q",
+        "likes_count": "q",
+        "comments_count": "q",
+        "is_video": "b",
+        "display_url": "t",
+    }
+    primary_key = "code"
+    entity_class = Media
+
+    def append_node(self, node, owner=None):
+        if "edge_media_preview_like" in node:
+            likes_count = node["edge_media_preview_like"]["count"]
+        else:
+            likes_count = node.get("edge_liked_by", {}).get("count")
+        if "edge_media_to_comment" in node:
+            comments_count = node["edge_media_to_comment"]["count"]
+        else:
+            comments_count = node.get("edge_media_to_parent_comment", {}).get("count")
+        if owner is None:
+            owner = node.get("owner", {}).get("username")
+        return self.append(
+            id=node["id"],
+            code=node["shortcode"],
+            owner=owner,
+            date=node.get("taken_at_timestamp"),
+            likes_count=likes_count,
+            comments_count=comments_count,
+            is_video=node.get("is_video"),
+            display_url=node.get("display_url"),
+        )
+
+    def entity(self, index):
+        media = super().entity(index)
+        if not media.owner is None:
+            media.owner = Account(media.owner)
+        return media
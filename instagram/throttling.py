@@ -0,0 +1,199 @@
+import asyncio
+from collections import deque
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=1):
+        if not isinstance(rate, (int, float)):
+            raise TypeError("'rate' must be int or float type")
+        if not isinstance(capacity, (int, float)):
+            raise TypeError("'capacity' must be int or float type")
+        if rate <= 0:
+            raise ValueError("'rate' must be positive")
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.timestamp = monotonic()
+        self.lock = Lock()
+
+    def reserve(self, tokens=1):
+        # Tokens are taken in advance, so the balance can be negative. Returns the time to wait
+        # before the reserved tokens are available
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.timestamp) * self.rate)
+            self.timestamp = now
+            self.tokens -= tokens
+            return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    def __init__(self, limits=None):
+        if not isinstance(limits, dict) and not limits is None:
+            raise TypeError("'limits' must be dict type or None")
+
+        self.limits = dict()
+        self.buckets = dict()
+        self.lock = Lock()
+        for key, value in (dict() if limits is None else limits).items():
+            if isinstance(value, (int, float)):
+                self.set_limit(key, value)
+            else:
+                self.set_limit(key, *value)
+
+    def set_limit(self, key, rate, capacity=1):
+        # Key is "page", "action", "graphql" or "graphql:<query_hash>". Limit of "graphql" is
+        # used for every query hash without own limit, but each hash gets a separate bucket
+        if not isinstance(key, str):
+            raise TypeError("'key' must be str type")
+        TokenBucket(rate, capacity)
+
+        with self.lock:
+            self.limits[key] = (rate, capacity)
+            for name in list(self.buckets):
+                if name == key or name.split(":", 1)[0] == key:
+                    del self.buckets[name]
+
+    def bucket(self, key):
+        try:
+            return self.buckets[key]
+        except KeyError:
+            pass
+        with self.lock:
+            if not key in self.buckets:
+                limit = self.limits.get(key)
+                if limit is None:
+                    limit = self.limits.get(key.split(":", 1)[0])
+                self.buckets[key] = None if limit is None else TokenBucket(*limit)
+            return self.buckets[key]
+
+    def reserve(self, key, tokens=1):
+        bucket = self.bucket(key)
+        return 0 if bucket is None else bucket.reserve(tokens)
+
+    def acquire(self, key, tokens=1):
+        delay = self.reserve(key, tokens)
+        if delay:
+            sleep(delay)
+        return delay
+
+    async def acquire_async(self, key, tokens=1):
+        delay = self.reserve(key, tokens)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+class ConcurrencyController:
+    def __init__(self, window=4, min_window=1, max_window=64, increase=1, decrease=0.5,
+                 latency_factor=2, samples=100):
+        if not isinstance(window, (int, float)):
+            raise TypeError("'window' must be int or float type")
+        if not isinstance(min_window, (int, float)):
+            raise TypeError("'min_window' must be int or float type")
+        if not isinstance(max_window, (int, float)):
+            raise TypeError("'max_window' must be int or float type")
+        if not isinstance(latency_factor, (int, float)) and not latency_factor is None:
+            raise TypeError("'latency_factor' must be int or float type or None")
+        if not 0 < decrease < 1:
+            raise ValueError("'decrease' must be between 0 and 1")
+        if not 1 <= min_window <= window <= max_window:
+            raise ValueError("'window' must be between 'min_window' and 'max_window'")
+
+        self.window = window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.latencies = deque(maxlen=samples)
+        self.baseline = None
+        self.in_flight = 0
+        self.waiters = deque()
+        self.decreased_at = monotonic()
+        self.successes = 0
+        self.failures = 0
+
+    @property
+    def limit(self):
+        return max(1, int(self.window))
+
+    @property
+    def p95(self):
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    async def acquire(self):
+        while self.in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+                elif waiter.done() and not waiter.cancelled():
+                    self.wake()
+                raise
+        self.in_flight += 1
+        return monotonic()
+
+    def release(self, start, status=None):
+        # Status is None when the request failed without response
+        now = monotonic()
+        self.in_flight -= 1
+        self.latencies.append(now - start)
+        if status is None or status == 429 or status >= 500:
+            self.failures += 1
+            self.backoff(start, now)
+        else:
+            self.successes += 1
+            p95 = self.p95
+            if len(self.latencies) == self.latencies.maxlen:
+                # Baseline follows the lowest p95 and slowly drifts up if latency grows for long
+                if self.baseline is None or p95 < self.baseline:
+                    self.baseline = p95
+                else:
+                    self.baseline += (p95 - self.baseline) * 0.01
+            if not self.latency_factor is None and not self.baseline is None and \
+                    p95 > self.baseline * self.latency_factor:
+                self.backoff(start, now)
+            else:
+                # Additive increase: the window grows by 'increase' per window of responses
+                self.window = min(self.max_window, self.window + self.increase / self.window)
+        self.wake()
+
+    def cancel(self):
+        # Cancelled requests say nothing about the server, the slot is released as it is
+        self.in_flight -= 1
+        self.wake()
+
+    def wake(self):
+        free = self.limit - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def backoff(self, start, now):
+        # Multiplicative decrease, once for all requests which were sent before the last decrease
+        if start >= self.decreased_at:
+            self.window = max(self.min_window, self.window * self.decrease)
+            self.decreased_at = now
+
+    def stats(self):
+        return {
+            "window": self.window,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "p95": self.p95,
+            "baseline": self.baseline,
+            "successes": self.successes,
+            "failures": self.failures,
+        }
@@ -0,0 +1,156 @@
+import asyncio
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+
+# Span of the current operation, parent of the new spans. Every asyncio task has its own value
+current_span = ContextVar("current_span", default=None)
+# Context manager which does nothing, it is used instead of spans when there is no tracer
+no_span = nullcontext()
+
+
+class Span:
+    __slots__ = ("name", "parent", "attributes", "start", "end", "error", "token", "handle")
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict() if attributes is None else attributes
+        self.start = None
+        self.end = None
+        self.error = None
+        self.token = None
+        # Object of the tracing system which is used by the tracer, for example OpenTelemetry span
+        self.handle = None
+
+    def __repr__(self):
+        return "Span(%s)" % self.name
+
+    @property
+    def duration(self):
+        if self.start is None or self.end is None:
+            return None
+        return self.end - self.start
+
+    def path(self):
+        names = []
+        span = self
+        while not span is None:
+            names.append(span.name)
+            span = span.parent
+        return "/".join(reversed(names))
+
+
+class Tracer:
+    # Calls on_start and on_end for every span of the agents. Spans of operations (get_media,
+    # like, ...) have child spans: "update", "http", "extract", "decode", "parse" and "set_data".
+    # Override started and ended to send spans to a tracing system
+    def __init__(self, on_start=None, on_end=None):
+        if not callable(on_start) and not on_start is None:
+            raise TypeError("'on_start' must be function or None")
+        if not callable(on_end) and not on_end is None:
+            raise TypeError("'on_end' must be function or None")
+
+        self.on_start = on_start
+        self.on_end = on_end
+
+    def started(self, span):
+        if not self.on_start is None:
+            self.on_start(span)
+
+    def ended(self, span):
+        if not self.on_end is None:
+            self.on_end(span)
+
+    def start_span(self, name, **attributes):
+        span = Span(name, current_span.get(), attributes)
+        span.token = current_span.set(span)
+        span.start = perf_counter()
+        self.started(span)
+        return span
+
+    def end_span(self, span, error=None):
+        span.end = perf_counter()
+        span.error = error
+        current_span.reset(span.token)
+        span.token = None
+        self.ended(span)
+
+    @contextmanager
+    def span(self, name, **attributes):
+        span = self.start_span(name, **attributes)
+        try:
+            yield span
+        except BaseException as exception:
+            self.end_span(span, exception)
+            raise
+        self.end_span(span)
+
+    def wrap(self, name, func):
+        def wrapper(*args, **kwargs):
+            with self.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+
+def traced(func):
+    # Span for the method of the agent with the name of the method. The first argument is saved
+    # in "target" attribute if it is an entity
+    name = func.__name__
+
+    if asyncio.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(agent, *args, **kwargs):
+            tracer = agent.tracer
+            if tracer is None:
+                return await func(agent, *args, **kwargs)
+            with tracer.span(name, **target(args)):
+                return await func(agent, *args, **kwargs)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(agent, *args, **kwargs):
+        tracer = agent.tracer
+        if tracer is None:
+            return func(agent, *args, **kwargs)
+        with tracer.span(name, **target(args)):
+            return func(agent, *args, **kwargs)
+
+    return wrapper
+
+
+def target(args):
+    if args and hasattr(type(args[0]), "primary_key"):
+        return {"target": "%s %s" % (type(args[0]).__name__, args[0])}
+    return {}
+
+
+class OpenTelemetryTracer(Tracer):
+    # Sends spans to OpenTelemetry, package "opentelemetry-api" must be installed
+    def __init__(self, tracer=None, on_start=None, on_end=None):
+        from opentelemetry import trace
+
+        super().__init__(on_start=on_start, on_end=on_end)
+        self.trace = trace
+        self.tracer = trace.get_tracer("instagram") if tracer is None else tracer
+
+    def started(self, span):
+        context = None
+        if not span.parent is None and not span.parent.handle is None:
+            context = self.trace.set_span_in_context(span.parent.handle)
+        span.handle = self.tracer.start_span(span.name, context=context)
+        super().started(span)
+
+    def ended(self, span):
+        for key, value in span.attributes.items():
+            if not value is None:
+                span.handle.set_attribute(key, value)
+        if not span.error is None:
+            span.handle.record_exception(span.error)
+            span.handle.set_status(self.trace.Status(self.trace.StatusCode.ERROR))
+        span.handle.end()
+        super().ended(span)
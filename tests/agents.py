@@ -0,0 +1,393 @@
+import aiohttp
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from instagram.agents import (AsyncPagination, AsyncWebAgent, AsyncWebAgentAccount, WebAgent,
+                              WebAgentAccount, get_shared_data)
+from instagram.entities import Account, Location, Media, Tag
+from instagram.exceptions import InternetException, RetryPolicy
+from instagram.throttling import ConcurrencyController
+from itertools import islice
+import pytest
+from requests.adapters import HTTPAdapter
+from tests.mock_server import MockInstagram
+
+
+def setup_function():
+    Account.clear_cache()
+    Location.clear_cache()
+    Media.clear_cache()
+    Tag.clear_cache()
+    WebAgentAccount.clear_cache()
+    AsyncWebAgentAccount.clear_cache()
+
+
+@pytest.fixture(scope="module")
+def url():
+    with MockInstagram(total=50).run() as url:
+        yield url
+
+
+def test_root_url():
+    with pytest.raises(TypeError):
+        WebAgent(root_url=None)
+    assert WebAgent(root_url="http://localhost:8000/").root_url == "http://localhost:8000"
+
+
+def test_update(url):
+    agent = WebAgent(root_url=url)
+    account = Account("zuck")
+    agent.update(account)
+
+    assert not agent.csrf_token is None
+    assert not account.id is None
+    assert account.media_count == 50
+
+
+def test_get_media(url):
+    agent = WebAgent(root_url=url)
+    account = Account("zuck")
+    medias, pointer = agent.get_media(account, count=30, limit=12)
+
+    assert len(medias) == 30
+    assert all(media.owner is account for media in medias)
+    assert account.media == set(medias)
+
+    medias, pointer = agent.get_media(account, pointer=pointer, count=30)
+    assert len(medias) == 20
+    assert pointer is None
+
+
+def test_get_followers(url):
+    agent = WebAgentAccount("username", root_url=url)
+    agent.auth("password")
+    account = Account("zuck")
+    followers, pointer = agent.get_followers(account, count=25)
+
+    assert len(followers) == 25
+    assert len(account.followers) == 25
+
+
+def test_iter_media(url):
+    agent = WebAgent(root_url=url)
+    account = Account("zuck")
+    media = list(agent.iter_media(account, count=30, limit=12))
+    assert len(media) == 30
+    assert media == agent.get_media(account, count=30, limit=12)[0]
+
+    iterator = agent.iter_media(account, count=30, limit=12)
+    assert iterator.pointer is None
+    consumed = []
+    for item in iterator:
+        consumed.append(item)
+        if len(consumed) == 17:
+            break
+    assert iterator.page_pointer == "12"
+    assert iterator.offset == 5
+    assert iterator.pointer == "24"
+
+    # Iteration stopped in the middle of a page is resumed without skipped items
+    rest = agent.iter_media(account, pointer=iterator.page_pointer, count=18, limit=12)
+    assert consumed + list(islice(rest, iterator.offset, None)) == media
+
+
+def test_async_iter_media(url):
+    async def main():
+        agent = AsyncWebAgent(root_url=url)
+        try:
+            iterator = agent.iter_media(Account("zuck"), count=30, limit=12)
+            consumed = []
+            async for item in iterator:
+                consumed.append(item)
+                if len(consumed) == 12:
+                    break
+            # The last item of the page is consumed, the page after it is the next one
+            assert iterator.offset == 12
+            assert iterator.page_pointer is None
+            rest = agent.iter_media(Account("zuck"), pointer=iterator.pointer, count=18,
+                                    limit=12)
+            return consumed, [item async for item in rest]
+        finally:
+            await agent.delete()
+
+    consumed, rest = asyncio.run(main())
+    assert len(consumed + rest) == len(set(consumed + rest)) == 30
+
+
+def test_async_agent(url):
+    async def main():
+        agent = AsyncWebAgentAccount("username", root_url=url)
+        try:
+            await agent.auth("password")
+            medias, _ = await agent.get_media(Account("zuck"), count=20)
+            comments, _ = await agent.get_comments(medias[0], count=40)
+            feed, _ = await agent.feed(count=15)
+        finally:
+            await agent.delete()
+        return medias, comments, feed
+
+    medias, comments, feed = asyncio.run(main())
+    assert len(medias) == 20
+    assert len(comments) == 40
+    assert len(feed) == 15
+
+
+@pytest.mark.parametrize("text", [
+    '<script>window._sharedData = {"a": 1};</script>',
+    '<script>window._sharedData={"a": 1} ;\n</script><script>var b = {};</script>',
+    '<script>if (window._sharedData) {}</script><script>window._sharedData\n= {"a": 1};</script>',
+    '<script>window._sharedData.config = {};</script><script>window._sharedData = {"a": 1};'
+    '</script>',
+])
+def test_get_shared_data(text):
+    assert get_shared_data(text) == {"a": 1}
+
+
+@pytest.mark.parametrize("text", [
+    '<script>var data = {"a": 1};</script>',
+    '<script>window._sharedData.config = {"a": 1};</script>',
+    '<script>window._sharedData = {"a": 1}</script>',
+    '<script>window._sharedData = {"a": 1};',
+])
+def test_get_shared_data_errors(text):
+    with pytest.raises(ValueError):
+        get_shared_data(text)
+
+
+def test_errors():
+    with MockInstagram(error_rate=1).run() as url:
+        with pytest.raises(InternetException) as info:
+            WebAgent(root_url=url).update()
+    assert info.value.status == 500
+
+
+def test_rate_limit():
+    server = MockInstagram(rate_limit=1)
+    with server.run() as url:
+        agent = WebAgent(root_url=url)
+        agent.update()
+        with pytest.raises(InternetException) as info:
+            agent.update()
+    assert info.value.status == 429
+    assert RetryPolicy.get_retry_after(info.value) == 1
+    assert server.throttled == 1
+
+
+def test_page_loads_known_ids(url):
+    agent = WebAgent(root_url=url)
+    account = Account("zuck")
+    account.id = "1"
+    agent.get_media(account, count=20)
+    # Only the main page is loaded for the tokens, ids of media are decoded from their codes
+    agent.get_comments(Media("B"), count=20)
+    agent.get_likes(Media("C"), count=20)
+    assert agent.page_loads == 1
+
+
+def test_page_loads_ttl(url):
+    agent = WebAgent(root_url=url, token_ttl=0.1)
+    agent.get_likes(Media("B"), count=5)
+    agent.get_likes(Media("B"), count=5)
+    assert agent.page_loads == 1
+
+    agent.tokens_updated -= 1
+    agent.get_likes(Media("B"), count=5)
+    assert agent.page_loads == 2
+
+
+def test_concurrent_bootstrap(url):
+    async def main():
+        agent = AsyncWebAgent(root_url=url)
+        try:
+            await asyncio.gather(*(agent.get_likes(Media("B%d" % index), count=5)
+                                   for index in range(10)))
+            return agent.page_loads
+        finally:
+            await agent.delete()
+
+    assert asyncio.run(main()) == 1
+
+
+def test_threaded_bootstrap(url):
+    agent = WebAgent(root_url=url)
+    with ThreadPoolExecutor(10) as executor:
+        list(executor.map(lambda index: agent.get_likes(Media("B%d" % index), count=5), range(10)))
+    assert agent.page_loads == 1
+
+
+def test_async_connections_released():
+    async def main(url):
+        agent = AsyncWebAgent(root_url=url, limit=10)
+        try:
+            # Leaked connections would block the requests after the first 10 errors
+            errors = 0
+            for _ in range(500):
+                try:
+                    await asyncio.wait_for(agent.get_request(url + "/"), 5)
+                except InternetException as exception:
+                    assert exception.status == 500
+                    assert exception.response.status == 500
+                    assert await exception.response.json() == {"status": "fail"}
+                    errors += 1
+            return errors, len(agent.session.connector._acquired)
+        finally:
+            await agent.delete()
+
+    server = MockInstagram(error_rate=0.5)
+    with server.run() as url:
+        errors, acquired = asyncio.run(main(url))
+    assert errors == server.errors > 0
+    assert acquired == 0
+
+
+def test_stream_request():
+    controller = ConcurrencyController(window=2, max_window=2, latency_factor=None)
+
+    async def main(url):
+        agent = AsyncWebAgent(root_url=url, concurrency=controller)
+        try:
+            async with agent.stream_request(url + "/zuck") as response:
+                assert controller.in_flight == 1
+                body = b"".join([chunk async for chunk in response.content.iter_chunked(1024)])
+            assert controller.in_flight == 0
+            assert b"window._sharedData" in body
+
+            server.error_rate = 1
+            with pytest.raises(InternetException) as info:
+                async with agent.stream_request(url + "/zuck"):
+                    pass
+            assert info.value.response.status == 500
+            return len(agent.session.connector._acquired)
+        finally:
+            await agent.delete()
+
+    server = MockInstagram()
+    with server.run() as url:
+        assert asyncio.run(main(url)) == 0
+    assert controller.in_flight == 0
+    assert controller.failures == 1
+
+
+def pages(total, size, fail=None, requested=None, cancelled=None, wait=None):
+    # Fetch function for paginate with pages of numbers, pointer is the first number of the page
+    async def fetch(pointer, first):
+        start = int(pointer or 0)
+        if not requested is None:
+            requested.append((start, first))
+        if start == fail:
+            raise ValueError("Page %d" % start)
+        if not wait is None and start > 0:
+            try:
+                await wait.wait()
+            except asyncio.CancelledError:
+                cancelled.append(start)
+                raise
+        end = min(start + min(first, size), total)
+        return {
+            "edges": list(range(start, end)),
+            "page_info": {"has_next_page": end < total, "end_cursor": str(end)},
+        }, "url"
+
+    return fetch
+
+
+def parse_numbers(data, count):
+    return data["edges"][:count]
+
+
+def test_prefetch_count():
+    async def main(count, prefetch):
+        agent = AsyncWebAgent()
+        requested = []
+        try:
+            items = []
+            async for page, _ in agent.paginate(pages(100, 10, requested=requested),
+                                                parse_numbers, count=count, limit=10,
+                                                prefetch=prefetch):
+                items.extend(page)
+            return items, requested
+        finally:
+            await agent.delete()
+
+    items, requested = asyncio.run(main(25, 2))
+    assert items == list(range(25))
+    # Prefetched requests never ask for more items than the count
+    assert requested == [(0, 10), (10, 10), (20, 5)]
+    assert asyncio.run(main(25, 0)) == (items, requested)
+    assert asyncio.run(main(None, 1))[0] == list(range(100))
+
+
+def test_prefetch_error():
+    async def main():
+        agent = AsyncWebAgent()
+        items = []
+        try:
+            with pytest.raises(ValueError, match="Page 20"):
+                async for page, _ in agent.paginate(pages(100, 10, fail=20), parse_numbers,
+                                                    limit=10, prefetch=1):
+                    items.extend(page)
+        finally:
+            await agent.delete()
+        return items
+
+    assert asyncio.run(main()) == list(range(20))
+
+
+def test_prefetch_aclose():
+    async def main():
+        agent = AsyncWebAgent(prefetch=1)
+        requested = []
+        cancelled = []
+        try:
+            iterator = AsyncPagination(
+                agent.paginate(pages(100, 10, requested=requested, cancelled=cancelled,
+                                     wait=asyncio.Event()), parse_numbers, limit=10),
+            )
+            async for item in iterator:
+                break
+            # Request for the second page is sent while the first one is consumed
+            await asyncio.sleep(0)
+            assert requested == [(0, 10), (10, 10)]
+            await iterator.aclose()
+            return list(cancelled)
+        finally:
+            await agent.delete()
+
+    assert asyncio.run(main()) == [10]
+
+
+def test_shared_adapter(url):
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+    agents = [WebAgent(root_url=url, adapter=adapter) for _ in range(3)]
+    for agent in agents:
+        assert agent.session.get_adapter(url) is adapter
+        agent.update()
+
+    # Every agent used the same pool and its kept-alive connection
+    pools = adapter.poolmanager.pools
+    assert len(pools) == 1
+    pool = pools[next(iter(pools.keys()))]
+    assert pool.num_connections == 1
+    assert pool.num_requests == 3
+
+
+def test_shared_connector(url):
+    async def main():
+        connector = aiohttp.TCPConnector()
+        first = AsyncWebAgent(root_url=url, connector=connector)
+        second = AsyncWebAgent(root_url=url, connector=connector)
+        assert first.session.connector is second.session.connector is connector
+
+        await first.update()
+        await first.delete()
+        # Shared connector is closed by its owner, not by the agents
+        assert not connector.closed
+        await second.update()
+        await second.delete()
+        assert not connector.closed
+        await connector.close()
+
+        agent = AsyncWebAgent(root_url=url)
+        await agent.delete()
+        assert agent.session.connector is None or agent.session.connector.closed
+
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+import asyncio
+from instagram.agents import AsyncWebAgent, WebAgent, WebAgentAccount
+from instagram.cassette import Cassette
+from instagram.entities import Account, Media
+from instagram.exceptions import InternetException, NotRecordedRequest
+import json
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def setup_function():
+    Account.clear_cache()
+    Media.clear_cache()
+    WebAgentAccount.clear_cache()
+
+
+def test_cassette_mode():
+    with pytest.raises(ValueError):
+        Cassette(mode="unknown")
+
+
+def test_cassette_key():
+    assert Cassette.key("get", "https://www.instagram.com/graphql/query/", {"b": "1", "a": "2"}) \
+        == Cassette.key("GET", "http://127.0.0.1:8000/graphql/query/", {"a": "2", "b": "1"})
+
+
+def test_cassette_play_order():
+    cassette = Cassette()
+    for body in (b"first", b"second"):
+        cassette.record("GET", "http://host/", None, 200, "OK", "http://host/", {}, body)
+
+    assert cassette.play("GET", "http://host/").body == b"first"
+    assert cassette.play("GET", "http://host/").body == b"second"
+    assert cassette.play("GET", "http://host/").body == b"second"
+    cassette.rewind()
+    assert cassette.play("GET", "http://host/").body == b"first"
+    assert cassette.play("GET", "http://host/other") is None
+
+
+def test_cassette_content_addressed():
+    cassette = Cassette()
+    cassette.record("GET", "http://host/a", None, 200, "OK", "http://host/a", {}, b"body")
+    cassette.record("GET", "http://host/b", None, 200, "OK", "http://host/b", {}, b"body")
+
+    assert len(cassette) == 2
+    assert len(cassette.bodies) == 1
+
+
+def test_cassette_save(tmp_path):
+    path = str(tmp_path / "cassette")
+    with Cassette(path) as cassette:
+        cassette.record("GET", "http://host/", {"a": "1"}, 404, "Not Found", "http://host/",
+                        {"Content-Type": "text/html"}, b"\xff\xfe text")
+
+    cassette = Cassette(path, mode="replay")
+    record = cassette.play("GET", "http://host/", {"a": "1"})
+    assert record.status == 404
+    assert record.headers == {"Content-Type": "text/html"}
+    assert record.body == b"\xff\xfe text"
+    with pytest.raises(NotRecordedRequest):
+        cassette.play("GET", "http://host/")
+
+
+def test_cassette_cookies():
+    with MockInstagram(total=10).run() as url:
+        cassette = Cassette()
+        agent = WebAgentAccount("username", root_url=url, cassette=cassette)
+        agent.auth("password")
+    assert agent.session.cookies.get("sessionid") == "sessionid"
+
+    key = Cassette.key("POST", url + "/accounts/login/ajax/")
+    headers = cassette.interactions[key][0][3]
+    assert "Content-Type" in headers
+    assert not any(name.lower() == "set-cookie" for name in headers)
+    assert not "sessionid" in json.dumps(cassette.interactions)
+
+
+def test_replay():
+    cassette = Cassette()
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgent(root_url=url, cassette=cassette)
+        medias, _ = agent.get_media(Account("zuck"), count=30)
+    codes = [media.code for media in medias]
+    requests = len(cassette)
+
+    # The server is closed, all responses are replayed
+    Account.clear_cache()
+    Media.clear_cache()
+    cassette.mode = "replay"
+    cassette.rewind()
+    agent = WebAgent(root_url=url, cassette=cassette)
+    medias, _ = agent.get_media(Account("zuck"), count=30)
+    assert [media.code for media in medias] == codes
+    assert len(cassette) == requests
+
+    async def main():
+        agent = AsyncWebAgent(root_url=url, cassette=cassette)
+        try:
+            return await agent.get_media(Account("zuck"), count=30)
+        finally:
+            await agent.delete()
+
+    Account.clear_cache()
+    Media.clear_cache()
+    cassette.rewind()
+    assert [media.code for media in asyncio.run(main())[0]] == codes
+
+
+def test_replay_error():
+    cassette = Cassette()
+    with MockInstagram(error_rate=1).run() as url:
+        with pytest.raises(InternetException):
+            WebAgent(root_url=url, cassette=cassette).update()
+    cassette.mode = "replay"
+
+    with pytest.raises(InternetException) as info:
+        WebAgent(root_url=url, cassette=cassette).update()
+    assert info.value.status == 500
+
+    async def main():
+        agent = AsyncWebAgent(root_url=url, cassette=cassette)
+        try:
+            await agent.update()
+        finally:
+            await agent.delete()
+
+    with pytest.raises(InternetException) as info:
+        asyncio.run(main())
+    assert info.value.status == 500
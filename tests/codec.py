@@ -0,0 +1,27 @@
+from instagram.codec import JSON_BACKENDS, available_json_backends, get_json_loads
+import json
+import pytest
+
+
+def test_default_backend():
+    assert get_json_loads() is get_json_loads(available_json_backends()[0])
+
+
+@pytest.mark.parametrize("backend", available_json_backends())
+def test_backend(backend):
+    loads = get_json_loads(backend)
+    data = {"data": {"user": {"id": "1", "edges": [{"node": {"text": "при"}}]}}}
+
+    assert loads(json.dumps(data)) == data
+    assert loads(json.dumps(data).encode("utf-8")) == data
+    with pytest.raises(ValueError):
+        loads(b"<html>")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_json_loads("yaml")
+    for backend in JSON_BACKENDS:
+        if not backend in available_json_backends():
+            with pytest.raises(ImportError):
+                get_json_loads(backend)
@@ -1,7 +1,12 @@
-from instagram.entities import Account, Comment, Location, Media, Story, Tag
+from instagram.entities import (Account, Comment, ElementCache, Location, Media, Relation, Story,
+                                Tag, WeakElementCache)
+from instagram.exceptions import NotUpdatedElement
+from os.path import abspath, dirname
 import pytest
 from random import randint, choice
 from string import ascii_uppercase, ascii_lowercase, digits
+from subprocess import run
+from sys import executable
 
 
 def setup_function():
@@ -75,3 +80,351 @@ def test_clear_cache_story(id):
     
     Story.clear_cache()
     assert Story.cache == dict()
+
+
+def test_cache_max_size():
+    Account.set_cache(ElementCache(max_size=2))
+    try:
+        Account("first")
+        Account("second")
+        Account("third")
+        assert list(Account.cache) == ["second", "third"]
+        assert Account.cache.stats()["evictions"] == 1
+    finally:
+        Account.set_cache(ElementCache())
+
+
+def test_cache_lru_order():
+    Media.set_cache(ElementCache(max_size=2))
+    try:
+        Media("first")
+        Media("second")
+        Media("first")
+        Media("third")
+        assert list(Media.cache) == ["first", "third"]
+        assert Media.cache.hits == 1
+        assert Media.cache.misses == 3
+    finally:
+        Media.set_cache(ElementCache())
+
+
+def test_cache_ttl():
+    Tag.set_cache(ElementCache(ttl=0))
+    try:
+        Tag("test")
+        Tag("other")
+        assert Tag.cache.evictions == 2
+        assert len(Tag.cache) <= 1
+    finally:
+        Tag.set_cache(ElementCache())
+
+
+def test_cache_evicted_identity():
+    Location.set_cache(ElementCache(max_size=1))
+    try:
+        location = Location("first")
+        Location("second")
+        assert not "first" in Location.cache
+        assert Location("first") is location
+    finally:
+        Location.set_cache(ElementCache())
+
+
+def test_weak_cache():
+    Media.set_cache(WeakElementCache())
+    try:
+        media = Media("test")
+        assert Media("test") is media
+        assert "test" in Media.cache
+
+        del media
+        assert not "test" in Media.cache
+    finally:
+        Media.set_cache(ElementCache())
+
+
+def test_delete_keeps_new_element():
+    old = Account("test")
+    Account.clear_cache()
+    new = Account("test")
+
+    del old
+    assert Account.cache == {"test": new}
+
+
+def test_compact_account():
+    Account.set_compact()
+    try:
+        account = Account("test")
+        assert isinstance(account, Account)
+        assert not hasattr(account, "__dict__")
+        assert Account("test") is account
+        assert not hasattr(account, "_followers")
+
+        follower = Account("follower")
+        follower.id = "1"
+        account.followers.add(follower)
+        assert len(account.followers) == 1
+    finally:
+        Account.set_compact(False)
+        Account.clear_cache()
+
+
+def test_compact_media():
+    Media.set_compact()
+    try:
+        media = Media("test")
+        assert isinstance(media, Media)
+        assert media.code == "test"
+        assert media.likes == set()
+        assert Media.cache == {"test": media}
+    finally:
+        Media.set_compact(False)
+        Media.clear_cache()
+
+
+def test_cache_hits():
+    Account.set_cache(ElementCache())
+    account = Account("test")
+    assert Account("test") is account
+    assert Account.cache.stats()["hits"] == 1
+    assert Account.cache.stats()["misses"] == 1
+
+    Media.set_cache(WeakElementCache())
+    try:
+        media = Media("test")
+        assert Media("test") is media
+        assert Media.cache.stats()["hits"] == 1
+    finally:
+        Media.set_cache(ElementCache())
+
+
+def test_compact_hooks():
+    # Other tests enable compact elements, the default state is checked in a new interpreter
+    script = "\n".join((
+        "from instagram.entities import Account, ElementConstructor",
+        "assert not '__instancecheck__' in ElementConstructor.__dict__",
+        "assert isinstance(Account('test'), Account)",
+        "Account.set_compact()",
+        "assert '__instancecheck__' in ElementConstructor.__dict__",
+        "assert isinstance(Account('compact'), Account)",
+    ))
+    run([executable, "-c", script], check=True, cwd=dirname(dirname(abspath(__file__))))
+
+
+def account(username, id):
+    account = Account(username)
+    account.id = str(id)
+    return account
+
+
+def test_relation():
+    relation = Relation([account("first", 2), account("second", 1), account("first", 2)])
+
+    assert len(relation) == 2
+    assert list(relation.ids) == [1, 2]
+    assert account("first", 2) in relation
+    assert not account("third", 3) in relation
+    assert set(relation) == {Account("first"), Account("second")}
+
+    relation.discard(Account("first"))
+    assert list(relation) == [Account("second")]
+
+
+def test_relation_materialize():
+    relation = Relation([account("test", 1)])
+    Account.clear_cache()
+
+    test = list(relation)[0]
+    assert test.username == "test"
+    assert test.id == "1"
+
+
+def test_relation_operations():
+    first = Relation([account("a", 1), account("b", 2), account("c", 3)])
+    second = Relation([account("b", 2), account("c", 3), account("d", 4)])
+
+    assert list((first & second).ids) == [2, 3]
+    assert list((first | second).ids) == [1, 2, 3, 4]
+    assert list((first - second).ids) == [1]
+
+
+def test_relation_pending():
+    relation = Relation([account("a", 1), account("c", 3)])
+    relation.compact()
+    relation.add(account("b", 2))
+    # Pending ids are found without compaction
+    assert account("b", 2) in relation
+    assert relation.pending == {2}
+    relation.add(account("a", 1))
+    assert list(relation.ids) == [1, 3]
+    assert len(relation) == 3 and list(relation.ids) == [1, 2, 3]
+
+    relation.add(account("d", 4))
+    relation.discard(account("d", 4))
+    relation.discard(account("a", 1))
+    assert list(relation.ids) == [2, 3]
+    with pytest.raises(KeyError):
+        relation.remove(account("d", 4))
+
+
+def test_relation_operations_sizes():
+    first = Relation(account("a%d" % id, id) for id in range(0, 1000, 2))
+    second = Relation(account("a%d" % id, id) for id in range(0, 1000, 3))
+
+    assert list((first & second).ids) == list(range(0, 1000, 6))
+    assert list((first | second).ids) == sorted(set(range(0, 1000, 2)) | set(range(0, 1000, 3)))
+    assert list((first - second).ids) == sorted(set(range(0, 1000, 2)) - set(range(0, 1000, 3)))
+    assert (first - Relation()) == first and (Relation() & first) == Relation()
+
+
+def test_relation_names():
+    first = Relation([account("a", 1), account("b", 2)])
+    second = Relation([account("b", 2), account("c", 3)])
+    assert first.names == {1: "a", 2: "b"}
+    assert (first | second).names == {1: "a", 2: "b", 3: "c"}
+    assert (first & second).names == {2: "b"}
+
+    # Names belong to the relations, they are gone with them
+    first.clear()
+    assert first.names == {}
+    assert Relation().names == {}
+
+
+def test_relation_from_ids():
+    relation = Relation.from_ids([3, 1, 3], {1: "a", 3: "c", 5: "e"})
+    assert list(relation.ids) == [1, 3]
+    assert relation.names == {1: "a", 3: "c"}
+    assert relation == {Account("a"), Account("c")}
+    assert repr(relation) == "Relation([a, c])"
+
+    with pytest.raises(ValueError):
+        Relation.from_ids([1, 2], {1: "a"})
+
+
+def test_relation_sets():
+    relation = Relation([account("a", 1), account("b", 2)])
+    other = {account("b", 2), account("c", 3)}
+
+    assert relation | other == {Account("a"), Account("b"), Account("c")}
+    assert other | relation == {Account("a"), Account("b"), Account("c")}
+    assert relation & other == other & relation == {Account("b")}
+    assert relation - other == {Account("a")}
+    assert other - relation == {Account("c")}
+    assert relation.union([account("d", 4)]) == {Account("a"), Account("b"), Account("d")}
+    with pytest.raises(TypeError):
+        relation | 1
+
+
+def test_relation_without_id():
+    with pytest.raises(NotUpdatedElement):
+        Relation().add(Account("test"))
+
+
+@pytest.mark.parametrize("code,id", [("A", "0"), ("_", "63"), ("BA", "64"),
+                                     ("BfYoSZ8FPjA", "1718300444504422592")])
+def test_media_code_to_id(code, id):
+    assert Media.code_to_id(code) == id
+
+
+def test_media_code_to_id_private():
+    assert Media.code_to_id("BfYoSZ8FPjAj3xZ8HhLCp1TTsmCwNKD0UfUjZY0") is None
+
+
+def media_node(code):
+    return {
+        "__typename": "GraphSidecar",
+        "id": "1",
+        "shortcode": code,
+        "edge_media_to_caption": {"edges": [{"node": {"text": "caption"}}]},
+        "owner": {"id": "2", "username": "owner"},
+        "taken_at_timestamp": 1500000000,
+        "edge_media_preview_like": {"count": 10},
+        "edge_media_to_comment": {"count": 5},
+        "comments_disabled": False,
+        "is_video": False,
+        "display_url": "url",
+        "thumbnail_resources": [{"src": "small"}, {"src": "big"}],
+        "edge_sidecar_to_children": {"edges": [{"node": {"shortcode": code + "child"}}]},
+    }
+
+
+def test_media_set_data():
+    media = Media("test")
+    media.set_data(media_node("test"))
+    assert media.id == "1"
+    assert media.caption == "caption"
+    assert media.owner is Account("owner")
+    assert media.location is None
+    assert media.comments_count == 5
+    assert media.resources == ["small", "big"]
+    assert media.is_album
+    assert media.album == {Media("testchild")}
+    assert media.node is None
+
+
+def test_media_set_data_keeps_known_values():
+    # Nodes of tag and location media have no username of the owner, location and is_ad
+    node = media_node("test")
+    node["owner"] = {"id": "5"}
+    media = Media("test")
+    media.owner = Account("zuck")
+    media.location = Location("7")
+    media.is_ad = False
+    media.set_data(node)
+    assert media.owner is Account("zuck")
+    assert media.location is Location("7")
+    assert media.is_ad is False
+    assert media.video_url is None
+
+    media.set_data(node, fields=("owner", "location"))
+    assert media.owner is Account("zuck")
+    assert media.location is Location("7")
+
+    media.set_lazy(node)
+    assert media.owner is Account("zuck")
+    assert media.location is Location("7")
+    assert media.is_ad is False
+
+
+def test_media_set_data_fields():
+    media = Media("test")
+    media.set_data(media_node("test"), fields=("id", "likes_count"))
+    assert media.id == "1"
+    assert media.likes_count == 10
+    assert media.caption is None
+    assert media.album == set()
+    assert Media.cache.lookup("testchild") is None
+    assert Account.cache.lookup("owner") is None
+
+
+def test_media_set_lazy():
+    media = Media("test")
+    media.set_lazy(media_node("test"))
+    assert not "caption" in media.__dict__
+    assert Account.cache.lookup("owner") is None
+    assert media.caption == "caption"
+    assert "caption" in media.__dict__
+    assert media.owner is Account("owner")
+    assert media.album == {Media("testchild")}
+    assert media.video_url is None
+    assert media.location is None
+    with pytest.raises(AttributeError):
+        media.unknown
+
+
+def test_compact_media_set_lazy():
+    Media.set_compact()
+    try:
+        media = Media("test")
+        media.set_lazy(media_node("test"))
+        assert media.id == "1"
+        assert media.album == {Media("testchild")}
+        assert media.likes == set()
+
+        media.set_data(media_node("test"))
+        assert media.node is None
+        assert media.resources == ["small", "big"]
+    finally:
+        Media.set_compact(False)
+        Media.clear_cache()
@@ -0,0 +1,113 @@
+from instagram.agents import WebAgent, WebAgentAccount
+from instagram.entities import Account, Media
+from instagram.events import EventLog
+from instagram.exceptions import UnexpectedResponse
+import logging
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def get_logger(name, level):
+    logger = logging.getLogger("tests.events." + name)
+    logger.setLevel(level)
+    return logger
+
+
+def setup_function():
+    Account.clear_cache()
+    Media.clear_cache()
+    WebAgentAccount.clear_cache()
+
+
+def test_levels():
+    log = EventLog(get_logger("levels", logging.WARNING), pages=True)
+    assert not log.info and log.error and not log.debug
+    log.logger.setLevel(logging.DEBUG)
+    log.refresh()
+    assert log.info and log.error and log.debug
+    assert not EventLog(log.logger).debug
+
+    log = EventLog()
+    assert not log.info and not log.error and not log.debug
+    log.started("Update", Account("zuck"))
+    log.failed("Update", Account("zuck"), ValueError())
+
+    with pytest.raises(TypeError):
+        EventLog(pages=1)
+
+
+def test_lazy_formatting():
+    class Target:
+        formatted = 0
+
+        def __str__(self):
+            Target.formatted += 1
+            return "target"
+
+    log = EventLog(get_logger("lazy", logging.ERROR))
+    log.started("Update", Target())
+    log.succeeded("Update", Target())
+    assert Target.formatted == 0
+
+
+def test_disabled_logger():
+    logger = get_logger("disabled", logging.WARNING)
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgent(root_url=url, logger=logger, log_pages=True)
+        # Levels are checked only when the agent is created
+        logger.isEnabledFor = None
+        media, _ = agent.get_media(Account("zuck"), count=30, limit=12)
+    del logger.isEnabledFor
+    assert len(media) == 30
+
+
+def test_agent(caplog):
+    logger = get_logger("agent", logging.DEBUG)
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgent(root_url=url, logger=logger, log_pages=True)
+        agent.get_media(Account("zuck"), count=30, limit=12)
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0] == "Get media 'zuck' started"
+    assert messages[-1] == "Get media 'zuck' was successful"
+    assert "Update 'zuck' was successful" in messages
+    pages = [message for message in messages if message.startswith("Page of")]
+    assert pages == [
+        "Page of 12 items parsed, end cursor: 12",
+        "Page of 12 items parsed, end cursor: 24",
+        "Page of 6 items parsed, end cursor: None",
+    ]
+
+
+def test_no_page_messages(caplog):
+    logger = get_logger("pages", logging.DEBUG)
+    with MockInstagram(total=30).run() as url:
+        WebAgent(root_url=url, logger=logger).get_media(Account("zuck"), count=30)
+    assert not any(record.levelno == logging.DEBUG for record in caplog.records)
+
+
+def test_account(caplog):
+    logger = get_logger("failed", logging.INFO)
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgentAccount("username", root_url=url, logger=logger)
+        agent.auth("password")
+        assert agent.like(Media("B"))
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[:2] == ["Auth started", "Update 'username' started"]
+    assert "Like 'B' was successful" in messages
+
+
+def test_account_unexpected_response(caplog):
+    logger = get_logger("unexpected", logging.INFO)
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgentAccount("username", root_url=url, logger=logger)
+        agent.auth("password")
+        agent.loads = lambda content: {}
+        for action in (agent.like, agent.save):
+            with pytest.raises(UnexpectedResponse):
+                action(Media("B"))
+    messages = [record.getMessage() for record in caplog.records]
+    assert not "Like 'B' was successful" in messages
+    assert not "Save 'B' was successful" in messages
+    assert "Like 'B' was unsuccessful: 'status'" in messages
+    assert "Save 'B' was unsuccessful: 'status'" in messages
@@ -0,0 +1,161 @@
+import asyncio
+from email.utils import formatdate
+from instagram.exceptions import (ExceptionManager, InstagramException, InternetException,
+                                  RetryPolicy, UnexpectedResponse)
+import pytest
+from requests import Request, Response
+from requests.exceptions import HTTPError
+from time import time
+
+
+def http_error(status, headers=None):
+    response = Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    return HTTPError(request=Request("GET", "https://www.instagram.com/").prepare(),
+                     response=response)
+
+
+class Agent:
+    def __init__(self, fails):
+        self.fails = fails
+        self.calls = 0
+
+
+def test_sync_repeats():
+    manager = ExceptionManager(repeats=3)
+
+    @manager.decorator
+    def request(agent):
+        agent.calls += 1
+        if agent.calls <= agent.fails:
+            raise InstagramException()
+        return agent.calls
+
+    assert request(Agent(2)) == 3
+    with pytest.raises(InstagramException):
+        request(Agent(3))
+
+
+def test_async_repeats():
+    manager = ExceptionManager(repeats=3)
+
+    @manager.decorator
+    async def request(agent):
+        agent.calls += 1
+        if agent.calls <= agent.fails:
+            raise InstagramException()
+        return agent.calls
+
+    assert asyncio.iscoroutinefunction(request)
+    assert asyncio.run(request(Agent(2))) == 3
+    agent = Agent(3)
+    with pytest.raises(InstagramException):
+        asyncio.run(request(agent))
+    assert agent.calls == 3
+
+
+def test_async_action():
+    manager = ExceptionManager(repeats=2)
+    handled = []
+
+    async def action(exception, *args, **kwargs):
+        handled.append(exception)
+        return args, {"value": 1}
+
+    manager[UnexpectedResponse] = action
+
+    @manager.decorator
+    async def request(agent, value=0):
+        agent.calls += 1
+        if value == 0:
+            raise UnexpectedResponse(ValueError(), "url")
+        return value
+
+    assert asyncio.run(request(Agent(0))) == 1
+    assert len(handled) == 1
+
+
+def test_async_delay_does_not_block_loop():
+    manager = ExceptionManager(repeats=3, delay=0.05)
+    ticks = []
+
+    @manager.decorator
+    async def request(agent):
+        agent.calls += 1
+        if agent.calls <= agent.fails:
+            raise InstagramException()
+        return agent.calls
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(None)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        return await asyncio.gather(request(Agent(2)), ticker())
+
+    assert asyncio.run(main())[0] == 3
+    assert len(ticks) == 5
+
+
+def test_policy_backoff():
+    policy = RetryPolicy(delay=1, multiplier=2, max_delay=5, jitter=False)
+
+    assert [policy.backoff(attempt) for attempt in range(5)] == [1, 2, 4, 5, 5]
+
+
+def test_policy_jitter():
+    policy = RetryPolicy(delay=1, multiplier=2)
+
+    for _ in range(100):
+        assert 0 <= policy.backoff(3) <= 8
+
+
+@pytest.mark.parametrize("value", ["7", formatdate(time() + 7, usegmt=True)])
+def test_policy_retry_after(value):
+    policy = RetryPolicy(delay=1, jitter=False)
+    exception = InternetException(http_error(429, {"Retry-After": value}))
+
+    assert exception.status == 429
+    assert 5 < policy.backoff(0, exception) <= 7
+
+
+def test_policy_max_elapsed():
+    policy = RetryPolicy(delay=1, jitter=False, max_elapsed=2)
+
+    assert policy.backoff(0, elapsed=0) == 1
+    assert policy.backoff(1, elapsed=1) is None
+
+
+def test_manager_policy():
+    manager = ExceptionManager(repeats=5)
+    policy = RetryPolicy(delay=0.01, jitter=False, max_elapsed=0.02)
+    manager.set_policy(InternetException, policy)
+
+    assert manager.get_policy(InternetException) is policy
+    assert manager.get_policy(InstagramException) is None
+
+    @manager.decorator
+    def request(agent):
+        agent.calls += 1
+        raise InternetException(http_error(500))
+
+    agent = Agent(0)
+    with pytest.raises(InternetException):
+        request(agent)
+    assert agent.calls == 2
+
+
+def test_search_cache():
+    manager = ExceptionManager()
+    first = lambda exception, *args, **kwargs: (args, kwargs)
+    second = lambda exception, *args, **kwargs: (args, kwargs)
+    manager[InstagramException] = first
+
+    assert manager[UnexpectedResponse] is first
+    assert UnexpectedResponse in manager.search_cache
+
+    manager[UnexpectedResponse] = second
+    assert manager[UnexpectedResponse] is second
+    assert manager[InternetException] is first
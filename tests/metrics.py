@@ -0,0 +1,96 @@
+import asyncio
+from instagram.agents import AsyncWebAgent, WebAgent
+from instagram.entities import Account, Media
+from instagram.exceptions import InternetException
+from instagram.metrics import Metrics, get_operation, get_size
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def setup_function():
+    Account.clear_cache()
+    Media.clear_cache()
+
+
+@pytest.mark.parametrize("url,params,operation", [
+    ("https://www.instagram.com/graphql/query/",
+     {"query_hash": "37479f2b8209594dde7facb0d904896a"}, "followers"),
+    ("https://www.instagram.com/graphql/query/", {"query_hash": "unknown"}, "graphql"),
+    ("https://www.instagram.com/web/likes/1/like/", None, "likes/like"),
+    ("https://www.instagram.com/web/comments/1/delete/2/", None, "comments/delete"),
+    ("https://www.instagram.com/accounts/login/ajax/", None, "login"),
+    ("https://www.instagram.com/zuck", None, "page"),
+])
+def test_get_operation(url, params, operation):
+    assert get_operation(url, params) == operation
+
+
+def test_get_size():
+    assert get_size(None) == 0
+    assert get_size({"a": "1", "b": "2"}) == len("a=1&b=2")
+    assert get_size(b"body") == 4
+
+
+def test_histogram():
+    metrics = Metrics(buckets=(0.1, 1))
+    for latency in (0.05, 0.1, 0.5, 2):
+        metrics.observe("media", "GET", 200, 0, 10, latency)
+    metrics.observe("media", "GET", None, 0, 0, 0)
+
+    text = metrics.prometheus()
+    assert 'instagram_requests_total{operation="media",method="GET",status="200"} 4' in text
+    assert 'instagram_requests_total{operation="media",method="GET",status="error"} 1' in text
+    assert 'instagram_received_bytes_total{operation="media"} 40' in text
+    assert 'instagram_request_duration_seconds_bucket{operation="media",le="0.1"} 3' in text
+    assert 'instagram_request_duration_seconds_bucket{operation="media",le="1"} 4' in text
+    assert 'instagram_request_duration_seconds_bucket{operation="media",le="+Inf"} 5' in text
+    assert 'instagram_request_duration_seconds_count{operation="media"} 5' in text
+
+    metrics.clear()
+    assert metrics.stats() == {}
+
+
+def test_agents():
+    metrics = Metrics()
+    with MockInstagram(total=30).run() as url:
+        WebAgent(root_url=url, metrics=metrics).get_media(Account("zuck"), count=30)
+        Account.clear_cache()
+
+        async def main():
+            agent = AsyncWebAgent(root_url=url, metrics=metrics)
+            try:
+                await agent.get_media(Account("zuck"), count=30)
+            finally:
+                await agent.delete()
+
+        asyncio.run(main())
+
+    stats = metrics.stats()
+    # Profile page with the first media and a GraphQL page with the rest for each agent
+    assert stats["page"]["requests"] == 2
+    assert stats["media"]["requests"] == 2
+    assert stats["media"]["statuses"] == {"200": 2}
+    assert stats["media"]["received"] > 0
+
+
+def test_errors():
+    metrics = Metrics()
+    with MockInstagram(error_rate=1).run() as url:
+        with pytest.raises(InternetException):
+            WebAgent(root_url=url, metrics=metrics).update()
+    assert metrics.stats()["page"]["statuses"] == {"500": 1}
+
+
+def test_sink():
+    class Sink(Metrics):
+        def __init__(self):
+            super().__init__()
+            self.events = []
+
+        def observe(self, operation, method, status, sent, received, latency):
+            self.events.append((operation, method, status))
+
+    sink = Sink()
+    with MockInstagram().run() as url:
+        WebAgent(root_url=url, metrics=sink).update()
+    assert sink.events == [("page", "GET", 200)]
@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+from aiohttp import web
+from contextlib import contextmanager
+import json
+from random import Random
+import threading
+from time import monotonic
+from zlib import crc32
+
+
+CODE_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"
+
+# query_hash -> (root of the response data, edge of the root with the list)
+QUERIES = {
+    "c6809c9c025875ac6f02619eae97a80e": ("user", "edge_owner_to_timeline_media"),
+    "ac38b90f0f3981c42092016a37c59bf7": ("location", "edge_location_to_media"),
+    "ded47faa9a1aaded10161a2ff32abb6b": ("hashtag", "edge_hashtag_to_media"),
+    "1cb6ec562846122743b61e492c85999f": ("shortcode_media", "edge_liked_by"),
+    "f0986789a5c5d17c2400faebf16efd0d": ("shortcode_media", "edge_media_to_comment"),
+    "58712303d941c6855d4e888c5f0cd22f": ("user", "edge_follow"),
+    "37479f2b8209594dde7facb0d904896a": ("user", "edge_followed_by"),
+    "485c25657308f08317c1e4b967356828": ("user", "edge_web_feed_timeline"),
+}
+STORIES_QUERY = "60b755363b5c230111347a7a4e242001"
+
+
+def media_code(id):
+    code = ""
+    id = int(id)
+    while id:
+        code = CODE_ALPHABET[id % 64] + code
+        id //= 64
+    return code or CODE_ALPHABET[0]
+
+
+def media_id(code):
+    result = 0
+    for char in code:
+        result = result * 64 + max(CODE_ALPHABET.find(char), 0)
+    return result
+
+
+def account_id(username):
+    return crc32(username.encode()) + 1
+
+
+def account_node(index):
+    username = "user%d" % index
+    return {
+        "id": str(account_id(username)),
+        "username": username,
+        "full_name": "User %d" % index,
+        "profile_pic_url": "https://scontent.cdninstagram.com/%d.jpg" % index,
+        "is_verified": index % 10 == 0,
+    }
+
+
+def media_node(index, owner="user0"):
+    id = 1800000000000000000 + index
+    return {
+        "__typename": "GraphImage",
+        "id": str(id),
+        "shortcode": media_code(id),
+        "edge_media_to_caption": {"edges": [{"node": {"text": "Caption %d" % index}}]},
+        "owner": {"id": str(account_id(owner)), "username": owner},
+        "taken_at_timestamp": 1500000000 + index,
+        "edge_media_preview_like": {"count": index * 10},
+        "edge_liked_by": {"count": index * 10},
+        "edge_media_to_comment": {"count": index},
+        "comments_disabled": False,
+        "is_video": False,
+        "display_url": "https://scontent.cdninstagram.com/%d.jpg" % id,
+        "thumbnail_resources": [
+            {"src": "https://scontent.cdninstagram.com/%d_%d.jpg" % (id, size),
+             "config_width": size, "config_height": size}
+            for size in (150, 240, 320, 480, 640)
+        ],
+    }
+
+
+def comment_node(index):
+    return {
+        "id": str(17800000000000000 + index),
+        "owner": {"id": str(account_id("user%d" % index)), "username": "user%d" % index},
+        "text": "Comment %d" % index,
+        "created_at": 1500000000 + index,
+    }
+
+
+class MockInstagram:
+    # Stand-in for instagram.com which serves pages with _sharedData and GraphQL responses for
+    # every query_hash of the agents. Every list (media, followers, comments, ...) has `total`
+    # items, so the same workload always makes the same requests
+    def __init__(self, total=1000, latency=0, error_rate=0, rate_limit=None, seed=0,
+                 pages=None):
+        if not isinstance(total, int):
+            raise TypeError("'total' must be int type")
+        if not isinstance(latency, (int, float, tuple)):
+            raise TypeError("'latency' must be int, float or tuple type")
+        if not isinstance(error_rate, (int, float)):
+            raise TypeError("'error_rate' must be int or float type")
+        if not isinstance(rate_limit, (int, float)) and not rate_limit is None:
+            raise TypeError("'rate_limit' must be int or float type or None")
+        if not isinstance(pages, dict) and not pages is None:
+            raise TypeError("'pages' must be dict type or None")
+
+        self.total = total
+        # Seconds or (min, max) range of seconds before every response
+        self.latency = latency
+        # Part of requests which fail with 500
+        self.error_rate = error_rate
+        # Requests per second, other requests get 429 with Retry-After
+        self.rate_limit = rate_limit
+        # Path -> recorded HTML page, served instead of the generated one
+        self.pages = dict() if pages is None else pages
+        self.random = Random(seed)
+        self.tokens = rate_limit
+        self.timestamp = monotonic()
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.runner = None
+
+    def application(self):
+        app = web.Application()
+        app.router.add_get("/graphql/query/", self.graphql)
+        app.router.add_post("/accounts/login/ajax/", self.login)
+        app.router.add_post("/web/{path:.*}", self.action)
+        app.router.add_get("/{path:.*}", self.page)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        self.runner = web.AppRunner(self.application())
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        host, port = self.runner.addresses[0][:2]
+        return "http://%s:%d" % (host, port)
+
+    async def close(self):
+        await self.runner.cleanup()
+        self.runner = None
+
+    @contextmanager
+    def run(self, host="127.0.0.1", port=0):
+        # Server works in its own thread with its own loop, so blocking agents can use it too
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            yield asyncio.run_coroutine_threadsafe(self.start(host, port), loop).result()
+        finally:
+            asyncio.run_coroutine_threadsafe(self.close(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    async def respond(self, body, content_type):
+        self.requests += 1
+        if isinstance(self.latency, tuple):
+            await asyncio.sleep(self.random.uniform(*self.latency))
+        elif self.latency:
+            await asyncio.sleep(self.latency)
+
+        if not self.rate_limit is None:
+            now = monotonic()
+            self.tokens = min(
+                self.rate_limit,
+                self.tokens + (now - self.timestamp) * self.rate_limit,
+            )
+            self.timestamp = now
+            if self.tokens < 1:
+                self.throttled += 1
+                return web.json_response(
+                    {"message": "Please wait a few minutes", "status": "fail"},
+                    status=429,
+                    headers={"Retry-After": "1"},
+                )
+            self.tokens -= 1
+        if self.error_rate and self.random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"status": "fail"}, status=500)
+
+        if content_type == "text/html":
+            return web.Response(text=body, content_type=content_type)
+        return web.json_response(body)
+
+    def shared_data(self, entry_data):
+        data = {
+            "config": {"csrf_token": "csrf_token", "viewer": None},
+            "rhx_gis": "rhx_gis",
+            "entry_data": entry_data,
+        }
+        return "<!DOCTYPE html><html><head><script type=\"text/javascript\">" \
+            "window._sharedData = %s;</script></head><body></body></html>" % json.dumps(data)
+
+    def edges(self, node, after=None, first=12):
+        start = int(after) if after else 0
+        end = min(start + first, self.total)
+        return {
+            "count": self.total,
+            "edges": [{"node": node(index)} for index in range(start, end)],
+            "page_info": {
+                "has_next_page": end < self.total,
+                "end_cursor": str(end) if end < self.total else None,
+            },
+        }
+
+    def user(self, username):
+        media = self.edges(lambda index: media_node(index, username))
+        return {
+            "id": str(account_id(username)),
+            "username": username,
+            "full_name": username.title(),
+            "profile_pic_url": "https://scontent.cdninstagram.com/%s.jpg" % username,
+            "profile_pic_url_hd": "https://scontent.cdninstagram.com/%s_hd.jpg" % username,
+            "connected_fb_page": None,
+            "biography": "Biography of %s" % username,
+            "edge_follow": {"count": self.total},
+            "edge_followed_by": {"count": self.total},
+            "edge_owner_to_timeline_media": media,
+            "is_private": False,
+            "is_verified": False,
+            "country_block": False,
+        }
+
+    async def page(self, request):
+        path = request.match_info["path"].strip("/")
+        if path in self.pages:
+            return await self.respond(self.pages[path], "text/html")
+
+        parts = path.split("/")
+        if not path:
+            entry_data = {}
+        elif parts[0] == "p":
+            node = media_node(media_id(parts[1]) - 1800000000000000000)
+            node["shortcode"] = parts[1]
+            node["edge_media_to_parent_comment"] = self.edges(comment_node)
+            del node["edge_media_to_comment"]
+            entry_data = {"PostPage": [{"graphql": {"shortcode_media": node}}]}
+        elif parts[:2] == ["explore", "tags"]:
+            entry_data = {"TagPage": [{"graphql": {"hashtag": {
+                "name": parts[2],
+                "edge_hashtag_to_media": self.edges(media_node),
+                "edge_hashtag_to_top_posts": self.edges(media_node, first=9),
+            }}}]}
+        elif parts[:2] == ["explore", "locations"]:
+            entry_data = {"LocationsPage": [{"graphql": {"location": {
+                "id": parts[2],
+                "slug": "location-%s" % parts[2],
+                "name": "Location %s" % parts[2],
+                "has_public_page": True,
+                "lat": 55.75,
+                "lng": 37.61,
+                "edge_location_to_media": self.edges(media_node),
+                "edge_location_to_top_posts": self.edges(media_node, first=9),
+            }}}]}
+        else:
+            entry_data = {"ProfilePage": [{"graphql": {"user": self.user(parts[0])}}]}
+        return await self.respond(self.shared_data(entry_data), "text/html")
+
+    async def graphql(self, request):
+        query_hash = request.query.get("query_hash")
+        try:
+            variables = json.loads(request.query.get("variables", "{}"))
+        except ValueError:
+            return web.json_response({"status": "fail"}, status=400)
+
+        if query_hash == STORIES_QUERY:
+            reels = {"edges": [{"node": {"id": str(account_id("user%d" % index))}}
+                               for index in range(min(self.total, 20))]}
+            data = {"user": {"feed_reels_tray": {"edge_reels_tray_to_reel": reels}}}
+        elif query_hash in QUERIES:
+            root, edge = QUERIES[query_hash]
+            after = variables.get("after", variables.get("fetch_media_item_cursor"))
+            first = variables.get("first", variables.get("fetch_media_item_count", 12))
+            if edge in ("edge_liked_by", "edge_follow", "edge_followed_by"):
+                node = account_node
+            elif edge == "edge_media_to_comment":
+                node = comment_node
+            else:
+                node = media_node
+            data = {root: {edge: self.edges(node, after, first)}}
+        else:
+            return web.json_response({"status": "fail"}, status=404)
+        return await self.respond({"data": data, "status": "ok"}, "application/json")
+
+    async def login(self, request):
+        response = await self.respond(
+            {"authenticated": True, "user": True, "status": "ok"},
+            "application/json",
+        )
+        if response.status == 200:
+            response.set_cookie("sessionid", "sessionid")
+        return response
+
+    async def action(self, request):
+        data = await request.post()
+        body = {"status": "ok"}
+        if request.match_info["path"].startswith("comments/") and "comment_text" in data:
+            body.update({
+                "id": str(17900000000000000 + self.requests),
+                "text": data["comment_text"],
+                "created_time": 1500000000,
+            })
+        return await self.respond(body, "application/json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for instagram.com")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--total", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=float, default=None)
+    args = parser.parse_args()
+
+    async def main():
+        server = MockInstagram(total=args.total, latency=args.latency, error_rate=args.error_rate,
+                               rate_limit=args.rate_limit)
+        print(await server.start(args.host, args.port), flush=True)
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
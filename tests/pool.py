@@ -0,0 +1,116 @@
+import asyncio
+from instagram.agents import AsyncWebAgentAccount
+from instagram.exceptions import InternetException
+from instagram.pool import SessionPool
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def throttled(retry_after=None):
+    exception = InternetException(ValueError("Too many requests"))
+    exception.status = 429
+    if not retry_after is None:
+        exception.headers = {"Retry-After": str(retry_after)}
+    return exception
+
+
+def test_pool_lru():
+    async def main():
+        pool = SessionPool()
+        for username in ("first", "second", "third"):
+            await pool.add(username, cookies={"sessionid": username})
+        assert all(agent.session.connector is pool.connector for agent in pool)
+
+        used = []
+        for _ in range(6):
+            async with pool.acquire() as agent:
+                used.append(agent.username)
+        await pool.close()
+        return used
+
+    assert asyncio.run(main()) == ["first", "second", "third"] * 2
+
+
+def test_pool_throttling():
+    async def main():
+        pool = SessionPool(strategy="throttled", cooldown=0.05)
+        for username in ("first", "second"):
+            await pool.add(username, cookies={"sessionid": username})
+
+        with pytest.raises(InternetException):
+            async with pool.acquire() as agent:
+                raise throttled()
+        assert pool.throttles["first"] == 1
+
+        # Throttled account is skipped until the cooldown ends
+        async with pool.acquire() as agent:
+            assert agent.username == "second"
+        async with pool.acquire() as agent:
+            assert agent.username == "second"
+        await asyncio.sleep(0.05)
+        async with pool.acquire() as agent:
+            assert agent.username == "second"
+
+        with pytest.raises(InternetException):
+            async with pool.acquire() as agent:
+                raise throttled()
+        async with pool.acquire() as agent:
+            assert agent.username == "first"
+        assert pool.throttles["first"] == 0
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_pool_retry_after():
+    async def main():
+        pool = SessionPool(cooldown=0)
+        await pool.add("first", cookies={"sessionid": "first"})
+
+        with pytest.raises(InternetException):
+            async with pool.acquire():
+                raise throttled(retry_after=0.05)
+        assert pool.pick() is None
+
+        async with pool.acquire() as agent:
+            assert agent.username == "first"
+        await pool.close()
+        assert AsyncWebAgentAccount.cache.get("first") is None
+
+    asyncio.run(main())
+
+
+def test_pool_existing_agent():
+    async def main():
+        agent = AsyncWebAgentAccount("existing")
+        pool = SessionPool()
+        try:
+            with pytest.raises(ValueError):
+                await pool.add("existing", cookies={"sessionid": "existing"})
+            assert len(pool) == 0
+        finally:
+            await pool.close()
+            await agent.delete()
+            AsyncWebAgentAccount.clear_cache()
+
+    asyncio.run(main())
+
+
+def test_pool_failed_auth():
+    async def main(url):
+        pool = SessionPool(root_url=url)
+        try:
+            with pytest.raises(InternetException):
+                await pool.add("failed", password="password")
+            assert AsyncWebAgentAccount.cache.get("failed") is None
+
+            server.error_rate = 0
+            agent = await pool.add("failed", password="password")
+            assert not agent.session.closed
+            assert agent.session.connector is pool.connector
+        finally:
+            await pool.close()
+
+    server = MockInstagram(error_rate=1)
+    with server.run() as url:
+        asyncio.run(main(url))
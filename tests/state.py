@@ -0,0 +1,68 @@
+import asyncio
+from instagram.agents import (AsyncWebAgentAccount, WebAgent, WebAgentAccount, dump_state,
+                              load_state)
+from instagram.pool import SessionPool
+import pytest
+
+
+def setup_function():
+    WebAgentAccount.clear_cache()
+    AsyncWebAgentAccount.clear_cache()
+
+
+def test_state():
+    agent = WebAgent()
+    agent.session.cookies.set("csrftoken", "token")
+    agent.csrf_token = "token"
+    agent.rhx_gis = "gis"
+
+    restored = WebAgent.from_state(agent.dump_state())
+    assert restored.get_state() == agent.get_state()
+    assert restored.session.cookies.get("csrftoken") == "token"
+
+
+def test_account_state():
+    agent = WebAgentAccount("username")
+    agent.session.cookies.set("sessionid", "session")
+    agent.csrf_token = "token"
+    agent.rhx_gis = "gis"
+    agent.id = "1"
+    state = agent.dump_state()
+    assert isinstance(state, bytes)
+    assert load_state(state)["username"] == "username"
+
+    # Running agent of the account is not overwritten
+    with pytest.raises(ValueError):
+        WebAgentAccount.from_state(state, root_url="http://127.0.0.1")
+    assert agent.root_url == "https://www.instagram.com"
+
+    WebAgentAccount.clear_cache()
+    restored = WebAgentAccount.from_state(state, root_url="http://127.0.0.1")
+    assert not restored is agent
+    assert restored.id == "1"
+    assert restored.root_url == "http://127.0.0.1"
+    assert restored.get_state() == agent.get_state()
+
+
+def test_async_account_state():
+    state = {"cookies": {"sessionid": "session"}, "csrf_token": "token", "rhx_gis": "gis",
+             "username": "username", "id": "1"}
+
+    async def main():
+        agent = AsyncWebAgentAccount.from_state(state)
+        result = agent.get_state()
+        await agent.delete()
+        AsyncWebAgentAccount.clear_cache()
+
+        pool = SessionPool()
+        try:
+            with pytest.raises(ValueError):
+                await pool.add("other", state=dump_state(state))
+            agent = await pool.add("username", state=dump_state(state))
+            return result, agent.get_state()
+        finally:
+            await pool.close()
+
+    result, restored = asyncio.run(main())
+    assert result == state
+    assert restored == state
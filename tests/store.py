@@ -0,0 +1,120 @@
+from instagram.agents import WebAgent
+from instagram.entities import Account, Media
+from instagram.store import AccountStore, MediaStore, StringTable
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def setup_function():
+    Account.clear_cache()
+    Media.clear_cache()
+
+
+def account_node(index):
+    return {
+        "id": str(index),
+        "username": "user%d" % index,
+        "full_name": "User %d" % index,
+        "profile_pic_url": "https://example.com/%d.jpg" % index,
+        "is_verified": index % 2 == 0,
+    }
+
+
+def test_string_table():
+    table = StringTable()
+    assert table.add("test") == 0
+    assert table.add("other") == 1
+    assert table.add("test") == 0
+    assert table.add(None) == -1
+    assert table[1] == "other"
+    assert table[-1] is None
+
+
+def test_account_store():
+    store = AccountStore()
+    for index in range(10):
+        store.append_node(account_node(index))
+
+    assert len(store) == 10
+    assert store[3].username == "user3"
+    assert store[3].id == 3
+    assert store[3].is_verified is False
+    assert store[3].followers_count is None
+    assert [row.username for row in store[8:]] == ["user8", "user9"]
+    with pytest.raises(AttributeError):
+        store[0].biography
+
+
+def test_store_where():
+    store = AccountStore()
+    for index in range(10):
+        store.append_node(account_node(index))
+
+    verified = store.where("is_verified", lambda value: value is True)
+    assert [row.id for row in verified] == [0, 2, 4, 6, 8]
+    assert [row.id for row in verified.where("id", lambda value: value > 4)] == [6, 8]
+    assert [row.id for row in store.where("username", lambda value: value == "user3")] == [3]
+    assert len(store.where("followers_count", lambda value: value is None)) == 10
+
+
+def test_store_where_strings():
+    store = MediaStore()
+    store.append(id="1", code="a", owner="first")
+    store.append(id="2", code="b")
+    store.append(id="3", code="c", owner="first")
+    calls = []
+
+    def predicate(value):
+        calls.append(value)
+        return value in ("first", None)
+
+    assert [row.code for row in store.where("owner", predicate)] == ["a", "b", "c"]
+    assert calls == ["first", None]
+
+
+def test_store_find():
+    store = MediaStore()
+    store.append(id="1", code="a")
+    store.append(id="2")
+    store.append(id="3", code="b")
+    store.append(id="4", code="a")
+
+    # The first row with the key is found
+    assert store.find("a").id == 1
+    assert store.find("b").id == 3
+    assert store.find("c") is None
+    assert store.find(None) is None
+
+
+def test_store_entity():
+    store = MediaStore()
+    store.append(id="10", code="test", owner="owner", likes_count=5)
+
+    media = store[0].entity()
+    assert media is Media("test")
+    assert media.id == "10"
+    assert media.likes_count == 5
+    assert media.owner is Account("owner")
+
+
+def test_agent_store():
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgent(root_url=url)
+        account = Account("zuck")
+        store = MediaStore()
+        rows, pointer = agent.get_media(account, count=30, store=store)
+
+        assert len(rows) == len(store) == 30
+        assert pointer is None
+        # Entities are not created for the rows, the relation of the owner is not filled
+        assert account.media == set()
+        assert Media.cache.lookup(rows[0].code) is None
+        media = rows[0].entity()
+        assert isinstance(media.id, str) and media.code_to_id(media.code) == media.id
+        assert media.owner is account
+
+        store = AccountStore()
+        rows, _ = agent.get_likes(media, count=20, store=store)
+        assert len(rows) == 20
+        assert isinstance(rows[0].entity().id, str)
+        assert media.likes == set()
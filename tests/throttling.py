@@ -0,0 +1,147 @@
+import asyncio
+from instagram.agents import AsyncWebAgent
+from instagram.throttling import ConcurrencyController, RateLimiter, TokenBucket
+import pytest
+from threading import Thread
+from tests.mock_server import MockInstagram
+from time import monotonic
+
+
+def test_bucket_burst():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_limiter_keys():
+    limiter = RateLimiter({"graphql": (10, 1), "graphql:abc": (1, 5), "action": 2})
+
+    assert limiter.bucket("page") is None
+    assert limiter.bucket("graphql:abc").rate == 1
+    assert limiter.bucket("graphql:def").rate == 10
+    assert not limiter.bucket("graphql:def") is limiter.bucket("graphql:xyz")
+    assert limiter.bucket("action").rate == 2
+    assert limiter.reserve("page") == 0
+
+    limiter.set_limit("page", 5)
+    assert limiter.bucket("page").rate == 5
+
+
+def test_limiter_threads():
+    limiter = RateLimiter({"page": (100, 1)})
+    start = monotonic()
+
+    def worker():
+        for _ in range(5):
+            limiter.acquire("page")
+
+    threads = [Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert monotonic() - start >= 0.18
+
+
+def test_limiter_tasks():
+    limiter = RateLimiter({"action": (100, 1)})
+
+    async def main():
+        start = monotonic()
+        await asyncio.gather(*(limiter.acquire_async("action") for _ in range(20)))
+        return monotonic() - start
+
+    assert asyncio.run(main()) >= 0.18
+
+
+def test_concurrency_limit():
+    controller = ConcurrencyController(window=3, max_window=3, latency_factor=None)
+    running = []
+
+    async def request():
+        start = await controller.acquire()
+        running.append(controller.in_flight)
+        await asyncio.sleep(0.01)
+        controller.release(start, 200)
+
+    async def main():
+        await asyncio.gather(*(request() for _ in range(20)))
+
+    asyncio.run(main())
+    assert max(running) == 3
+    assert controller.in_flight == 0
+    assert controller.successes == 20
+
+
+def test_concurrency_aimd():
+    controller = ConcurrencyController(window=4, max_window=8, latency_factor=None)
+
+    async def main():
+        for _ in range(40):
+            controller.release(await controller.acquire(), 200)
+        assert controller.window > 4
+        window = controller.window
+
+        starts = [await controller.acquire() for _ in range(3)]
+        for start in starts:
+            controller.release(start, 429)
+        # Requests sent before the decrease don't decrease the window again
+        assert controller.window == window / 2
+
+        controller.release(await controller.acquire(), 503)
+        assert controller.window == window / 4
+
+    asyncio.run(main())
+
+
+def test_concurrency_latency():
+    controller = ConcurrencyController(window=8, samples=10, latency_factor=2)
+    controller.baseline = 0.001
+
+    async def main():
+        start = await controller.acquire()
+        await asyncio.sleep(0.01)
+        controller.release(start, 200)
+
+    asyncio.run(main())
+    assert controller.window == 4
+
+
+def test_concurrency_cancel():
+    controller = ConcurrencyController(window=16, max_window=16, latency_factor=None)
+
+    async def main():
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        controller.window = 1
+        await asyncio.sleep(0)
+        controller.cancel()
+        # Cancelled request frees its slot for the waiter and doesn't change the window
+        await waiter
+        assert controller.in_flight == 1
+
+    asyncio.run(main())
+    assert controller.window == 1
+    assert controller.failures == 0
+
+
+def test_cancelled_requests():
+    controller = ConcurrencyController(window=16, max_window=16, latency_factor=None)
+
+    async def main(url):
+        agent = AsyncWebAgent(root_url=url, concurrency=controller)
+        try:
+            for _ in range(3):
+                with pytest.raises(asyncio.TimeoutError):
+                    await asyncio.wait_for(agent.get_request(url + "/"), 0.05)
+        finally:
+            await agent.delete()
+
+    with MockInstagram(latency=0.5).run() as url:
+        asyncio.run(main(url))
+    assert controller.window == 16
+    assert controller.failures == 0
+    assert controller.in_flight == 0
@@ -0,0 +1,126 @@
+import asyncio
+from instagram.agents import AsyncWebAgent, WebAgent, WebAgentAccount
+from instagram.entities import Account, Media
+from instagram.exceptions import InternetException
+from instagram.tracing import OpenTelemetryTracer, Tracer, current_span
+import pytest
+from tests.mock_server import MockInstagram
+
+
+def setup_function():
+    Account.clear_cache()
+    Media.clear_cache()
+    WebAgentAccount.clear_cache()
+
+
+def test_span():
+    started = []
+    ended = []
+    tracer = Tracer(on_start=started.append, on_end=ended.append)
+    with tracer.span("parent", key="value") as parent:
+        assert current_span.get() is parent
+        with pytest.raises(ValueError):
+            with tracer.span("child"):
+                raise ValueError()
+    assert current_span.get() is None
+
+    child = ended[0]
+    assert started == [parent, child]
+    assert ended == [child, parent]
+    assert child.parent is parent and child.path() == "parent/child"
+    assert isinstance(child.error, ValueError) and parent.error is None
+    assert parent.attributes == {"key": "value"}
+    assert parent.duration >= child.duration >= 0
+
+
+def test_wrong_callbacks():
+    with pytest.raises(TypeError):
+        Tracer(on_start="function")
+    with pytest.raises(TypeError):
+        WebAgent(tracer="tracer")
+
+
+def test_agent():
+    spans = []
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgent(root_url=url, tracer=Tracer(on_end=spans.append))
+        media, _ = agent.get_media(Account("zuck"), count=30)
+    assert len(media) == 30
+
+    operation = spans[-1]
+    assert operation.name == "get_media" and operation.parent is None
+    assert operation.attributes["target"] == "Account zuck"
+    paths = [span.path() for span in spans]
+    assert "get_media/update/http" in paths
+    assert "get_media/update/extract" in paths
+    assert "get_media/update/set_data" in paths
+    assert "get_media/http" in paths
+    assert "get_media/decode" in paths
+    assert "get_media/parse" in paths
+    http = [span for span in spans if span.name == "http"]
+    assert all(span.attributes["status"] == 200 for span in http)
+
+
+def test_failed_request():
+    spans = []
+    with MockInstagram(total=30, error_rate=1).run() as url:
+        agent = WebAgent(root_url=url, tracer=Tracer(on_end=spans.append))
+        with pytest.raises(InternetException):
+            agent.update(Account("zuck"))
+    assert all(isinstance(span.error, InternetException) for span in spans)
+    assert all(span.attributes["status"] == 500 for span in spans if span.name == "http")
+    assert spans[-1].name == "update"
+
+
+def test_write_action():
+    spans = []
+    with MockInstagram(total=30).run() as url:
+        agent = WebAgentAccount("username", root_url=url, tracer=Tracer(on_end=spans.append))
+        agent.auth("password")
+        spans.clear()
+        assert agent.like(Media("B"))
+    assert spans[-1].name == "like" and spans[-1].attributes["target"] == "Media B"
+    assert any(span.path() == "like/http" for span in spans)
+
+
+def test_async_agent():
+    spans = []
+
+    async def main(url):
+        agent = AsyncWebAgent(root_url=url, prefetch=1, tracer=Tracer(on_end=spans.append))
+        try:
+            # Spans of concurrent operations don't mix, every task has its own current span
+            return await asyncio.gather(
+                agent.get_media(Account("user1"), count=30),
+                agent.get_comments(Media("B"), count=30),
+            )
+        finally:
+            await agent.delete()
+
+    with MockInstagram(total=30).run() as url:
+        asyncio.run(main(url))
+
+    roots = {span.name for span in spans if span.parent is None}
+    assert roots == {"get_media", "get_comments"}
+    for span in spans:
+        if span.name == "parse":
+            assert span.parent.name in ("get_media", "get_comments")
+    assert any(span.path() == "get_comments/http" for span in spans)
+
+
+def test_open_telemetry():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = OpenTelemetryTracer(provider.get_tracer("tests"))
+    with MockInstagram(total=30).run() as url:
+        WebAgent(root_url=url, tracer=tracer).update(Account("zuck"))
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert spans["http"].parent.span_id == spans["update"].context.span_id
+    assert spans["http"].attributes["status"] == 200